@@ -6,6 +6,8 @@ import os
 class Settings(BaseSettings):
     # Database - Using SQLite for testing
     database_url: str = "sqlite:///./journeo.db"
+    # Create missing tables and columns at startup; turn off and run scripts.migrate once for multi-worker deploys
+    database_auto_migrate: bool = True
     
     # JWT
     secret_key: str = "your-secret-key-here"
@@ -18,12 +20,115 @@ class Settings(BaseSettings):
     openroute_api_key: str = ""
     
     # External API URLs
+    openweather_api_url: str = "http://api.openweathermap.org/data/2.5"
+    openroute_api_url: str = "https://api.openrouteservice.org"
+    groq_api_url: str = "https://api.groq.com"
     exchangerate_api_url: str = "https://api.exchangerate.host"
     libretranslate_api_url: str = "https://libretranslate.de/translate"
     overpass_api_url: str = "https://overpass-api.de/api/interpreter"
     
+    # Upstream rate limits (sustained requests per second and burst size).
+    # A rate of 0 disables limiting for that upstream.
+    upstream_max_wait: float = 2.0  # Seconds to wait for a slot before falling back
+    openweather_rate_limit: float = 1.0
+    openweather_rate_burst: int = 10
+    exchangerate_rate_limit: float = 2.0
+    exchangerate_rate_burst: int = 10
+    libretranslate_rate_limit: float = 0.5
+    libretranslate_rate_burst: int = 5
+    openroute_rate_limit: float = 0.6
+    openroute_rate_burst: int = 5
+    overpass_rate_limit: float = 0.5
+    overpass_rate_burst: int = 2
+    groq_rate_limit: float = 0.5
+    groq_rate_burst: int = 3
+    groq_max_wait: float = 30.0  # LLM calls already take minutes, so wait longer
+    
+    # Admission control per worker. "llm" routes run the crew; everything else is "default".
+    # Keep llm concurrency well below the threadpool size (40) so cheap routes keep threads.
+    admission_enabled: bool = True
+    admission_llm_paths: List[str] = ["/api/trips/plan", "/api/trips/*/replan"]
+    admission_exempt_paths: List[str] = ["/health*", "/metrics", "/docs*", "/redoc", "/openapi.json"]
+    admission_llm_concurrency: int = 4
+    admission_llm_queue: int = 8
+    admission_llm_max_wait: float = 10.0
+    admission_llm_retry_after: int = 60
+    admission_default_concurrency: int = 32
+    admission_default_queue: int = 128
+    admission_default_max_wait: float = 5.0
+    admission_default_retry_after: int = 1
+    
+    # Cache backend shared by the services: memory (per worker), sqlite (per host) or redis
+    cache_backend: str = "memory"
+    cache_sqlite_path: str = "./journeo_cache.db"
+    cache_redis_url: str = "redis://localhost:6379/0"
+    cache_key_prefix: str = "journeo"
+    cache_max_entries: int = 1000  # Default size bound per cache namespace
+    geocode_cache_ttl: int = 2592000  # Addresses rarely move; 30 days
+    translation_cache_ttl: int = 604800
+    overpass_cache_ttl: int = 86400
+    route_cache_ttl: int = 604800  # Directions between the same points; use CACHE_BACKEND=sqlite/redis to persist
+    route_matrix_cache_ttl: int = 604800  # Street networks change slowly; 7 days
+    route_matrix_estimate_below_m: float = 500  # Closer pairs use a great-circle estimate instead of ORS
+    
+    # Local accommodation index written by scripts.import_osm; Overpass is used when missing
+    osm_index_path: str = "./journeo_osm.db"
+    
+    # Map viewport search: clusters below this zoom, points at or above it
+    accommodation_cluster_max_zoom: int = 15
+    accommodation_cluster_cell_px: int = 80  # Approximate on-screen size of a cluster cell
+    accommodation_viewport_max_points: int = 500
+    accommodation_viewport_max_span: float = 0.5  # Degrees; larger viewports need the local OSM index
+    
+    # Local gazetteer: a GeoNames dump (e.g. cities15000.zip); empty uses the bundled seed
+    gazetteer_path: str = ""
+    gazetteer_min_population: int = 0
+    gazetteer_alternate_names: bool = True
+    
+    # Weather caching and batch lookups
+    weather_cache_ttl: int = 600  # Seconds to keep current weather
+    forecast_cache_ttl: int = 1800  # Seconds to keep forecasts
+    weather_cache_size: int = 1000  # Cities per cache
+    weather_batch_concurrency: int = 8  # Parallel upstream calls per batch request
+    rates_cache_ttl: int = 3600  # Seconds to keep exchange rate tables
+    
+    # Trips starting after the forecast horizon get expected weather from monthly climate normals
+    forecast_horizon_days: int = 5
+    climate_normals_path: str = ""  # Empty uses the bundled table
+    climate_normals_max_distance_km: float = 150.0
+    
+    # Destination overview: sections still running after the timeout are reported as such
+    destination_overview_timeout: float = 8.0
+    destination_overview_workers: int = 16
+    
+    # Language detection: local trigram model first, LibreTranslate when unsure
+    language_detect_min_confidence: float = 0.5
+    language_detect_remote_fallback: bool = True
+    
+    # LLM crew
+    ai_verbose: bool = False  # crewai agent/crew logging; very chatty
+    ai_context_max_chars: int = 6000  # Cap on earlier stage output passed to the next task; 0 disables
+    
+    # Destination research shared across trips
+    research_cache_ttl: int = 86400
+    research_cache_size: int = 500
+    
+    # Background cache warmup for popular destinations
+    warmup_enabled: bool = False
+    warmup_single_runner: bool = True  # Only one worker per host runs warmup
+    warmup_lock_path: str = "./journeo_warmup.lock"
+    warmup_interval: int = 300  # Seconds between runs; keep below WEATHER_CACHE_TTL
+    warmup_initial_delay: int = 5
+    warmup_margin: int = 60  # Extra seconds of headroom before an entry expires
+    warmup_top_destinations: int = 10  # Most planned destinations from the trips table
+    warmup_destinations: List[str] = []  # Always kept warm
+    warmup_currencies: List[str] = ["USD"]
+    
     # Application
     debug: bool = True
+    log_level: str = "INFO"
+    preload_ai_service: bool = False  # Import crewai/groq at startup instead of on first use
+    metrics_enabled: bool = True
     cors_origins: List[str] = ["http://localhost:3000", "http://127.0.0.1:3000"]
     
     class Config:
@@ -1,19 +1,70 @@
-from fastapi import FastAPI
+import logging
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
-from app.models.database import engine, Base
-from app.routers import trips, weather, currency, translate, routes, accommodations
+from app.models.database import migrate
+from app.routers import trips, weather, currency, translate, routes, accommodations, places, destinations
+from app.services.registry import ServiceRegistry
+from app.services.warmup import WarmupScheduler
+from app.utils.admission import AdmissionRejected, admission_controller
+from app.utils.cache import cache_stats
+from app.utils.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS, render_metrics
+from app.utils.rate_limiter import upstream_scheduler
+
+logging.basicConfig(level=settings.log_level.upper())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create database tables and the shared services once per worker
+    """
+    if settings.database_auto_migrate:
+        migrate()
+    
+    app.state.services = ServiceRegistry()
+    app.state.services.preload(include_ai=settings.preload_ai_service)
+    
+    app.state.warmup = WarmupScheduler(app.state.services)
+    if settings.warmup_enabled:
+        app.state.warmup.start()
+    
+    yield
+    
+    app.state.warmup.stop()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
 # Create FastAPI app
 app = FastAPI(
     title="Journeo API",
     description="AI-Powered Travel Planner API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Shed load before it reaches the threadpool; registered first so CORS still wraps the 503
+if settings.admission_enabled:
+    @app.middleware("http")
+    async def admission_control(request: Request, call_next):
+        limiter = admission_controller.limiter(request.method, request.url.path)
+        if limiter is None:
+            return await call_next(request)
+        try:
+            await limiter.acquire()
+        except AdmissionRejected as e:
+            return JSONResponse(
+                status_code=503,
+                content={"detail": "Server is busy, please retry later"},
+                headers={"Retry-After": str(e.retry_after)}
+            )
+        try:
+            return await call_next(request)
+        finally:
+            limiter.release()
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -21,8 +72,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Record per-route latency and status
+if settings.metrics_enabled:
+    @app.middleware("http")
+    async def record_request_metrics(request: Request, call_next):
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            # Use the route template so path parameters don't explode cardinality
+            route = request.scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            HTTP_REQUEST_DURATION.labels(request.method, path).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(request.method, path, str(status)).inc()
+
 # Include routers
 app.include_router(trips.router)
 app.include_router(weather.router)
@@ -30,6 +99,8 @@ app.include_router(currency.router)
 app.include_router(translate.router)
 app.include_router(routes.router)
 app.include_router(accommodations.router)
+app.include_router(places.router)
+app.include_router(destinations.router)
 
 
 @app.get("/")
@@ -53,6 +124,52 @@ async def health_check():
     return {"status": "healthy", "message": "Journeo API is running"}
 
 
+@app.get("/health/upstreams")
+async def upstream_status():
+    """
+    Rate limiter state per upstream: queue depth, wait times and rejections
+    """
+    return upstream_scheduler.stats()
+
+
+@app.get("/health/admission")
+async def admission_status():
+    """
+    In-flight, queued and rejected requests per route class in this worker
+    """
+    return admission_controller.stats()
+
+
+@app.get("/health/caches")
+async def cache_health():
+    """
+    Size and hit/miss counts of each cache namespace in this worker
+    """
+    return cache_stats()
+
+
+@app.get("/health/warmup")
+async def warmup_status():
+    """
+    Result of the last background cache warmup run
+    """
+    return {
+        "enabled": settings.warmup_enabled,
+        "running": app.state.warmup.running,
+        "interval": settings.warmup_interval,
+        "last_run": app.state.warmup.last_run
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus metrics endpoint
+    """
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
@@ -13,6 +14,47 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def add_missing_columns():
+    """
+    Add nullable columns that were added to a model after its table was created.
+    create_all only creates missing tables, so older databases need this.
+    Safe to run from several workers at once: a column another process added
+    in the meantime is not an error.
+    """
+    inspector = inspect(engine)
+    # Postgres can skip existing columns itself; elsewhere a lost race is caught below
+    if_not_exists = "IF NOT EXISTS " if engine.dialect.name == "postgresql" else ""
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            try:
+                with engine.begin() as connection:
+                    connection.execute(text(
+                        f"ALTER TABLE {table.name} ADD COLUMN {if_not_exists}{column.name} {column_type}"
+                    ))
+            except DBAPIError:
+                if column.name not in {c["name"] for c in inspect(engine).get_columns(table.name)}:
+                    raise
+
+
+def migrate():
+    """
+    Create missing tables and columns; a table another process created first is not an error
+    """
+    for table in Base.metadata.sorted_tables:
+        try:
+            table.create(bind=engine, checkfirst=True)
+        except DBAPIError:
+            if not inspect(engine).has_table(table.name):
+                raise
+    add_missing_columns()
+
+
 def get_db():
     """Dependency to get database session"""
     db = SessionLocal()
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Date, ForeignKey, Integer, JSON, String, Text
+from sqlalchemy.orm import relationship
+
+from app.models.database import Base
+
+
+class ItineraryDay(Base):
+    __tablename__ = "itinerary_days"
+
+    id = Column(Integer, primary_key=True, index=True)
+    trip_id = Column(Integer, ForeignKey("trips.id", ondelete="CASCADE"), nullable=False, index=True)
+    day_number = Column(Integer, nullable=False)
+    date = Column(Date)
+    title = Column(String)
+    body = Column(Text, nullable=False)  # Markdown of this day as generated
+    translations = Column(JSON)  # Translated body per language code
+
+    activities = relationship(
+        "ItineraryActivity",
+        back_populates="day",
+        cascade="all, delete-orphan",
+        order_by="ItineraryActivity.position",
+        lazy="selectin"
+    )
+
+
+class ItineraryActivity(Base):
+    __tablename__ = "itinerary_activities"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day_id = Column(Integer, ForeignKey("itinerary_days.id", ondelete="CASCADE"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+    time = Column(String)  # "09:00", "Morning", ... when the line starts with one
+    description = Column(Text, nullable=False)
+
+    day = relationship("ItineraryDay", back_populates="activities")
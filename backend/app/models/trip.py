@@ -1,6 +1,8 @@
 from sqlalchemy import Column, Integer, String, DateTime, Text, Float, JSON
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.models.database import Base
+from app.models.itinerary import ItineraryDay
 
 
 class Trip(Base):
@@ -14,6 +16,24 @@ class Trip(Base):
     budget = Column(Float)
     travel_type = Column(String)  # budget, luxury, adventure, etc.
     preferences = Column(JSON)  # Store user preferences as JSON
-    itinerary = Column(Text)  # AI-generated itinerary
+    itinerary = Column(Text)  # AI-generated itinerary, also parsed into days below
+    stage_outputs = Column(JSON)  # research/planning/budget text, reused when re-planning
+    language = Column(String)
+    translated_itinerary = Column(Text)
+    
+    # Enrichment snapshot so the trip view can be rebuilt from one read
+    weather = Column(JSON)
+    forecast = Column(JSON)
+    forecast_options = Column(JSON)  # aggregate/trip window/format the forecast was built with
+    currency_info = Column(JSON)
+    enrichments = Column(JSON)  # Parts requested when planning (weather/forecast/currency/translation); null means all
+    enriched_at = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now()) 
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    days = relationship(
+        ItineraryDay,
+        cascade="all, delete-orphan",
+        order_by=ItineraryDay.day_number,
+        lazy="select"
+    ) 
\ No newline at end of file
@@ -1,13 +1,51 @@
-from fastapi import APIRouter, HTTPException
-from app.services.accommodation_service import AccommodationService
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.services.accommodation_service import AccommodationService, AccommodationUnavailable
+from app.services.registry import get_accommodation_service
 
 router = APIRouter(prefix="/api/accommodations", tags=["accommodations"])
 
-accommodation_service = AccommodationService()
+
+# Declared before /{city} so "viewport" and "detail" are not taken as city names
+@router.get("/viewport")
+def find_accommodations_in_viewport(south: float = Query(..., ge=-90, le=90), west: float = Query(..., ge=-180, le=180),
+                                    north: float = Query(..., ge=-90, le=90), east: float = Query(..., ge=-180, le=180),
+                                    zoom: int = Query(..., ge=0, le=22),
+                                    accommodation_service: AccommodationService = Depends(get_accommodation_service)):
+    """
+    Clusters or compact points for a map viewport, depending on zoom
+    """
+    if south >= north or west >= east:
+        raise HTTPException(status_code=400, detail="Viewport must have south < north and west < east")
+    try:
+        return accommodation_service.find_in_viewport(south, west, north, east, zoom)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except AccommodationUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error finding accommodations: {str(e)}")
+
+
+@router.get("/detail/{osm_type}/{osm_id}")
+def get_accommodation(osm_type: Literal["node", "way", "relation"], osm_id: int,
+                      accommodation_service: AccommodationService = Depends(get_accommodation_service)):
+    """
+    Full record of one accommodation, by the id of a viewport point
+    """
+    try:
+        accommodation = accommodation_service.get_accommodation(osm_type, osm_id)
+    except AccommodationUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching accommodation: {str(e)}")
+    if accommodation is None:
+        raise HTTPException(status_code=404, detail="Accommodation not found")
+    return accommodation
 
 
 @router.get("/{city}")
-async def find_accommodations(city: str, limit: int = 10):
+def find_accommodations(city: str, limit: int = 10, accommodation_service: AccommodationService = Depends(get_accommodation_service)):
     """
     Find accommodations in a city
     """
@@ -19,7 +57,7 @@ async def find_accommodations(city: str, limit: int = 10):
 
 
 @router.get("/coordinates/{lat}/{lon}")
-async def find_accommodations_by_coordinates(lat: float, lon: float, radius: float = 5000, limit: int = 10):
+def find_accommodations_by_coordinates(lat: float, lon: float, radius: float = 5000, limit: int = 10, accommodation_service: AccommodationService = Depends(get_accommodation_service)):
     """
     Find accommodations near specific coordinates
     """
@@ -1,14 +1,13 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from app.schemas.trip import CurrencyRequest
 from app.services.currency_service import CurrencyService
+from app.services.registry import get_currency_service
 
 router = APIRouter(prefix="/api/currency", tags=["currency"])
 
-currency_service = CurrencyService()
-
 
 @router.get("/convert")
-async def convert_currency(from_currency: str, to_currency: str, amount: float = 1.0):
+def convert_currency(from_currency: str, to_currency: str, amount: float = 1.0, currency_service: CurrencyService = Depends(get_currency_service)):
     """
     Convert currency
     """
@@ -20,7 +19,7 @@ async def convert_currency(from_currency: str, to_currency: str, amount: float =
 
 
 @router.get("/rates")
-async def get_exchange_rates(base_currency: str = "USD"):
+def get_exchange_rates(base_currency: str = "USD", currency_service: CurrencyService = Depends(get_currency_service)):
     """
     Get all exchange rates for a base currency
     """
@@ -32,7 +31,7 @@ async def get_exchange_rates(base_currency: str = "USD"):
 
 
 @router.get("/historical/{date}")
-async def get_historical_rates(date: str, base_currency: str = "USD"):
+def get_historical_rates(date: str, base_currency: str = "USD", currency_service: CurrencyService = Depends(get_currency_service)):
     """
     Get historical exchange rates for a specific date
     """
@@ -44,7 +43,7 @@ async def get_historical_rates(date: str, base_currency: str = "USD"):
 
 
 @router.get("/currencies")
-async def get_currencies():
+def get_currencies(currency_service: CurrencyService = Depends(get_currency_service)):
     """
     Get list of supported currencies
     """
@@ -56,7 +55,7 @@ async def get_currencies():
 
 
 @router.post("/convert")
-async def convert_currency_post(request: CurrencyRequest):
+def convert_currency_post(request: CurrencyRequest, currency_service: CurrencyService = Depends(get_currency_service)):
     """
     Convert currency using POST request
     """
@@ -0,0 +1,26 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.services.destination_service import DestinationService
+from app.services.registry import get_destination_service
+
+router = APIRouter(prefix="/api/destinations", tags=["destinations"])
+
+
+@router.get("/{city}/overview")
+def get_destination_overview(
+    city: str,
+    country_code: str = None,
+    base_currency: str = "USD",
+    accommodation_limit: int = Query(5, ge=1, le=50),
+    forecast: Literal["daily", "rows"] = "daily",
+    destination_service: DestinationService = Depends(get_destination_service)
+):
+    """
+    Weather, forecast, exchange rates and accommodations for a destination page in one call.
+    Sections that fail are null, with the reason under "sections".
+    """
+    try:
+        aggregate = "daily" if forecast == "daily" else None
+        return destination_service.get_overview(city, country_code, base_currency, accommodation_limit, aggregate)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching destination overview: {str(e)}")
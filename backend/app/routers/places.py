@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.services.gazetteer import Gazetteer, get_gazetteer
+
+router = APIRouter(prefix="/api/places", tags=["places"])
+
+
+@router.get("/autocomplete")
+def autocomplete_places(q: str = Query(..., min_length=1), limit: int = Query(8, ge=1, le=25),
+                        gazetteer: Gazetteer = Depends(get_gazetteer)):
+    """
+    Cities and landmarks whose name starts with q, for destination inputs
+    """
+    try:
+        places = gazetteer.autocomplete(q, limit)
+        return {"query": q, "places": [place.to_dict() for place in places], "count": len(places)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching places: {str(e)}")
+
+
+@router.get("/geocode")
+def geocode_place(q: str = Query(..., min_length=1), gazetteer: Gazetteer = Depends(get_gazetteer)):
+    """
+    Coordinates of a city or landmark from the local gazetteer
+    """
+    place = gazetteer.lookup(q)
+    if place is None:
+        raise HTTPException(status_code=404, detail=f"No place found for {q!r}")
+    return {"query": q, **place.to_dict()}
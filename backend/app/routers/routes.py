@@ -1,43 +1,56 @@
-from fastapi import APIRouter, HTTPException
-from app.schemas.trip import RouteRequest
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.schemas.trip import RouteMatrixRequest, RouteRequest
 from app.services.route_service import RouteService
+from app.services.registry import get_route_service
 
 router = APIRouter(prefix="/api/routes", tags=["routes"])
 
-route_service = RouteService()
-
 
 @router.get("/")
-async def get_route(start: str, end: str, mode: str = "driving"):
+def get_route(start: str, end: str, mode: str = "driving", waypoints: List[str] = Query([], max_length=48),
+              route_service: RouteService = Depends(get_route_service)):
     """
-    Get route between two points
+    Get route between two points, via any ordered waypoints (?waypoints=A&waypoints=B)
     """
     try:
-        route = route_service.get_route(start, end, mode)
+        route = route_service.get_route(start, end, mode, waypoints)
         return route
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching route: {str(e)}")
 
 
 @router.get("/multimodal")
-async def get_multimodal_route(start: str, end: str):
+def get_multimodal_route(start: str, end: str, waypoints: List[str] = Query([], max_length=48),
+                         route_service: RouteService = Depends(get_route_service)):
     """
     Get multimodal route suggestions
     """
     try:
-        routes = route_service.get_multimodal_route(start, end)
+        routes = route_service.get_multimodal_route(start, end, waypoints)
         return routes
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching multimodal routes: {str(e)}")
 
 
 @router.post("/")
-async def get_route_post(request: RouteRequest):
+def get_route_post(request: RouteRequest, route_service: RouteService = Depends(get_route_service)):
     """
     Get route using POST request
     """
     try:
-        route = route_service.get_route(request.start, request.end, request.mode)
+        route = route_service.get_route(request.start, request.end, request.mode, request.waypoints)
         return route
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching route: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error fetching route: {str(e)}")
+
+
+@router.post("/matrix")
+def get_route_matrix(request: RouteMatrixRequest, route_service: RouteService = Depends(get_route_service)):
+    """
+    Distance and duration between every pair of places, for each mode
+    """
+    try:
+        return route_service.get_matrix(request.places, request.modes)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching route matrix: {str(e)}")
\ No newline at end of file
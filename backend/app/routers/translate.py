@@ -1,14 +1,13 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from app.schemas.trip import TranslationRequest
 from app.services.translation_service import TranslationService
+from app.services.registry import get_translation_service
 
 router = APIRouter(prefix="/api/translate", tags=["translate"])
 
-translation_service = TranslationService()
-
 
 @router.post("/")
-async def translate_text(request: TranslationRequest):
+def translate_text(request: TranslationRequest, translation_service: TranslationService = Depends(get_translation_service)):
     """
     Translate text to target language
     """
@@ -24,7 +23,7 @@ async def translate_text(request: TranslationRequest):
 
 
 @router.post("/itinerary")
-async def translate_itinerary(text: str, target_language: str):
+def translate_itinerary(text: str, target_language: str, translation_service: TranslationService = Depends(get_translation_service)):
     """
     Translate a complete travel itinerary
     """
@@ -36,7 +35,7 @@ async def translate_itinerary(text: str, target_language: str):
 
 
 @router.get("/languages")
-async def get_supported_languages():
+def get_supported_languages(translation_service: TranslationService = Depends(get_translation_service)):
     """
     Get list of supported languages
     """
@@ -48,7 +47,7 @@ async def get_supported_languages():
 
 
 @router.post("/detect")
-async def detect_language(text: str):
+def detect_language(text: str, translation_service: TranslationService = Depends(get_translation_service)):
     """
     Detect the language of the input text
     """
@@ -1,27 +1,217 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+import logging
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session, defer, load_only
+from typing import Any, Dict, List, Optional
 from app.models.database import get_db
+from app.models.itinerary import ItineraryDay
 from app.models.trip import Trip
-from app.schemas.trip import TripCreate, TripResponse, ItineraryRequest
+from app.schemas.trip import (
+    TripCreate,
+    TripResponse,
+    TripDetailResponse,
+    ItineraryRequest,
+    ItineraryDayResponse,
+    ReplanRequest,
+    ENRICHMENTS
+)
+from app.services.itinerary_parser import build_itinerary_days
 from app.services.ai_service import AIService
 from app.services.weather_service import WeatherService
 from app.services.currency_service import CurrencyService
 from app.services.translation_service import TranslationService
+from app.services.registry import (
+    get_ai_service,
+    get_weather_service,
+    get_currency_service,
+    get_translation_service
+)
+from app.utils.timing import StageTimer
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/trips", tags=["trips"])
 
-ai_service = AIService()
-weather_service = WeatherService()
-currency_service = CurrencyService()
-translation_service = TranslationService()
+# Large columns the list view does not return
+SNAPSHOT_COLUMNS = (
+    Trip.stage_outputs,
+    Trip.translated_itinerary,
+    Trip.weather,
+    Trip.forecast,
+    Trip.forecast_options,
+    Trip.currency_info,
+    Trip.enrichments
+)
+
+
+def _enrich_trip(
+    trip: Trip,
+    weather_service: WeatherService,
+    currency_service: CurrencyService,
+    timer: StageTimer
+):
+    """
+    Fetch the weather, forecast and currency info the trip asked for and store them on it
+    """
+    options = trip.forecast_options or {}
+    trip_window = options.get("trip_window", False)
+    include = _enrichments(trip)
+    
+    if "weather" in include:
+        with timer.stage("weather"):
+            trip.weather = weather_service.get_current_weather(trip.destination)
+    if "forecast" in include:
+        with timer.stage("forecast"):
+            if weather_service.in_forecast_window(trip.start_date, trip.end_date):
+                trip.forecast = weather_service.get_forecast(
+                    trip.destination,
+                    aggregate=options.get("aggregate"),
+                    start_date=trip.start_date if trip_window else None,
+                    end_date=trip.end_date if trip_window else None,
+                    format=options.get("format", "rows")
+                )
+            else:
+                # A live forecast says nothing about dates past its horizon; use the climate normals
+                trip.forecast = weather_service.get_climate_outlook(
+                    trip.destination,
+                    trip.start_date,
+                    trip.end_date,
+                    format=options.get("format", "rows")
+                )
+                if trip.forecast is None:
+                    logger.info("No climate normals near %s; trip is outside the forecast window", trip.destination)
+                    trip.forecast = {
+                        "city": trip.destination,
+                        "source": "unavailable",
+                        "reason": "outside_forecast_window_no_climate_normals"
+                    }
+    
+    # Get currency information if budget is provided
+    if trip.budget and "currency" in include:
+        with timer.stage("currency"):
+            trip.currency_info = currency_service.get_exchange_rates("USD")
+    
+    trip.enriched_at = datetime.now(timezone.utc)
+
+
+def _enrichments(trip: Trip) -> List[str]:
+    """
+    Enrichments stored with the trip; trips saved before the include option get all of them
+    """
+    return trip.enrichments if trip.enrichments is not None else list(ENRICHMENTS)
+
+
+def _wants_translation(trip: Trip) -> bool:
+    return bool(trip.language) and trip.language != "en" and "translation" in _enrichments(trip)
+
+
+def _changed_fields(trip: Trip, requested: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Requested values that differ from the stored trip. Trip dates are stored
+    without an offset, so datetimes are compared and saved as naive wall-clock
+    times; otherwise an aware request date never equals the stored one.
+    """
+    changes = {}
+    for field, value in requested.items():
+        stored = getattr(trip, field)
+        if isinstance(value, datetime):
+            value = value.replace(tzinfo=None)
+        if isinstance(stored, datetime):
+            stored = stored.replace(tzinfo=None)
+        if stored != value:
+            changes[field] = value
+    return changes
+
+
+def _replan_stages(changes: Dict[str, Any]) -> List[str]:
+    """
+    Crew stages a change affects, in pipeline order
+    """
+    stages = []
+    if "travel_type" in changes:
+        stages.append("research")
+    if changes.keys() & {"travel_type", "start_date", "end_date", "preferences"}:
+        stages.append("planning")
+    if changes:
+        stages.append("budget")
+    return stages
+
+
+def _query_days(db: Session, trip_id: int, start_day: int, end_day: Optional[int]) -> List[ItineraryDay]:
+    """
+    Load only the requested days. Trips saved before itineraries were
+    parsed get their days built on first access.
+    """
+    def query():
+        days = db.query(ItineraryDay).filter(
+            ItineraryDay.trip_id == trip_id,
+            ItineraryDay.day_number >= start_day
+        )
+        if end_day is not None:
+            days = days.filter(ItineraryDay.day_number <= end_day)
+        return days.order_by(ItineraryDay.day_number).all()
+    
+    days = query()
+    if days:
+        return days
+    
+    trip = (
+        db.query(Trip)
+        .options(load_only(Trip.id, Trip.itinerary, Trip.start_date))
+        .filter(Trip.id == trip_id)
+        .first()
+    )
+    if not trip:
+        raise HTTPException(status_code=404, detail="Trip not found")
+    
+    if trip.itinerary and not db.query(ItineraryDay.id).filter(ItineraryDay.trip_id == trip_id).first():
+        trip.days = build_itinerary_days(trip.itinerary, trip.start_date)
+        db.commit()
+        days = query()
+    
+    return days
+
+
+def _render_day(day: ItineraryDay, language: Optional[str], translation_service: TranslationService) -> ItineraryDayResponse:
+    """
+    Build the day response, translating its body once per language and keeping the result
+    """
+    translated_body = None
+    if language and language != "en":
+        translations = day.translations or {}
+        if language not in translations:
+            result = translation_service.translate_itinerary(day.body, language)
+            if result["success"]:
+                # Reassign so SQLAlchemy sees the JSON change
+                day.translations = {**translations, language: result["translated_itinerary"]}
+        translated_body = (day.translations or {}).get(language)
+    
+    return ItineraryDayResponse(
+        day_number=day.day_number,
+        date=day.date,
+        title=day.title,
+        body=day.body,
+        activities=day.activities,
+        language=language or "en",
+        translated_body=translated_body
+    )
 
 
 @router.post("/plan", response_model=dict)
-async def plan_trip(request: ItineraryRequest, db: Session = Depends(get_db)):
+def plan_trip(
+    request: ItineraryRequest,
+    response: Response,
+    db: Session = Depends(get_db),
+    ai_service: AIService = Depends(get_ai_service),
+    weather_service: WeatherService = Depends(get_weather_service),
+    currency_service: CurrencyService = Depends(get_currency_service),
+    translation_service: TranslationService = Depends(get_translation_service)
+):
     """
-    Generate an AI-powered travel itinerary
+    Generate an AI-powered travel itinerary.
+    Stage timings are returned in the Server-Timing header.
     """
+    timer = StageTimer("plan_trip")
     try:
         # Generate itinerary using AI
         trip_data = {
@@ -34,76 +224,255 @@ async def plan_trip(request: ItineraryRequest, db: Session = Depends(get_db)):
             "preferences": request.preferences
         }
         
-        itinerary = ai_service.generate_itinerary(trip_data)
+        with timer.stage("crew"):
+            plan = ai_service.run_stages(trip_data)
+        itinerary = plan["itinerary"]
+        
+        db_trip = Trip(
+            **trip_data,
+            itinerary=itinerary,
+            stage_outputs=plan["stages"] or None,
+            language=request.language,
+            forecast_options={
+                "aggregate": request.forecast_aggregate,
+                "trip_window": request.forecast_trip_window,
+                "format": request.forecast_format
+            },
+            # Stored so refreshes and re-plans fetch the same parts
+            enrichments=None if set(request.include) >= set(ENRICHMENTS) else list(dict.fromkeys(request.include))
+        )
         
-        # Get weather information for destination
-        weather = weather_service.get_current_weather(request.destination)
-        forecast = weather_service.get_forecast(request.destination)
+        # Keep a structured copy so single days can be read without the whole text
+        db_trip.days = build_itinerary_days(itinerary, request.start_date)
         
-        # Get currency information if budget is provided
-        currency_info = None
-        if request.budget:
-            currency_info = currency_service.get_exchange_rates("USD")
+        # Get weather, forecast and currency information for destination
+        _enrich_trip(db_trip, weather_service, currency_service, timer)
         
         # Translate itinerary if language is specified
-        translated_itinerary = None
-        if request.language and request.language != "en":
-            translation_result = translation_service.translate_itinerary(itinerary, request.language)
+        if _wants_translation(db_trip):
+            with timer.stage("translation"):
+                translation_result = translation_service.translate_itinerary(itinerary, request.language)
             if translation_result["success"]:
-                translated_itinerary = translation_result["translated_itinerary"]
+                db_trip.translated_itinerary = translation_result["translated_itinerary"]
         
-        # Save trip to database
-        db_trip = Trip(
-            source=request.source,
-            destination=request.destination,
-            start_date=request.start_date,
-            end_date=request.end_date,
-            budget=request.budget,
-            travel_type=request.travel_type,
-            preferences=request.preferences,
-            itinerary=itinerary
-        )
+        # Save trip and its snapshot to database
+        with timer.stage("db"):
+            db.add(db_trip)
+            db.commit()
+            db.refresh(db_trip)
         
-        db.add(db_trip)
-        db.commit()
-        db.refresh(db_trip)
+        timer.log(logger, trip_id=db_trip.id, destination=request.destination, llm_usage=plan["usage"])
+        response.headers["Server-Timing"] = timer.server_timing_header()
         
-        return {
+        result = {
             "trip_id": db_trip.id,
             "itinerary": itinerary,
-            "translated_itinerary": translated_itinerary,
-            "weather": weather,
-            "forecast": forecast,
-            "currency_info": currency_info,
+            "translated_itinerary": db_trip.translated_itinerary,
+            "weather": db_trip.weather,
+            "forecast": db_trip.forecast,
+            "currency_info": db_trip.currency_info,
             "success": True
         }
         
+        if request.debug:
+            result["timings"] = timer.as_dict()
+            result["llm_usage"] = plan["usage"]
+        
+        return result
+        
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error planning trip: {str(e)}")
+        timer.log(logger, destination=request.destination, error=str(e))
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error planning trip: {str(e)}",
+            headers={"Server-Timing": timer.server_timing_header()}
+        )
+
+
+@router.post("/{trip_id}/replan", response_model=dict)
+def replan_trip(
+    trip_id: int,
+    request: ReplanRequest,
+    response: Response,
+    db: Session = Depends(get_db),
+    ai_service: AIService = Depends(get_ai_service),
+    weather_service: WeatherService = Depends(get_weather_service),
+    currency_service: CurrencyService = Depends(get_currency_service),
+    translation_service: TranslationService = Depends(get_translation_service)
+):
+    """
+    Update a saved trip and regenerate only the crew stages the change affects.
+    Budget changes re-run the budget review; dates and preferences re-run planning too;
+    a new travel type also needs research, which usually comes from the shared cache.
+    Asking for research explicitly in stages skips that cache.
+    """
+    trip = db.query(Trip).filter(Trip.id == trip_id).first()
+    if not trip:
+        raise HTTPException(status_code=404, detail="Trip not found")
+    
+    changes = _changed_fields(trip, request.model_dump(exclude_unset=True, exclude={"stages", "debug"}))
+    stages = request.stages if request.stages is not None else _replan_stages(changes)
+    refresh = ["research"] if request.stages and "research" in request.stages else []
+    
+    if not stages:
+        return {"trip_id": trip.id, "itinerary": trip.itinerary, "stages_run": [], "success": True}
+    
+    timer = StageTimer("replan_trip")
+    try:
+        for field, value in changes.items():
+            setattr(trip, field, value)
+        trip_data = {
+            "source": trip.source,
+            "destination": trip.destination,
+            "start_date": trip.start_date,
+            "end_date": trip.end_date,
+            "budget": trip.budget,
+            "travel_type": trip.travel_type,
+            "preferences": trip.preferences
+        }
+        
+        with timer.stage("crew"):
+            plan = ai_service.run_stages(trip_data, previous=trip.stage_outputs, rerun=stages, refresh=refresh)
+        if plan["fallback"]:
+            # Keep the stored itinerary rather than replacing it with the generic one
+            db.rollback()
+            raise HTTPException(status_code=503, detail="Itinerary generation is unavailable, trip left unchanged")
+        
+        trip.itinerary = plan["itinerary"]
+        trip.stage_outputs = plan["stages"]
+        trip.days = build_itinerary_days(trip.itinerary, trip.start_date)
+        
+        if changes.keys() & {"start_date", "end_date", "budget"}:
+            _enrich_trip(trip, weather_service, currency_service, timer)
+        
+        trip.translated_itinerary = None
+        if _wants_translation(trip):
+            with timer.stage("translation"):
+                translation_result = translation_service.translate_itinerary(trip.itinerary, trip.language)
+            if translation_result["success"]:
+                trip.translated_itinerary = translation_result["translated_itinerary"]
+        
+        with timer.stage("db"):
+            db.commit()
+            db.refresh(trip)
+        
+        timer.log(logger, trip_id=trip.id, destination=trip.destination, llm_usage=plan["usage"])
+        response.headers["Server-Timing"] = timer.server_timing_header()
+        
+        result = {
+            "trip_id": trip.id,
+            "itinerary": trip.itinerary,
+            "translated_itinerary": trip.translated_itinerary,
+            "stages_run": plan["ran"],
+            "success": True
+        }
+        
+        if request.debug:
+            result["timings"] = timer.as_dict()
+            result["llm_usage"] = plan["usage"]
+        
+        return result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        timer.log(logger, trip_id=trip_id, error=str(e))
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error re-planning trip: {str(e)}",
+            headers={"Server-Timing": timer.server_timing_header()}
+        )
 
 
 @router.get("/", response_model=List[TripResponse])
-async def get_trips(db: Session = Depends(get_db)):
+def get_trips(db: Session = Depends(get_db)):
     """
     Get all trips
     """
-    trips = db.query(Trip).all()
+    trips = db.query(Trip).options(*(defer(column) for column in SNAPSHOT_COLUMNS)).all()
     return trips
 
 
-@router.get("/{trip_id}", response_model=TripResponse)
-async def get_trip(trip_id: int, db: Session = Depends(get_db)):
+@router.get("/{trip_id}", response_model=TripDetailResponse)
+def get_trip(
+    trip_id: int,
+    response: Response,
+    refresh: bool = False,
+    db: Session = Depends(get_db),
+    weather_service: WeatherService = Depends(get_weather_service),
+    currency_service: CurrencyService = Depends(get_currency_service)
+):
     """
-    Get a specific trip by ID
+    Get a specific trip by ID with its stored weather, forecast and currency snapshot.
+    Pass refresh=true to re-fetch the snapshot, e.g. for trips saved before it existed.
     """
     trip = db.query(Trip).filter(Trip.id == trip_id).first()
     if not trip:
         raise HTTPException(status_code=404, detail="Trip not found")
+    
+    if refresh:
+        timer = StageTimer("trip_refresh")
+        try:
+            _enrich_trip(trip, weather_service, currency_service, timer)
+            with timer.stage("db"):
+                db.commit()
+                db.refresh(trip)
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(status_code=500, detail=f"Error refreshing trip: {str(e)}")
+        response.headers["Server-Timing"] = timer.server_timing_header()
+    
     return trip
 
 
+@router.get("/{trip_id}/days", response_model=List[ItineraryDayResponse])
+def get_trip_days(
+    trip_id: int,
+    start_day: int = Query(1, ge=1),
+    end_day: Optional[int] = Query(None, ge=1),
+    language: Optional[str] = None,
+    db: Session = Depends(get_db),
+    translation_service: TranslationService = Depends(get_translation_service)
+):
+    """
+    Get a range of itinerary days, optionally translated
+    """
+    try:
+        days = [_render_day(day, language, translation_service) for day in _query_days(db, trip_id, start_day, end_day)]
+        db.commit()
+        return days
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting itinerary days: {str(e)}")
+
+
+@router.get("/{trip_id}/days/{day_number}", response_model=ItineraryDayResponse)
+def get_trip_day(
+    trip_id: int,
+    day_number: int,
+    language: Optional[str] = None,
+    db: Session = Depends(get_db),
+    translation_service: TranslationService = Depends(get_translation_service)
+):
+    """
+    Get a single itinerary day, optionally translated
+    """
+    days = _query_days(db, trip_id, day_number, day_number)
+    if not days:
+        raise HTTPException(status_code=404, detail="Day not found")
+    
+    try:
+        day = _render_day(days[0], language, translation_service)
+        db.commit()
+        return day
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting itinerary day: {str(e)}")
+
+
 @router.delete("/{trip_id}")
-async def delete_trip(trip_id: int, db: Session = Depends(get_db)):
+def delete_trip(trip_id: int, db: Session = Depends(get_db)):
     """
     Delete a trip
     """
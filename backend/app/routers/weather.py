@@ -1,14 +1,15 @@
-from fastapi import APIRouter, HTTPException
-from app.schemas.trip import WeatherRequest
+from datetime import date
+from typing import Optional, Literal
+from fastapi import APIRouter, Depends, HTTPException
+from app.schemas.trip import WeatherRequest, WeatherBatchRequest
 from app.services.weather_service import WeatherService
+from app.services.registry import get_weather_service
 
 router = APIRouter(prefix="/api/weather", tags=["weather"])
 
-weather_service = WeatherService()
-
 
 @router.get("/{city}")
-async def get_weather(city: str, country_code: str = None):
+def get_weather(city: str, country_code: str = None, weather_service: WeatherService = Depends(get_weather_service)):
     """
     Get current weather for a city
     """
@@ -20,25 +21,73 @@ async def get_weather(city: str, country_code: str = None):
 
 
 @router.get("/{city}/forecast")
-async def get_forecast(city: str, country_code: str = None):
+def get_forecast(
+    city: str,
+    country_code: str = None,
+    aggregate: Optional[Literal["daily"]] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    format: Literal["rows", "columnar"] = "rows",
+    weather_service: WeatherService = Depends(get_weather_service)
+):
     """
-    Get weather forecast for a city
+    Get weather forecast for a city, optionally summarized per day and
+    limited to the days between start_date and end_date.
+    format=columnar returns one array per field.
     """
     try:
-        forecast = weather_service.get_forecast(city, country_code)
+        forecast = weather_service.get_forecast(city, country_code, aggregate, start_date, end_date, format)
         return forecast
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching forecast: {str(e)}")
 
 
+@router.get("/{city}/climate")
+def get_climate(
+    city: str,
+    start_date: date,
+    end_date: Optional[date] = None,
+    format: Literal["rows", "columnar"] = "rows",
+    weather_service: WeatherService = Depends(get_weather_service)
+):
+    """
+    Expected daily temperature and precipitation from monthly climate normals,
+    for dates beyond the forecast horizon
+    """
+    try:
+        outlook = weather_service.get_climate_outlook(city, start_date, end_date, format)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching climate outlook: {str(e)}")
+    if outlook is None:
+        raise HTTPException(status_code=404, detail=f"No climate normals near {city}")
+    return outlook
+
+
+@router.post("/batch")
+def get_weather_batch(request: WeatherBatchRequest, weather_service: WeatherService = Depends(get_weather_service)):
+    """
+    Get current weather and/or forecasts for several cities in one request
+    """
+    try:
+        return weather_service.get_weather_batch(
+            request.cities,
+            request.country_code,
+            include_current="current" in request.include,
+            include_forecast="forecast" in request.include,
+            forecast_format=request.format
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching weather batch: {str(e)}")
+
+
 @router.post("/")
-async def get_weather_by_request(request: WeatherRequest):
+def get_weather_by_request(request: WeatherRequest, weather_service: WeatherService = Depends(get_weather_service)):
     """
     Get weather information using request body
     """
     try:
         weather = weather_service.get_current_weather(request.city, request.country_code)
-        forecast = weather_service.get_forecast(request.city, request.country_code)
+        forecast = weather_service.get_forecast(request.city, request.country_code, format=request.format)
         
         return {
             "current": weather,
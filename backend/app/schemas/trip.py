@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List, Literal
+import datetime as dt
 from datetime import datetime
 
 
@@ -27,6 +28,39 @@ class TripResponse(TripBase):
         from_attributes = True
 
 
+class TripDetailResponse(TripResponse):
+    language: Optional[str] = None
+    translated_itinerary: Optional[str] = None
+    weather: Optional[Dict[str, Any]] = None
+    forecast: Optional[Dict[str, Any]] = None
+    currency_info: Optional[Dict[str, Any]] = None
+    enrichments: Optional[List[str]] = None
+    enriched_at: Optional[datetime] = None
+
+
+class ItineraryActivityResponse(BaseModel):
+    position: int
+    time: Optional[str] = None
+    description: str
+    
+    class Config:
+        from_attributes = True
+
+
+class ItineraryDayResponse(BaseModel):
+    day_number: int
+    date: Optional[dt.date] = None
+    title: Optional[str] = None
+    body: str
+    activities: List[ItineraryActivityResponse] = []
+    language: str = "en"
+    translated_body: Optional[str] = None
+
+
+Enrichment = Literal["weather", "forecast", "currency", "translation"]
+ENRICHMENTS = ("weather", "forecast", "currency", "translation")
+
+
 class ItineraryRequest(BaseModel):
     source: str
     destination: str
@@ -36,17 +70,51 @@ class ItineraryRequest(BaseModel):
     travel_type: Optional[str] = None
     preferences: Optional[Dict[str, Any]] = None
     language: Optional[str] = "en"
+    forecast_aggregate: Optional[Literal["daily"]] = None  # Summarize the forecast per day
+    forecast_trip_window: bool = False  # Only return forecast days within the trip dates
+    forecast_format: Literal["rows", "columnar"] = "rows"  # One dict per entry or one array per field
+    # Enrichments to fetch; currency still needs a budget and translation a non-English language
+    include: List[Enrichment] = Field(default_factory=lambda: list(ENRICHMENTS))
+    debug: bool = False  # Include stage timings in the response body
+
+
+class ReplanRequest(BaseModel):
+    """
+    Fields to change on a saved trip; omitted fields keep their stored value
+    """
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    budget: Optional[float] = None
+    travel_type: Optional[str] = None
+    preferences: Optional[Dict[str, Any]] = None
+    # Stages to re-run; by default derived from the changed fields
+    stages: Optional[List[Literal["research", "planning", "budget"]]] = None
+    debug: bool = False
 
 
 class WeatherRequest(BaseModel):
     city: str
     country_code: Optional[str] = None
+    format: Literal["rows", "columnar"] = "rows"  # Forecast layout
+
+
+class WeatherBatchRequest(BaseModel):
+    cities: List[str] = Field(..., min_length=1, max_length=50)
+    country_code: Optional[str] = None
+    include: List[Literal["current", "forecast"]] = ["current"]
+    format: Literal["rows", "columnar"] = "rows"  # Forecast layout
 
 
 class RouteRequest(BaseModel):
     start: str
     end: str
     mode: str = "driving"  # driving, walking, cycling, transit
+    waypoints: List[str] = Field(default_factory=list, max_length=48)  # Ordered stops between start and end
+
+
+class RouteMatrixRequest(BaseModel):
+    places: List[str] = Field(..., min_length=2, max_length=50)
+    modes: List[str] = ["driving"]  # driving, walking, cycling, transit
 
 
 class CurrencyRequest(BaseModel):
@@ -1,16 +1,50 @@
+import math
 import requests
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from app.config import settings
+from app.services.gazetteer import get_gazetteer
+from app.services.osm_index import OSMIndex
+from app.utils.cache import get_cache
+from app.utils.metrics import track_fallback
+from app.utils.rate_limiter import upstream_scheduler
+
+
+class AccommodationUnavailable(Exception):
+    """
+    Raised when Overpass cannot answer a viewport or detail lookup. Made-up
+    map points would only lead to details that do not exist, so there is no
+    mock for these and the router answers 503.
+    """
 
 
 class AccommodationService:
     def __init__(self):
         self.base_url = settings.overpass_api_url
+        self.overpass_cache = get_cache("overpass", settings.overpass_cache_ttl)
+        # Built by scripts.import_osm; without it every search goes to Overpass
+        self.local_index = OSMIndex.open(settings.osm_index_path)
         
-    def find_accommodations(self, city: str, limit: int = 10) -> Dict[str, Any]:
+    def find_accommodations(self, city: str, limit: int = 10, fallback: bool = True) -> Dict[str, Any]:
         """
-        Find accommodations in a city using Overpass API
+        Find accommodations in a city, from the local OSM index when it knows the city, else Overpass API.
+        fallback=False raises upstream errors instead of returning mock data.
         """
+        if self.local_index:
+            settlement = self.local_index.find_settlement(city)
+            if settlement:
+                accommodations = self._find_local(settlement["lat"], settlement["lon"], settlement["radius"], limit)
+                return self._accommodations_response({"city": city, "source": "osm_index"}, accommodations, limit)
+        
+        # A known city becomes a radius search, which does not depend on Overpass area names
+        place = get_gazetteer().lookup(city)
+        if place is not None:
+            return {"city": city, **self.find_accommodations_by_coordinates(place.latitude, place.longitude, place.search_radius, limit, fallback)}
+        
+        key = ("city", city.strip().lower())
+        cached = self.overpass_cache.get(key)
+        if cached is not None:
+            return self._accommodations_response({"city": city}, cached, limit)
+        
         try:
             # Overpass QL query to find hotels and guesthouses
             query = f"""
@@ -32,27 +66,39 @@ class AccommodationService:
             out skel qt;
             """
             
-            response = requests.post(self.base_url, data=query)
+            response = upstream_scheduler.request("overpass", "POST", self.base_url, operation="accommodation.find_accommodations", data=query)
             response.raise_for_status()
             
             data = response.json()
             
-            accommodations = self._process_accommodations(data["elements"], limit)
+            # Cache every match so later calls with a higher limit are hits too
+            accommodations = self._process_accommodations(data["elements"], len(data["elements"]))
+            self.overpass_cache.set(key, accommodations)
             
-            return {
-                "city": city,
-                "accommodations": accommodations,
-                "count": len(accommodations),
-                "success": True
-            }
+            return self._accommodations_response({"city": city}, accommodations, limit)
             
         except requests.RequestException as e:
+            if not fallback:
+                raise
             return self._get_mock_accommodations(city, limit)
     
-    def find_accommodations_by_coordinates(self, lat: float, lon: float, radius: float = 5000, limit: int = 10) -> Dict[str, Any]:
+    def find_accommodations_by_coordinates(self, lat: float, lon: float, radius: float = 5000, limit: int = 10,
+                                           fallback: bool = True) -> Dict[str, Any]:
         """
-        Find accommodations near specific coordinates
+        Find accommodations near specific coordinates.
+        fallback=False raises upstream errors instead of returning mock data.
         """
+        # About 100 m of rounding so nearby searches share an entry
+        key = ("around", f"{lat:.3f}", f"{lon:.3f}", f"{radius:g}")
+        location = {"latitude": lat, "longitude": lon, "radius": radius}
+        if self.local_index and self.local_index.covers(lat, lon):
+            accommodations = self._find_local(lat, lon, radius, limit)
+            return self._accommodations_response({**location, "source": "osm_index"}, accommodations, limit)
+        
+        cached = self.overpass_cache.get(key)
+        if cached is not None:
+            return self._accommodations_response(location, cached, limit)
+        
         try:
             # Overpass QL query for coordinates-based search
             query = f"""
@@ -73,25 +119,184 @@ class AccommodationService:
             out skel qt;
             """
             
-            response = requests.post(self.base_url, data=query)
+            response = upstream_scheduler.request("overpass", "POST", self.base_url, operation="accommodation.find_accommodations_by_coordinates", data=query)
             response.raise_for_status()
             
             data = response.json()
             
-            accommodations = self._process_accommodations(data["elements"], limit)
+            accommodations = self._process_accommodations(data["elements"], len(data["elements"]))
+            self.overpass_cache.set(key, accommodations)
             
-            return {
-                "latitude": lat,
-                "longitude": lon,
-                "radius": radius,
-                "accommodations": accommodations,
-                "count": len(accommodations),
-                "success": True
-            }
+            return self._accommodations_response(location, accommodations, limit)
             
         except requests.RequestException as e:
+            if not fallback:
+                raise
             return self._get_mock_accommodations_by_coordinates(lat, lon, radius, limit)
     
+    def find_in_viewport(self, south: float, west: float, north: float, east: float, zoom: int) -> Dict[str, Any]:
+        """
+        Accommodations in a map viewport: grid clusters below ACCOMMODATION_CLUSTER_MAX_ZOOM,
+        compact point records at or above it. Cells holding one accommodation come back as points.
+        """
+        clustered = zoom < settings.accommodation_cluster_max_zoom
+        # Cell edge in degrees so a cell spans about ACCOMMODATION_CLUSTER_CELL_PX screen pixels
+        cell = settings.accommodation_cluster_cell_px * 360 / (256 * 2 ** zoom)
+        viewport = {"bbox": [south, west, north, east], "zoom": zoom, "clustered": clustered}
+        
+        if self.local_index and self.local_index.covers((south + north) / 2, (west + east) / 2):
+            return {**viewport, **self._viewport_local(south, west, north, east, clustered, cell), "source": "osm_index", "success": True}
+        
+        if north - south > settings.accommodation_viewport_max_span or east - west > settings.accommodation_viewport_max_span:
+            raise ValueError(f"Viewport too large for Overpass; zoom in to at most {settings.accommodation_viewport_max_span} degrees")
+        
+        # Snap outwards to a 0.01 degree grid so small pans reuse the cached superset
+        snapped = (math.floor(south * 100) / 100, math.floor(west * 100) / 100, math.ceil(north * 100) / 100, math.ceil(east * 100) / 100)
+        key = ("bbox", *(f"{value:.2f}" for value in snapped))
+        places = self.overpass_cache.get(key)
+        if places is None:
+            try:
+                query = f"""
+                [out:json][timeout:25];
+                nwr["tourism"~"^(hotel|guest_house|hostel)$"]({snapped[0]},{snapped[1]},{snapped[2]},{snapped[3]});
+                out center tags;
+                """
+                
+                response = upstream_scheduler.request("overpass", "POST", self.base_url, operation="accommodation.find_in_viewport", data=query)
+                response.raise_for_status()
+                
+                places = []
+                for element in response.json()["elements"]:
+                    center = element.get("center", element)
+                    if "lat" in center and "tags" in element:
+                        places.append([element["type"], element["id"], center["lat"], center["lon"], element["tags"]])
+                self.overpass_cache.set(key, places)
+                
+            except requests.RequestException as e:
+                raise self._unavailable("Accommodations for this viewport") from e
+        
+        inside = [place for place in places if south <= place[2] <= north and west <= place[3] <= east]
+        return {**viewport, **self._viewport_points(inside, clustered, cell), "source": "overpass", "success": True}
+    
+    def get_accommodation(self, osm_type: str, osm_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Full record of one accommodation by OSM type and id, or None if it does not exist.
+        Raises AccommodationUnavailable when Overpass cannot answer; nothing is cached then.
+        """
+        if self.local_index:
+            place = self.local_index.get(osm_type, osm_id)
+            if place:
+                return self._accommodation_from_tags(place["osm_id"], place["osm_type"], place["tags"], place["lat"], place["lon"])
+        
+        key = ("detail", osm_type, str(osm_id))
+        cached = self.overpass_cache.get(key)
+        if cached is not None:
+            return cached or None
+        
+        query = f"""
+        [out:json][timeout:25];
+        {osm_type}({osm_id});
+        out center tags;
+        """
+        
+        try:
+            response = upstream_scheduler.request("overpass", "POST", self.base_url, operation="accommodation.get_accommodation", data=query)
+            response.raise_for_status()
+            
+            accommodation = {}
+            for element in response.json()["elements"]:
+                center = element.get("center", element)
+                if "lat" in center and "tags" in element:
+                    accommodation = self._accommodation_from_tags(element["id"], element["type"], element["tags"], center["lat"], center["lon"])
+                    break
+            
+        except (requests.RequestException, KeyError, ValueError) as e:
+            raise self._unavailable("Accommodation details") from e
+        # Cache misses too (as an empty dict) so unknown ids are not re-queried
+        self.overpass_cache.set(key, accommodation)
+        return accommodation or None
+    
+    def _viewport_local(self, south: float, west: float, north: float, east: float, clustered: bool, cell: float) -> Dict[str, Any]:
+        if not clustered:
+            places = self.local_index.find_in_bbox(south, west, north, east, settings.accommodation_viewport_max_points)
+            return {
+                "clusters": [],
+                "points": [self._compact_point(*place) for place in places],
+                "total": self.local_index.count_in_bbox(south, west, north, east)
+            }
+        
+        clusters, single_ids, total = [], [], 0
+        for count, lat, lon, min_lat, min_lon, max_lat, max_lon, place_id in self.local_index.cluster_bbox(south, west, north, east, cell):
+            total += count
+            if count == 1:
+                single_ids.append(place_id)
+            else:
+                clusters.append(self._cluster(count, lat, lon, (min_lat, min_lon, max_lat, max_lon)))
+        points = [self._compact_point(*place) for place in self.local_index.get_by_ids(single_ids)]
+        return {"clusters": clusters, "points": points, "total": total}
+    
+    def _viewport_points(self, places: List[List[Any]], clustered: bool, cell: float) -> Dict[str, Any]:
+        if not clustered:
+            return {
+                "clusters": [],
+                "points": [self._compact_point(*place) for place in places[:settings.accommodation_viewport_max_points]],
+                "total": len(places)
+            }
+        
+        cells: Dict[Tuple[int, int], List[List[Any]]] = {}
+        for place in places:
+            cells.setdefault((int((place[2] + 90) // cell), int((place[3] + 180) // cell)), []).append(place)
+        
+        clusters, points = [], []
+        for members in cells.values():
+            if len(members) == 1:
+                points.append(self._compact_point(*members[0]))
+                continue
+            lats, lons = [member[2] for member in members], [member[3] for member in members]
+            clusters.append(self._cluster(len(members), sum(lats) / len(lats), sum(lons) / len(lons), (min(lats), min(lons), max(lats), max(lons))))
+        return {"clusters": clusters, "points": points, "total": len(places)}
+    
+    def _cluster(self, count: int, lat: float, lon: float, bounds: Tuple[float, float, float, float]) -> Dict[str, Any]:
+        return {
+            "count": count,
+            "latitude": round(lat, 6),
+            "longitude": round(lon, 6),
+            "bounds": [round(value, 6) for value in bounds]  # south, west, north, east; zoom here to expand
+        }
+    
+    def _compact_point(self, osm_type: str, osm_id: int, lat: float, lon: float, tags: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Just enough to draw a marker; the full record comes from /api/accommodations/detail
+        """
+        return {
+            "id": f"{osm_type}/{osm_id}",
+            "name": tags.get("name", "Unnamed"),
+            "tourism_type": tags.get("tourism", "unknown"),
+            "latitude": lat,
+            "longitude": lon,
+            "stars": tags.get("stars")
+        }
+    
+    def _accommodations_response(self, location: Dict[str, Any], accommodations: List[Dict], limit: int) -> Dict[str, Any]:
+        accommodations = accommodations[:limit]
+        return {
+            **location,
+            "accommodations": accommodations,
+            "count": len(accommodations),
+            "success": True
+        }
+    
+    def _find_local(self, lat: float, lon: float, radius: float, limit: int) -> List[Dict]:
+        """
+        Accommodations from the local OSM index, nearest first
+        """
+        accommodations = []
+        for place in self.local_index.find_near(lat, lon, radius, limit):
+            accommodation = self._accommodation_from_tags(place["osm_id"], place["osm_type"], place["tags"], place["lat"], place["lon"])
+            accommodation["distance"] = place["distance"]
+            accommodations.append(accommodation)
+        return accommodations
+    
     def _process_accommodations(self, elements: List[Dict], limit: int) -> List[Dict]:
         """
         Process raw accommodation data from Overpass API
@@ -100,42 +305,51 @@ class AccommodationService:
         
         for element in elements:
             if element["type"] == "node" and "tags" in element:
-                tags = element["tags"]
-                
-                accommodation = {
-                    "id": element["id"],
-                    "type": element["type"],
-                    "name": tags.get("name", "Unnamed"),
-                    "tourism_type": tags.get("tourism", "unknown"),
-                    "latitude": element["lat"],
-                    "longitude": element["lon"],
-                    "address": {
-                        "street": tags.get("addr:street"),
-                        "housenumber": tags.get("addr:housenumber"),
-                        "postcode": tags.get("addr:postcode"),
-                        "city": tags.get("addr:city")
-                    },
-                    "contact": {
-                        "phone": tags.get("phone"),
-                        "website": tags.get("website"),
-                        "email": tags.get("email")
-                    },
-                    "amenities": {
-                        "wifi": tags.get("internet_access") == "wlan",
-                        "parking": tags.get("parking") == "yes",
-                        "breakfast": tags.get("breakfast") == "yes"
-                    },
-                    "stars": tags.get("stars"),
-                    "rooms": tags.get("rooms")
-                }
-                
-                accommodations.append(accommodation)
+                accommodations.append(
+                    self._accommodation_from_tags(element["id"], element["type"], element["tags"], element["lat"], element["lon"])
+                )
                 
                 if len(accommodations) >= limit:
                     break
         
         return accommodations
     
+    def _accommodation_from_tags(self, osm_id: int, osm_type: str, tags: Dict[str, str], lat: float, lon: float) -> Dict[str, Any]:
+        return {
+            "id": osm_id,
+            "type": osm_type,
+            "name": tags.get("name", "Unnamed"),
+            "tourism_type": tags.get("tourism", "unknown"),
+            "latitude": lat,
+            "longitude": lon,
+            "address": {
+                "street": tags.get("addr:street"),
+                "housenumber": tags.get("addr:housenumber"),
+                "postcode": tags.get("addr:postcode"),
+                "city": tags.get("addr:city")
+            },
+            "contact": {
+                "phone": tags.get("phone"),
+                "website": tags.get("website"),
+                "email": tags.get("email")
+            },
+            "amenities": {
+                "wifi": tags.get("internet_access") == "wlan",
+                "parking": tags.get("parking") == "yes",
+                "breakfast": tags.get("breakfast") == "yes"
+            },
+            "stars": tags.get("stars"),
+            "rooms": tags.get("rooms")
+        }
+    
+    @track_fallback("accommodation")
+    def _unavailable(self, what: str) -> AccommodationUnavailable:
+        """
+        Error for a lookup Overpass could not answer, counted like the mock fallbacks
+        """
+        return AccommodationUnavailable(f"{what} are unavailable, please retry later")
+    
+    @track_fallback("accommodation")
     def _get_mock_accommodations(self, city: str, limit: int) -> Dict[str, Any]:
         """
         Return mock accommodation data when API is unavailable
@@ -186,6 +400,7 @@ class AccommodationService:
             "success": True
         }
     
+    @track_fallback("accommodation")
     def _get_mock_accommodations_by_coordinates(self, lat: float, lon: float, radius: float, limit: int) -> Dict[str, Any]:
         """
         Return mock accommodation data for coordinate-based search when API is unavailable
@@ -1,56 +1,182 @@
 import os
-from crewai import Agent, Task, Crew, Process
-from groq import Groq
+import re
+import time
 from app.config import settings
-from typing import Dict, Any
+from app.utils.metrics import LLM_PIPELINE_DURATION, LLM_STAGE_RUNS, LLM_TOKENS, track_fallback
+from app.utils.cache import get_cache
+from app.utils.rate_limiter import upstream_scheduler
+from app.utils.timing import StageTimer
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+STAGES = ("research", "planning", "budget")
+
+# Lines worth keeping when earlier stage output has to be shortened
+STRUCTURAL_LINE = re.compile(r"^\s*(?:#{1,6}\s|[-*•+]\s|\d{1,2}[.)]\s|\*\*|day\s+\d)", re.IGNORECASE)
+
+AGENTS = {
+    "research": {
+        "role": 'Travel Research Specialist',
+        "goal": 'Research the best attractions, activities, and local insights for the destination',
+        "backstory": """You are an expert travel researcher with years of experience 
+                in discovering hidden gems and must-visit places in cities around the world. 
+                You know how to find authentic local experiences and tourist attractions."""
+    },
+    "planning": {
+        "role": 'Itinerary Planner',
+        "goal": 'Create detailed, well-structured daily itineraries that optimize time and experience',
+        "backstory": """You are a professional itinerary planner who excels at creating 
+                logical, enjoyable travel schedules. You understand how to balance activities, 
+                rest, and travel time to create the perfect trip experience."""
+    },
+    "budget": {
+        "role": 'Budget Travel Advisor',
+        "goal": 'Provide cost-effective travel options and budget-friendly recommendations',
+        "backstory": """You are a budget travel expert who knows how to maximize 
+                travel experiences while minimizing costs. You can suggest affordable 
+                alternatives and money-saving tips."""
+    }
+}
 
 
 class AIService:
     def __init__(self):
-        self.client = Groq(api_key=settings.groq_api_key)
+        # crewai and groq are slow to import, so defer them to first use
+        self._client = None
+        self.research_cache = get_cache("research", settings.research_cache_ttl, settings.research_cache_size)
+        
+    @property
+    def client(self):
+        if self._client is None:
+            from groq import Groq
+            self._client = Groq(api_key=settings.groq_api_key, base_url=settings.groq_api_url)
+        return self._client
+        
+    def preload(self):
+        """
+        Import the LLM stack now instead of on the first request
+        """
+        import crewai  # noqa: F401
+        self.client
         
     def generate_itinerary(self, trip_data: Dict[str, Any]) -> str:
         """
         Generate a personalized travel itinerary using CrewAI and Groq
         """
+        return self.run_stages(trip_data)["itinerary"]
+        
+    def run_stages(
+        self,
+        trip_data: Dict[str, Any],
+        previous: Optional[Dict[str, str]] = None,
+        rerun: Sequence[str] = STAGES,
+        refresh: Sequence[str] = ()
+    ) -> Dict[str, Any]:
+        """
+        Run the research, planning and budget stages in order.
+        
+        A stage not listed in rerun reuses its output from previous, as long as
+        nothing before it changed. Research is shared across trips through a
+        cache keyed by destination and travel type, unless it is listed in
+        refresh; fresh research replaces the cached entry.
+        """
+        start = time.perf_counter()
+        timer = StageTimer("crew")
+        previous = previous or {}
+        outputs: Dict[str, str] = {}
+        usage: Dict[str, Dict[str, Any]] = {}
+        ran: List[str] = []
+        changed = False
+        
         try:
-            # Create agents for different aspects of trip planning
-            travel_researcher = Agent(
-                role='Travel Research Specialist',
-                goal='Research the best attractions, activities, and local insights for the destination',
-                backstory="""You are an expert travel researcher with years of experience 
-                in discovering hidden gems and must-visit places in cities around the world. 
-                You know how to find authentic local experiences and tourist attractions.""",
-                verbose=True,
-                allow_delegation=False,
-                llm=self.client
-            )
-            
-            itinerary_planner = Agent(
-                role='Itinerary Planner',
-                goal='Create detailed, well-structured daily itineraries that optimize time and experience',
-                backstory="""You are a professional itinerary planner who excels at creating 
-                logical, enjoyable travel schedules. You understand how to balance activities, 
-                rest, and travel time to create the perfect trip experience.""",
-                verbose=True,
-                allow_delegation=False,
-                llm=self.client
-            )
+            for stage in STAGES:
+                if not changed and stage not in rerun and previous.get(stage):
+                    outputs[stage] = previous[stage]
+                    usage[stage] = {"source": "stored"}
+                    LLM_STAGE_RUNS.labels(stage, "stored").inc()
+                    continue
+                
+                output = None
+                if stage == "research" and stage not in refresh:
+                    output = self.research_cache.get(self._research_key(trip_data))
+                    usage[stage] = {"source": "cache"}
+                if output is None:
+                    with timer.stage(stage):
+                        output, usage[stage] = self._run_stage(stage, trip_data, outputs)
+                    usage[stage]["duration_ms"] = timer.as_dict()[stage]
+                    ran.append(stage)
+                    if stage == "research":
+                        self.research_cache.set(self._research_key(trip_data), output)
+                LLM_STAGE_RUNS.labels(stage, usage[stage]["source"]).inc()
+                
+                outputs[stage] = output
+                # Later stages build on this one, so they must run again too
+                changed = changed or output != previous.get(stage)
             
-            budget_advisor = Agent(
-                role='Budget Travel Advisor',
-                goal='Provide cost-effective travel options and budget-friendly recommendations',
-                backstory="""You are a budget travel expert who knows how to maximize 
-                travel experiences while minimizing costs. You can suggest affordable 
-                alternatives and money-saving tips.""",
-                verbose=True,
-                allow_delegation=False,
-                llm=self.client
-            )
+            LLM_PIPELINE_DURATION.labels("success").observe(time.perf_counter() - start)
+            return {
+                "itinerary": outputs["budget"],
+                "stages": outputs,
+                "ran": ran,
+                "usage": _usage_summary(usage, timer),
+                "fallback": False
+            }
             
-            # Create tasks for the crew
-            research_task = Task(
-                description=f"""
+        except Exception as e:
+            LLM_PIPELINE_DURATION.labels("fallback").observe(time.perf_counter() - start)
+            # Fallback to a simple itinerary if AI service fails
+            return {
+                "itinerary": self._generate_fallback_itinerary(trip_data),
+                "stages": {},
+                "ran": ran,
+                "usage": _usage_summary(usage, timer),
+                "fallback": True
+            }
+    
+    def _research_key(self, trip_data: Dict[str, Any]) -> Tuple[str, str]:
+        return (
+            trip_data["destination"].strip().lower(),
+            (trip_data.get("travel_type") or "general").strip().lower()
+        )
+    
+    def _run_stage(self, stage: str, trip_data: Dict[str, Any], outputs: Dict[str, str]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Run one agent and task as its own crew and return the text output with its token usage
+        """
+        from crewai import Agent, Task, Crew, Process
+        
+        agent = Agent(
+            **AGENTS[stage],
+            verbose=settings.ai_verbose,
+            allow_delegation=False,
+            llm=self.client
+        )
+        description = self._describe(stage, trip_data, outputs)
+        task = Task(description=description, agent=agent)
+        crew = Crew(
+            agents=[agent],
+            tasks=[task],
+            verbose=settings.ai_verbose,
+            process=Process.sequential
+        )
+        
+        # Each task makes at least one Groq call
+        upstream_scheduler.acquire("groq", cost=len(crew.tasks))
+        
+        result = crew.kickoff()
+        output = str(result)
+        
+        usage = _token_usage(result, crew, AGENTS[stage]["backstory"] + description, output)
+        LLM_TOKENS.labels(stage, "prompt").inc(usage["prompt_tokens"])
+        LLM_TOKENS.labels(stage, "completion").inc(usage["completion_tokens"])
+        return output, {"source": "run", **usage}
+    
+    def _describe(self, stage: str, trip_data: Dict[str, Any], outputs: Dict[str, str]) -> str:
+        """
+        Task description for a stage, with the earlier stage outputs it builds on
+        """
+        if stage == "research":
+            # Only destination and travel type, so the result can be shared across trips
+            return f"""
                 Research the destination: {trip_data['destination']}
                 
                 Focus on:
@@ -61,21 +187,22 @@ class AIService:
                 - Transportation options
                 - Safety considerations
                 
+                Travel type: {trip_data.get('travel_type') or 'General'}
+                
+                Provide comprehensive research findings that will help create the best itinerary.
+                """
+        
+        if stage == "planning":
+            return f"""
+                Create a detailed daily itinerary based on the research findings.
+                
                 Trip details:
+                - Destination: {trip_data['destination']}
                 - Duration: {trip_data['start_date']} to {trip_data['end_date']}
                 - Budget: {trip_data.get('budget', 'Not specified')}
                 - Travel type: {trip_data.get('travel_type', 'General')}
                 - Preferences: {trip_data.get('preferences', 'None specified')}
                 
-                Provide comprehensive research findings that will help create the best itinerary.
-                """,
-                agent=travel_researcher
-            )
-            
-            planning_task = Task(
-                description=f"""
-                Create a detailed daily itinerary based on the research findings.
-                
                 Requirements:
                 - Create day-by-day schedule
                 - Include specific times for activities
@@ -86,14 +213,16 @@ class AIService:
                 - Account for weather and seasonal factors
                 
                 Make the itinerary engaging, realistic, and tailored to the traveler's preferences.
-                """,
-                agent=itinerary_planner
-            )
-            
-            budget_task = Task(
-                description=f"""
+                
+                Research findings:
+                {_cap_context(outputs['research'])}
+                """
+        
+        return f"""
                 Review the itinerary and provide budget-friendly alternatives and cost estimates.
                 
+                Budget: {trip_data.get('budget', 'Not specified')}
+                
                 Tasks:
                 - Estimate costs for each activity
                 - Suggest budget-friendly alternatives
@@ -102,26 +231,13 @@ class AIService:
                 - Suggest cost-effective transportation
                 
                 Ensure the trip fits within the specified budget while maintaining quality experiences.
-                """,
-                agent=budget_advisor
-            )
-            
-            # Create and run the crew
-            crew = Crew(
-                agents=[travel_researcher, itinerary_planner, budget_advisor],
-                tasks=[research_task, planning_task, budget_task],
-                verbose=True,
-                process=Process.sequential
-            )
-            
-            result = crew.kickoff()
-            
-            return result
-            
-        except Exception as e:
-            # Fallback to a simple itinerary if AI service fails
-            return self._generate_fallback_itinerary(trip_data)
+                Return the complete day-by-day itinerary with your changes applied.
+                
+                Itinerary:
+                {_cap_context(outputs['planning'])}
+                """
     
+    @track_fallback("ai")
     def _generate_fallback_itinerary(self, trip_data: Dict[str, Any]) -> str:
         """
         Generate a simple fallback itinerary when AI service is unavailable
@@ -165,4 +281,62 @@ class AIService:
         - Stay hydrated and well-rested
         
         *Note: This is a basic itinerary. For a more personalized experience, please ensure all API keys are properly configured.*
-        """ 
\ No newline at end of file
+        """ 
+
+
+def _cap_context(text: str, max_chars: Optional[int] = None) -> str:
+    """
+    Shorten earlier stage output before it is passed to the next task.
+    Headings and list items are kept first, in order, since that is where
+    the facts are; prose fills whatever room is left.
+    """
+    max_chars = settings.ai_context_max_chars if max_chars is None else max_chars
+    if not max_chars or len(text) <= max_chars:
+        return text
+    
+    lines = [line.rstrip() for line in text.splitlines() if line.strip()]
+    keep = [False] * len(lines)
+    remaining = max_chars
+    for structural in (True, False):
+        for index, line in enumerate(lines):
+            if keep[index] or bool(STRUCTURAL_LINE.match(line)) != structural:
+                continue
+            if len(line) + 1 > remaining:
+                continue
+            keep[index] = True
+            remaining -= len(line) + 1
+    
+    return "\n".join(line for line, kept in zip(lines, keep) if kept) + "\n[...]"
+
+
+def _estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English text
+    return max(1, len(text) // 4)
+
+
+def _token_usage(result: Any, crew: Any, prompt: str, output: str) -> Dict[str, Any]:
+    """
+    Token counts from crewai's usage metrics, or an estimate when they are missing
+    """
+    metrics = getattr(result, "token_usage", None) or getattr(crew, "usage_metrics", None)
+    if isinstance(metrics, dict):
+        prompt_tokens, completion_tokens = metrics.get("prompt_tokens"), metrics.get("completion_tokens")
+    else:
+        prompt_tokens = getattr(metrics, "prompt_tokens", None)
+        completion_tokens = getattr(metrics, "completion_tokens", None)
+    
+    if prompt_tokens or completion_tokens:
+        return {"prompt_tokens": prompt_tokens or 0, "completion_tokens": completion_tokens or 0, "estimated": False}
+    return {"prompt_tokens": _estimate_tokens(prompt), "completion_tokens": _estimate_tokens(output), "estimated": True}
+
+
+def _usage_summary(usage: Dict[str, Dict[str, Any]], timer: StageTimer) -> Dict[str, Any]:
+    """
+    Per-stage usage plus request totals
+    """
+    return {
+        "stages": usage,
+        "prompt_tokens": sum(stage.get("prompt_tokens", 0) for stage in usage.values()),
+        "completion_tokens": sum(stage.get("completion_tokens", 0) for stage in usage.values()),
+        "duration_ms": timer.as_dict()["total"]
+    }
\ No newline at end of file
@@ -0,0 +1,149 @@
+import calendar
+import math
+from array import array
+from datetime import date, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.config import settings
+from app.services.gazetteer import fold, get_gazetteer
+from app.utils.geo import bbox_around, haversine_m
+
+NORMALS_PATH = Path(__file__).resolve().parent.parent / "data" / "climate_normals.tsv"
+
+# Stations are bucketed into grid cells of this many degrees for nearest lookups
+CELL_DEGREES = 1.0
+
+
+def read_normals(path: Path) -> Iterator[List[str]]:
+    """
+    Rows of a normals table: name, country code, latitude, longitude and three
+    comma-separated lists of 12 monthly values (min and max temperature in °C,
+    precipitation in mm)
+    """
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if line.startswith("#") or not line.strip():
+                continue
+            columns = line.rstrip("\n").split("\t")
+            if len(columns) >= 7:
+                yield columns
+
+
+def _cell(lat: float, lon: float) -> Tuple[int, int]:
+    return math.floor(lat / CELL_DEGREES), math.floor(lon / CELL_DEGREES)
+
+
+class ClimateNormals:
+    """
+    Monthly climate normals per station, held in flat arrays of 12 values per
+    station so the whole table is a few kilobytes per thousand stations.
+
+    Expected values for a date are interpolated linearly between the normals
+    of the two nearest mid-months, so trips do not jump at month boundaries.
+    """
+
+    def __init__(self, rows: Iterable[List[str]]):
+        self.names: List[str] = []
+        self.countries: List[str] = []
+        self.latitudes = array("d")
+        self.longitudes = array("d")
+        self.temp_min = array("f")
+        self.temp_max = array("f")
+        self.precip = array("f")
+        self._by_name: Dict[str, List[int]] = {}
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+
+        for columns in rows:
+            monthly = [[float(value) for value in column.split(",")] for column in columns[4:7]]
+            if any(len(values) != 12 for values in monthly):
+                raise ValueError(f"Expected 12 monthly values for {columns[0]}")
+            index = len(self.names)
+            lat, lon = float(columns[2]), float(columns[3])
+            self.names.append(columns[0])
+            self.countries.append(columns[1])
+            self.latitudes.append(lat)
+            self.longitudes.append(lon)
+            self.temp_min.extend(monthly[0])
+            self.temp_max.extend(monthly[1])
+            self.precip.extend(monthly[2])
+            self._by_name.setdefault(fold(columns[0]), []).append(index)
+            self._cells.setdefault(_cell(lat, lon), []).append(index)
+
+    @classmethod
+    def load(cls, path: Path) -> "ClimateNormals":
+        return cls(read_normals(path))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def nearest(self, lat: float, lon: float, max_distance_m: float) -> Optional[Tuple[int, float]]:
+        """
+        (station index, distance in metres) of the closest station within max_distance_m
+        """
+        min_lat, max_lat, min_lon, max_lon = bbox_around(lat, lon, max_distance_m)
+        (low_row, low_col), (high_row, high_col) = _cell(min_lat, min_lon), _cell(max_lat, max_lon)
+        best = None
+        for row in range(low_row, high_row + 1):
+            for col in range(low_col, high_col + 1):
+                for index in self._cells.get((row, col), ()):
+                    distance = haversine_m(lat, lon, self.latitudes[index], self.longitudes[index])
+                    if distance <= max_distance_m and (best is None or distance < best[1]):
+                        best = (index, distance)
+        return best
+
+    def find(self, query: str, max_distance_m: float) -> Optional[Tuple[int, float]]:
+        """
+        Station for a destination name. The gazetteer resolves the name (with its
+        country qualifier and typo tolerance) to coordinates and the nearest
+        station is used; names it does not know are matched against station names.
+        """
+        place = get_gazetteer().lookup(query)
+        if place is not None:
+            return self.nearest(place.latitude, place.longitude, max_distance_m)
+        if "," in query:
+            return None
+        indices = self._by_name.get(fold(query))
+        return (indices[0], 0.0) if indices else None
+
+    def station(self, index: int) -> Dict[str, object]:
+        return {
+            "name": self.names[index],
+            "country": self.countries[index],
+            "latitude": self.latitudes[index],
+            "longitude": self.longitudes[index]
+        }
+
+    def expected(self, index: int, day: date) -> Tuple[float, float, float]:
+        """
+        (min temperature, max temperature, precipitation in mm) expected on day
+        """
+        days_in_month = calendar.monthrange(day.year, day.month)[1]
+        # Position in months relative to the middle of January
+        position = day.month - 1 + (day.day - 0.5) / days_in_month - 0.5
+        lower = math.floor(position)
+        weight = position - lower
+        first, second = index * 12 + lower % 12, index * 12 + (lower + 1) % 12
+
+        temp_min = self.temp_min[first] * (1 - weight) + self.temp_min[second] * weight
+        temp_max = self.temp_max[first] * (1 - weight) + self.temp_max[second] * weight
+        first_days = calendar.monthrange(day.year if lower >= 0 else day.year - 1, lower % 12 + 1)[1]
+        second_days = calendar.monthrange(day.year if lower < 11 else day.year + 1, (lower + 1) % 12 + 1)[1]
+        precip = self.precip[first] / first_days * (1 - weight) + self.precip[second] / second_days * weight
+        return temp_min, temp_max, precip
+
+    def daily(self, index: int, start_date: date, end_date: date) -> List[Tuple[date, float, float, float]]:
+        return [
+            (day, *self.expected(index, day))
+            for day in (start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1))
+        ]
+
+
+@lru_cache(maxsize=1)
+def get_climate_normals() -> ClimateNormals:
+    """
+    Normals loaded from CLIMATE_NORMALS_PATH, or the bundled table, once per process
+    """
+    path = Path(settings.climate_normals_path) if settings.climate_normals_path else NORMALS_PATH
+    return ClimateNormals.load(path)
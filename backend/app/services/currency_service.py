@@ -1,11 +1,15 @@
 import requests
 from typing import Dict, Any, Optional
 from app.config import settings
+from app.utils.cache import get_cache
+from app.utils.metrics import track_fallback
+from app.utils.rate_limiter import upstream_scheduler
 
 
 class CurrencyService:
     def __init__(self):
         self.base_url = settings.exchangerate_api_url
+        self.rates_cache = get_cache("currency_rates", settings.rates_cache_ttl, 200)
         
     def convert_currency(self, from_currency: str, to_currency: str, amount: float = 1.0) -> Dict[str, Any]:
         """
@@ -19,7 +23,7 @@ class CurrencyService:
                 "amount": amount
             }
             
-            response = requests.get(url, params=params)
+            response = upstream_scheduler.request("exchangerate", "GET", url, operation="currency.convert_currency", params=params)
             response.raise_for_status()
             
             data = response.json()
@@ -36,31 +40,47 @@ class CurrencyService:
         except requests.RequestException as e:
             return self._get_mock_conversion(from_currency, to_currency, amount)
     
-    def get_exchange_rates(self, base_currency: str = "USD") -> Dict[str, Any]:
+    def get_exchange_rates(self, base_currency: str = "USD", fallback: bool = True) -> Dict[str, Any]:
         """
-        Get all exchange rates for a base currency
+        Get all exchange rates for a base currency.
+        fallback=False raises upstream errors instead of returning mock data.
         """
+        cached = self.rates_cache.get(base_currency.upper())
+        if cached is not None:
+            return cached
+        
         try:
-            url = f"{self.base_url}/latest"
-            params = {
-                "base": base_currency.upper()
-            }
-            
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            return {
-                "base_currency": base_currency.upper(),
-                "date": data["date"],
-                "rates": data["rates"],
-                "timestamp": data.get("timestamp")
-            }
+            return self.refresh_exchange_rates(base_currency)
             
         except requests.RequestException as e:
+            if not fallback:
+                raise
             return self._get_mock_rates(base_currency)
     
+    def refresh_exchange_rates(self, base_currency: str = "USD") -> Dict[str, Any]:
+        """
+        Fetch the rate table for a base currency into the cache; raises on failure
+        """
+        url = f"{self.base_url}/latest"
+        params = {
+            "base": base_currency.upper()
+        }
+        
+        response = upstream_scheduler.request("exchangerate", "GET", url, operation="currency.get_exchange_rates", params=params)
+        response.raise_for_status()
+        
+        data = response.json()
+        
+        rates = {
+            "base_currency": base_currency.upper(),
+            "date": data["date"],
+            "rates": data["rates"],
+            "timestamp": data.get("timestamp")
+        }
+        
+        self.rates_cache.set(base_currency.upper(), rates)
+        return rates
+    
     def get_historical_rates(self, date: str, base_currency: str = "USD") -> Dict[str, Any]:
         """
         Get historical exchange rates for a specific date
@@ -71,7 +91,7 @@ class CurrencyService:
                 "base": base_currency.upper()
             }
             
-            response = requests.get(url, params=params)
+            response = upstream_scheduler.request("exchangerate", "GET", url, operation="currency.get_historical_rates", params=params)
             response.raise_for_status()
             
             data = response.json()
@@ -92,7 +112,7 @@ class CurrencyService:
         try:
             url = f"{self.base_url}/symbols"
             
-            response = requests.get(url)
+            response = upstream_scheduler.request("exchangerate", "GET", url, operation="currency.get_currency_list")
             response.raise_for_status()
             
             data = response.json()
@@ -104,6 +124,7 @@ class CurrencyService:
         except requests.RequestException as e:
             return self._get_mock_currency_list()
     
+    @track_fallback("currency")
     def _get_mock_conversion(self, from_currency: str, to_currency: str, amount: float) -> Dict[str, Any]:
         """
         Return mock conversion data when API is unavailable
@@ -135,6 +156,7 @@ class CurrencyService:
             "timestamp": 1640995200
         }
     
+    @track_fallback("currency")
     def _get_mock_rates(self, base_currency: str) -> Dict[str, Any]:
         """
         Return mock exchange rates when API is unavailable
@@ -172,6 +194,7 @@ class CurrencyService:
         """
         return self._get_mock_rates(base_currency)
     
+    @track_fallback("currency")
     def _get_mock_currency_list(self) -> Dict[str, Any]:
         """
         Return mock currency list when API is unavailable
@@ -0,0 +1,71 @@
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+from app.config import settings
+from app.services.accommodation_service import AccommodationService
+from app.services.currency_service import CurrencyService
+from app.services.weather_service import WeatherService
+
+SECTIONS = ("weather", "forecast", "rates", "accommodations")
+
+
+class DestinationService:
+    """
+    Everything a destination page shows, gathered in one call.
+    Sections are fetched concurrently; each service serves its own cache first.
+    """
+
+    def __init__(self, weather_service: WeatherService, currency_service: CurrencyService,
+                 accommodation_service: AccommodationService):
+        self.weather_service = weather_service
+        self.currency_service = currency_service
+        self.accommodation_service = accommodation_service
+        # Shared so a slow provider never delays the response past the overview timeout
+        self._pool = ThreadPoolExecutor(max_workers=settings.destination_overview_workers, thread_name_prefix="overview")
+
+    def get_overview(self, city: str, country_code: Optional[str] = None, base_currency: str = "USD",
+                     accommodation_limit: int = 5, forecast_aggregate: Optional[str] = "daily") -> Dict[str, Any]:
+        """
+        Current weather, forecast, exchange rates and top accommodations for a city.
+        A failed or slow section is reported in "sections" with its data set to None;
+        the rest are still returned.
+        """
+        fetchers: Dict[str, Callable[[], Any]] = {
+            "weather": lambda: self.weather_service.get_current_weather(city, country_code, fallback=False),
+            "forecast": lambda: self.weather_service.get_forecast(city, country_code, aggregate=forecast_aggregate, fallback=False),
+            "rates": lambda: self.currency_service.get_exchange_rates(base_currency, fallback=False),
+            "accommodations": lambda: self.accommodation_service.find_accommodations(city, accommodation_limit, fallback=False)
+        }
+
+        start = time.perf_counter()
+        # Copy the context per section so the caller's upstream priority applies
+        futures = {
+            name: self._pool.submit(contextvars.copy_context().run, self._timed, fetch)
+            for name, fetch in fetchers.items()
+        }
+        wait(futures.values(), timeout=settings.destination_overview_timeout)
+
+        result: Dict[str, Any] = {"city": city}
+        sections: Dict[str, Dict[str, Any]] = {}
+        for name, future in futures.items():
+            if not future.done():
+                # Left running so its result still lands in the service cache for the next call
+                result[name] = None
+                sections[name] = {"status": "timeout", "ms": round((time.perf_counter() - start) * 1000, 1)}
+                continue
+            try:
+                result[name], elapsed = future.result()
+                sections[name] = {"status": "ok", "ms": elapsed}
+            except Exception as e:
+                result[name] = None
+                sections[name] = {"status": "error", "error": str(e), "ms": round((time.perf_counter() - start) * 1000, 1)}
+
+        result["sections"] = sections
+        result["success"] = all(section["status"] == "ok" for section in sections.values())
+        return result
+
+    def _timed(self, fetch: Callable[[], Any]):
+        start = time.perf_counter()
+        value = fetch()
+        return value, round((time.perf_counter() - start) * 1000, 1)
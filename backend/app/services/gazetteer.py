@@ -0,0 +1,297 @@
+import bisect
+import difflib
+import io
+import re
+import unicodedata
+import zipfile
+from array import array
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from app.config import settings
+
+SEED_PATH = Path(__file__).resolve().parent.parent / "data" / "gazetteer_seed.tsv"
+
+# Letters NFKD does not decompose into a base letter plus accents
+FOLD_SPECIAL = str.maketrans({
+    "ß": "ss", "æ": "ae", "œ": "oe", "ø": "o", "ł": "l", "đ": "d", "ð": "d", "þ": "th", "ı": "i", "ħ": "h"
+})
+NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+# English names for the country qualifier in "Paris, France"; ISO codes always work
+COUNTRY_NAMES = {
+    "AE": ("united arab emirates", "uae"), "AR": ("argentina",), "AT": ("austria",), "AU": ("australia",),
+    "BE": ("belgium",), "BR": ("brazil",), "CA": ("canada",), "CH": ("switzerland",), "CL": ("chile",),
+    "CN": ("china",), "CO": ("colombia",), "CU": ("cuba",), "CZ": ("czech republic", "czechia"),
+    "DE": ("germany",), "DK": ("denmark",), "EG": ("egypt",), "ES": ("spain",), "FI": ("finland",),
+    "FR": ("france",), "GB": ("united kingdom", "uk", "england", "scotland", "great britain"), "GR": ("greece",),
+    "HK": ("hong kong",), "HR": ("croatia",), "HU": ("hungary",), "ID": ("indonesia",), "IE": ("ireland",),
+    "IL": ("israel",), "IN": ("india",), "IS": ("iceland",), "IT": ("italy",), "JP": ("japan",),
+    "KE": ("kenya",), "KH": ("cambodia",), "KR": ("south korea", "korea"), "MA": ("morocco",), "MC": ("monaco",),
+    "MX": ("mexico",), "MY": ("malaysia",), "NL": ("netherlands", "holland"), "NO": ("norway",), "NP": ("nepal",),
+    "NZ": ("new zealand",), "PE": ("peru",), "PH": ("philippines",), "PL": ("poland",), "PT": ("portugal",),
+    "QA": ("qatar",), "RO": ("romania",), "RU": ("russia",), "SE": ("sweden",), "SG": ("singapore",),
+    "SI": ("slovenia",), "TH": ("thailand",), "TR": ("turkey", "turkiye"), "TW": ("taiwan",), "TZ": ("tanzania",),
+    "US": ("united states", "usa", "us", "america"), "VA": ("vatican",), "VN": ("vietnam", "viet nam"),
+    "ZA": ("south africa",),
+}
+COUNTRY_CODES = {name: code for code, names in COUNTRY_NAMES.items() for name in names}
+
+# Fuzzy candidates must share this many leading characters with the query
+FUZZY_PREFIX = 1
+
+
+def fold(text: str) -> str:
+    """
+    Lowercase ASCII form used as the index key: "São Paulo" -> "sao paulo"
+    """
+    text = unicodedata.normalize("NFKD", text.lower().translate(FOLD_SPECIAL))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return NON_ALNUM.sub(" ", text).strip()
+
+
+@dataclass
+class Place:
+    id: int
+    name: str
+    latitude: float
+    longitude: float
+    country_code: str
+    admin1: str
+    feature_class: str
+    feature_code: str
+    population: int
+    timezone: str
+    match: str = "exact"  # "exact", "prefix" or "fuzzy"
+
+    @property
+    def search_radius(self) -> int:
+        """
+        Metres around the point that make up the place for area searches
+        """
+        if self.feature_class != "P":
+            return 1000
+        if self.population >= 100000:
+            return 10000
+        if self.population >= 10000:
+            return 5000
+        return 2000
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "country_code": self.country_code,
+            "feature_class": self.feature_class,
+            "feature_code": self.feature_code,
+            "population": self.population,
+            "timezone": self.timezone,
+            "match": self.match
+        }
+
+
+def read_geonames(path: Path) -> Iterator[List[str]]:
+    """
+    Rows of a GeoNames dump (cities15000.txt, allCountries.zip, ...) as column lists
+    """
+    if path.suffix == ".zip":
+        with zipfile.ZipFile(path) as archive:
+            member = next(name for name in archive.namelist() if name.endswith(".txt") and not name.startswith("readme"))
+            with archive.open(member) as raw:
+                yield from _read_rows(io.TextIOWrapper(raw, encoding="utf-8"))
+    else:
+        with open(path, encoding="utf-8") as handle:
+            yield from _read_rows(handle)
+
+
+def _read_rows(lines: Iterable[str]) -> Iterator[List[str]]:
+    for line in lines:
+        if line.startswith("#") or not line.strip():
+            continue
+        columns = line.rstrip("\n").split("\t")
+        if len(columns) >= 15:
+            yield columns
+
+
+class Gazetteer:
+    """
+    In-memory place name index built from a GeoNames-format dump.
+
+    Every ASCII-folded name and alternate name is a key in one sorted list, so
+    exact and prefix lookups are a binary search. Place attributes live in
+    parallel arrays indexed by position to keep millions of names compact.
+    """
+
+    def __init__(self, rows: Iterable[List[str]], min_population: int = 0, alternate_names: bool = True):
+        self.ids = array("l")
+        self.latitudes = array("d")
+        self.longitudes = array("d")
+        self.populations = array("q")
+        self.names: List[str] = []
+        self.countries: List[str] = []
+        self.admin1: List[str] = []
+        self.features: List[Tuple[str, str]] = []
+        self.timezones: List[str] = []
+
+        entries: List[Tuple[str, int, int]] = []  # (key, place index, 0 for the main name else 1)
+        for columns in rows:
+            population = int(columns[14] or 0)
+            if columns[6] == "P" and population < min_population:
+                continue
+            index = len(self.names)
+            self.ids.append(int(columns[0]))
+            self.names.append(columns[1])
+            self.latitudes.append(float(columns[4]))
+            self.longitudes.append(float(columns[5]))
+            self.features.append((columns[6], columns[7]))
+            self.countries.append(columns[8])
+            self.admin1.append(columns[10])
+            self.populations.append(population)
+            self.timezones.append(columns[17] if len(columns) > 17 else "")
+
+            keys: Set[str] = set()
+            main_keys = {fold(columns[1]), fold(columns[2])} - {""}
+            keys.update(main_keys)
+            entries.extend((key, index, 0) for key in main_keys)
+            if alternate_names and columns[3]:
+                for alternate in columns[3].split(","):
+                    key = fold(alternate)
+                    # Scripts that fold to nothing (CJK, Cyrillic, ...) cannot be typed against ASCII keys
+                    if key and key not in keys:
+                        keys.add(key)
+                        entries.append((key, index, 1))
+
+        entries.sort()
+        self.keys: List[str] = [entry[0] for entry in entries]
+        self.key_places = array("l", (entry[1] for entry in entries))
+        self.key_alternate = array("b", (entry[2] for entry in entries))
+        self._distinct_keys: Optional[List[str]] = None
+
+    @classmethod
+    def load(cls, path: Path, min_population: int = 0, alternate_names: bool = True) -> "Gazetteer":
+        return cls(read_geonames(path), min_population=min_population, alternate_names=alternate_names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _place(self, index: int, match: str) -> Place:
+        feature_class, feature_code = self.features[index]
+        return Place(
+            id=self.ids[index],
+            name=self.names[index],
+            latitude=self.latitudes[index],
+            longitude=self.longitudes[index],
+            country_code=self.countries[index],
+            admin1=self.admin1[index],
+            feature_class=feature_class,
+            feature_code=feature_code,
+            population=self.populations[index],
+            timezone=self.timezones[index],
+            match=match
+        )
+
+    def _rank(self, index: int, alternate: int) -> Tuple[int, int, int]:
+        # Main names before alternate names, populated places before landmarks, then bigger places
+        return alternate, 0 if self.features[index][0] == "P" else 1, -self.populations[index]
+
+    def _exact(self, key: str) -> Dict[int, int]:
+        """
+        Place index -> best alternate flag for places named exactly key
+        """
+        matches: Dict[int, int] = {}
+        position = bisect.bisect_left(self.keys, key)
+        while position < len(self.keys) and self.keys[position] == key:
+            index = self.key_places[position]
+            matches[index] = min(matches.get(index, 1), self.key_alternate[position])
+            position += 1
+        return matches
+
+    def _fuzzy_keys(self, key: str, limit: int, cutoff: float) -> List[str]:
+        if self._distinct_keys is None:
+            self._distinct_keys = sorted(set(self.keys))
+        prefix = key[:FUZZY_PREFIX]
+        start = bisect.bisect_left(self._distinct_keys, prefix)
+        end = bisect.bisect_left(self._distinct_keys, prefix + "\x7f")
+        return difflib.get_close_matches(key, self._distinct_keys[start:end], n=limit, cutoff=cutoff)
+
+    def lookup(self, query: str, fuzzy: bool = False, cutoff: float = 0.85) -> Optional[Place]:
+        """
+        Best place for a name such as "Lisbon", "Sao Paulo, Brazil" or "Paris, US".
+        A qualifier after the comma must name the country (or its ISO code or
+        first-level admin code); unknown qualifiers give None so the caller can
+        fall back to a full geocoder. Only exact (folded) names match unless
+        fuzzy is set: a landmark or street name must not quietly resolve to a
+        similarly named town ("Louvre" to "Louvres").
+        """
+        name, _, qualifier = query.partition(",")
+        key = fold(name)
+        if not key:
+            return None
+        qualifiers = [fold(part) for part in qualifier.split(",") if fold(part)]
+
+        matches = self._exact(key)
+        match = "exact"
+        if not matches and fuzzy:
+            for candidate in self._fuzzy_keys(key, 3, cutoff):
+                for index, alternate in self._exact(candidate).items():
+                    matches.setdefault(index, alternate)
+            match = "fuzzy"
+
+        candidates = [(index, alternate) for index, alternate in matches.items() if self._qualified(index, qualifiers)]
+        if not candidates:
+            return None
+        index, _ = min(candidates, key=lambda candidate: self._rank(*candidate))
+        return self._place(index, match)
+
+    def _qualified(self, index: int, qualifiers: List[str]) -> bool:
+        country = self.countries[index].lower()
+        admin1 = self.admin1[index].lower()
+        for qualifier in qualifiers:
+            if qualifier not in (country, admin1) and COUNTRY_CODES.get(qualifier, "").lower() != country:
+                return False
+        return True
+
+    def autocomplete(self, prefix: str, limit: int = 10, fuzzy: bool = True) -> List[Place]:
+        """
+        Places whose name or alternate name starts with prefix, most relevant first.
+        Fuzzy matches fill the list when a typo leaves too few prefix matches.
+        """
+        key = fold(prefix)
+        if not key:
+            return []
+
+        matches: Dict[int, int] = {}
+        position = bisect.bisect_left(self.keys, key)
+        while position < len(self.keys) and self.keys[position].startswith(key):
+            index = self.key_places[position]
+            matches[index] = min(matches.get(index, 1), self.key_alternate[position])
+            position += 1
+
+        ranked = sorted(matches.items(), key=lambda item: self._rank(*item))[:limit]
+        places = [self._place(index, "exact" if self._is_named(index, key) else "prefix") for index, _ in ranked]
+
+        if fuzzy and len(places) < limit and len(key) >= 3:
+            seen = {place.id for place in places}
+            for candidate in self._fuzzy_keys(key, limit, 0.75):
+                for index, alternate in sorted(self._exact(candidate).items(), key=lambda item: self._rank(*item)):
+                    if self.ids[index] not in seen and len(places) < limit:
+                        seen.add(self.ids[index])
+                        places.append(self._place(index, "fuzzy"))
+        return places
+
+    def _is_named(self, index: int, key: str) -> bool:
+        return index in self._exact(key)
+
+
+@lru_cache(maxsize=1)
+def get_gazetteer() -> Gazetteer:
+    """
+    Gazetteer loaded from GAZETTEER_PATH, or the bundled seed, once per process
+    """
+    path = Path(settings.gazetteer_path) if settings.gazetteer_path else SEED_PATH
+    return Gazetteer.load(path, min_population=settings.gazetteer_min_population,
+                          alternate_names=settings.gazetteer_alternate_names)
@@ -0,0 +1,110 @@
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Union
+
+from app.models.itinerary import ItineraryActivity, ItineraryDay
+
+# "Day 1", "## Day 2 - Museums", "**Day 3: Departure**", "Day 4 (Tuesday)"
+DAY_HEADING = re.compile(
+    r"^\s*(?:#{1,6}\s*)?[*_]*\s*day\s+(\d{1,3})\b[*_]*\s*(?:[-–—:.)(]+\s*)?(.*?)\s*[*_:]*\s*$",
+    re.IGNORECASE
+)
+# Any other markdown heading ends the current day (tips, budget summary, ...)
+SECTION_HEADING = re.compile(r"^\s*(?:#{1,6}\s+\S|\*\*[^*]+\*\*:?\s*$)")
+LIST_ITEM = re.compile(r"^\s*(?:[-*•+]|\d{1,2}[.)])\s+(.*\S)")
+LEADING_TIME = re.compile(
+    r"^[*_]*(\d{1,2}(?::\d{2})?\s*(?:[ap]\.?m\.?)?(?:\s*[-–]\s*\d{1,2}(?::\d{2})?\s*(?:[ap]\.?m\.?)?)?"
+    r"|morning|afternoon|evening|night|midday|noon|lunch|dinner|breakfast)[*_]*\s*[:\-–—]\s*[*_]*\s*(.+)$",
+    re.IGNORECASE
+)
+
+
+@dataclass
+class ParsedActivity:
+    description: str
+    time: Optional[str] = None
+
+
+@dataclass
+class ParsedDay:
+    day_number: int
+    title: Optional[str]
+    lines: List[str] = field(default_factory=list)
+    activities: List[ParsedActivity] = field(default_factory=list)
+
+    @property
+    def body(self) -> str:
+        return "\n".join(self.lines).strip()
+
+
+def parse_itinerary(text: str) -> List[ParsedDay]:
+    """
+    Split a generated markdown itinerary into days and list-item activities.
+    Text before the first day heading and after the last day's section is left out.
+    """
+    days: List[ParsedDay] = []
+    current: Optional[ParsedDay] = None
+
+    for line in text.splitlines():
+        heading = DAY_HEADING.match(line)
+        if heading:
+            current = ParsedDay(int(heading.group(1)), _parse_title(heading.group(2)))
+            days.append(current)
+            current.lines.append(line.strip())
+            continue
+
+        if current is None:
+            continue
+        if SECTION_HEADING.match(line) and not LIST_ITEM.match(line):
+            current = None
+            continue
+
+        current.lines.append(line.strip())
+        item = LIST_ITEM.match(line)
+        if item:
+            current.activities.append(_parse_activity(item.group(1)))
+
+    # Models sometimes repeat a day heading in a later section; keep the first
+    unique = {}
+    for day in days:
+        unique.setdefault(day.day_number, day)
+    return sorted(unique.values(), key=lambda day: day.day_number)
+
+
+def build_itinerary_days(text: str, start_date: Optional[Union[date, datetime]] = None) -> List[ItineraryDay]:
+    """
+    Parse an itinerary into ItineraryDay rows ready to attach to a trip
+    """
+    if isinstance(start_date, datetime):
+        start_date = start_date.date()
+
+    return [
+        ItineraryDay(
+            day_number=day.day_number,
+            date=start_date + timedelta(days=day.day_number - 1) if start_date else None,
+            title=day.title,
+            body=day.body,
+            activities=[
+                ItineraryActivity(position=position, time=activity.time, description=activity.description)
+                for position, activity in enumerate(day.activities)
+            ]
+        )
+        for day in parse_itinerary(text)
+    ]
+
+
+def _parse_title(text: str) -> Optional[str]:
+    title = text.strip(" *_-")
+    # "Day 4 (Tuesday)" leaves "Tuesday)" after the opening bracket is consumed
+    if title.endswith(")") and "(" not in title:
+        title = title[:-1].strip(" *_-")
+    return title or None
+
+
+def _parse_activity(text: str) -> ParsedActivity:
+    text = text.strip()
+    timed = LEADING_TIME.match(text)
+    if timed:
+        return ParsedActivity(description=timed.group(2).strip(), time=timed.group(1).strip())
+    return ParsedActivity(description=text)
@@ -0,0 +1,183 @@
+import json
+import math
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+PROFILES_PATH = Path(__file__).resolve().parent.parent / "data" / "language_profiles.json"
+
+NGRAM_SIZE = 3
+
+# Scripts used by a single supported language, checked before the n-gram model.
+# Cyrillic, Arabic and Devanagari are shared (ru/uk/bg, ar/fa/ur, ...) and are
+# left to the n-gram profiles. Each entry is (language, inclusive code point ranges).
+SCRIPTS = (
+    ("ko", [(0xAC00, 0xD7AF), (0x1100, 0x11FF), (0x3130, 0x318F)]),
+    ("ja", [(0x3040, 0x309F), (0x30A0, 0x30FF)]),
+    ("zh", [(0x4E00, 0x9FFF), (0x3400, 0x4DBF)]),
+    ("el", [(0x0370, 0x03FF)]),
+    ("he", [(0x0590, 0x05FF)]),
+    ("th", [(0x0E00, 0x0E7F)]),
+)
+# Short texts are weak evidence, so confidence scales up to this many n-grams
+FULL_CONFIDENCE_NGRAMS = 20
+# Probability mass a profile does not keep is spread over this many unseen n-grams
+UNSEEN_NGRAMS = 5000
+# Text in the best language's own profile scores about the profile's expected
+# log-likelihood per n-gram. Text in a language without a profile falls short
+# of it by roughly a nat or more, so confidence drops to zero between these
+# shortfalls (nats per n-gram).
+FIT_TOLERANCE = 0.6
+FIT_LIMIT = 1.1
+
+
+@dataclass
+class Detection:
+    language: str
+    confidence: float
+    method: str  # "script" or "ngram"
+
+
+def extract_ngrams(text: str, size: int = NGRAM_SIZE) -> List[str]:
+    """
+    Character n-grams of each lowercased word, padded with spaces at both ends
+    """
+    grams = []
+    for word in _words(text):
+        padded = f" {word} "
+        grams.extend(padded[i:i + size] for i in range(max(1, len(padded) - size + 1)))
+    return grams
+
+
+def _words(text: str) -> List[str]:
+    # Combining marks stay in the word; Devanagari and Arabic write vowels with them
+    return "".join(
+        char if char.isalpha() or char == "'" or unicodedata.category(char).startswith("M") else " "
+        for char in unicodedata.normalize("NFC", text.lower())
+    ).split()
+
+
+def build_profile(texts: Iterable[str], top: int) -> Dict[str, object]:
+    """
+    Most frequent n-grams of a corpus, in the format stored in the profiles file
+    """
+    counts = Counter()
+    for text in texts:
+        counts.update(extract_ngrams(text))
+    return {"total": sum(counts.values()), "counts": dict(counts.most_common(top))}
+
+
+def build_profile_from_frequencies(words: Iterable[Tuple[str, float]], top: int, scale: int = 10 ** 7) -> Dict[str, object]:
+    """
+    Profile from a word frequency list such as wordfreq's. Every n-gram of a
+    word counts with the word's frequency, which is the n-gram distribution of
+    the corpus the list was built from; counts are scaled to integers.
+    """
+    counts = Counter()
+    for word, frequency in words:
+        for gram in extract_ngrams(word):
+            counts[gram] += frequency
+    total = sum(counts.values())
+    if not total:
+        return {"total": 0, "counts": {}}
+    return {
+        "total": scale,
+        "counts": {gram: max(1, round(count / total * scale)) for gram, count in counts.most_common(top)}
+    }
+
+
+class LanguageDetector:
+    """
+    Character trigram naive Bayes over bundled profiles, with Unicode script
+    detection for languages that have their own alphabet.
+
+    The posterior only compares the languages that have a profile, so text in
+    any other language would still get a confident answer. Confidence is
+    therefore also scaled by how well the text fits the winning profile: its
+    mean log-likelihood per n-gram against what text in that language scores.
+    """
+
+    def __init__(self, profiles: Dict[str, Dict[str, object]]):
+        self.languages = sorted(language for language, profile in profiles.items() if profile["total"])
+        self.log_probs: Dict[str, Dict[str, float]] = {}
+        self.unseen: Dict[str, float] = {}
+        self.expected: Dict[str, float] = {}
+        for language in self.languages:
+            counts, total = profiles[language]["counts"], profiles[language]["total"]
+            log_probs = {gram: math.log(count / total) for gram, count in counts.items()}
+            rest = max(1.0 - sum(counts.values()) / total, 1e-6)
+            unseen = math.log(rest / UNSEEN_NGRAMS)
+            self.log_probs[language] = log_probs
+            self.unseen[language] = unseen
+            # Mean log-likelihood per n-gram of text drawn from the profile's own corpus
+            self.expected[language] = sum(count / total * log_probs[gram] for gram, count in counts.items()) + rest * unseen
+
+    @classmethod
+    def load(cls, path: Path = PROFILES_PATH) -> "LanguageDetector":
+        with open(path, encoding="utf-8") as handle:
+            return cls(json.load(handle)["languages"])
+
+    def detect(self, text: str) -> Optional[Detection]:
+        script = self._detect_script(text)
+        if script:
+            return script
+
+        grams = extract_ngrams(text)
+        if not grams or not self.languages:
+            return None
+
+        scores = {}
+        for language in self.languages:
+            log_probs, unseen = self.log_probs[language], self.unseen[language]
+            scores[language] = sum(log_probs.get(gram, unseen) for gram in grams)
+
+        best = max(scores, key=scores.get)
+        # Posterior under a uniform prior, discounted for very short inputs
+        posterior = 1 / sum(math.exp(score - scores[best]) for score in scores.values())
+        confidence = posterior * self._fit(best, scores[best] / len(grams)) * min(1.0, len(grams) / FULL_CONFIDENCE_NGRAMS)
+        return Detection(best, round(confidence, 3), "ngram")
+
+    def _fit(self, language: str, mean_log_prob: float) -> float:
+        """
+        1.0 when text scores like the language's own corpus, falling to 0.0 for text it does not model
+        """
+        shortfall = self.expected[language] - mean_log_prob
+        return min(1.0, max(0.0, (FIT_LIMIT - shortfall) / (FIT_LIMIT - FIT_TOLERANCE)))
+
+    def _detect_script(self, text: str) -> Optional[Detection]:
+        letters = Counter()
+        total = 0
+        for char in text:
+            if not char.isalpha():
+                continue
+            total += 1
+            code = ord(char)
+            for language, ranges in SCRIPTS:
+                if any(low <= code <= high for low, high in ranges):
+                    letters[language] += 1
+                    break
+
+        if not total or not letters:
+            return None
+
+        # Japanese mixes kana with kanji, so any kana makes it Japanese rather than Chinese
+        if letters["ja"] and letters["zh"]:
+            letters["ja"] += letters.pop("zh")
+
+        language, count = letters.most_common(1)[0]
+        share = count / total
+        if share < 0.5:
+            return None
+        return Detection(language, round(share, 3), "script")
+
+
+@lru_cache(maxsize=1)
+def get_language_detector() -> LanguageDetector:
+    """
+    Detector loaded from the bundled profiles once per process
+    """
+    return LanguageDetector.load()
+
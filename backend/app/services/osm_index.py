@@ -0,0 +1,178 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.utils.geo import bbox_around, haversine_m
+
+ACCOMMODATION_TYPES = ("hotel", "guest_house", "hostel")
+# Search radius around a settlement's centre node by its place tag, in metres
+SETTLEMENT_RADIUS = {"city": 10000, "town": 5000, "village": 2000, "suburb": 2000}
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS places ("
+    "id INTEGER PRIMARY KEY, osm_type TEXT NOT NULL, osm_id INTEGER NOT NULL, "
+    "tourism TEXT NOT NULL, lat REAL NOT NULL, lon REAL NOT NULL, tags TEXT NOT NULL)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS places_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon)",
+    "CREATE TABLE IF NOT EXISTS settlements ("
+    "name TEXT NOT NULL COLLATE NOCASE, place TEXT NOT NULL, population INTEGER, lat REAL NOT NULL, lon REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_settlements_name ON settlements (name)",
+    "CREATE INDEX IF NOT EXISTS ix_places_osm ON places (osm_id, osm_type)",
+    "CREATE TABLE IF NOT EXISTS bounds (min_lat REAL NOT NULL, max_lat REAL NOT NULL, min_lon REAL NOT NULL, max_lon REAL NOT NULL)",
+)
+
+
+def create_schema(connection: sqlite3.Connection):
+    for statement in SCHEMA:
+        connection.execute(statement)
+
+
+def insert_places(connection: sqlite3.Connection, rows: Iterable[Tuple[str, int, str, float, float, Dict[str, str]]]):
+    """
+    Insert (osm_type, osm_id, tourism, lat, lon, tags) rows and their R-tree entries
+    """
+    for osm_type, osm_id, tourism, lat, lon, tags in rows:
+        cursor = connection.execute(
+            "INSERT INTO places (osm_type, osm_id, tourism, lat, lon, tags) VALUES (?, ?, ?, ?, ?, ?)",
+            (osm_type, osm_id, tourism, lat, lon, json.dumps(tags, ensure_ascii=False, separators=(",", ":")))
+        )
+        connection.execute(
+            "INSERT INTO places_rtree (id, min_lat, max_lat, min_lon, max_lon) VALUES (?, ?, ?, ?, ?)",
+            (cursor.lastrowid, lat, lat, lon, lon)
+        )
+
+
+class OSMIndex:
+    """
+    Read-only view of an accommodation index built by scripts.import_osm.
+    Radius searches use the R-tree for the bounding box and haversine for the exact cut.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    @classmethod
+    def open(cls, path: str) -> Optional["OSMIndex"]:
+        """
+        The index at path, or None when no import has been run
+        """
+        if not path or not os.path.exists(path):
+            return None
+        return cls(path)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.connection = connection
+        return connection
+
+    def covers(self, lat: float, lon: float) -> bool:
+        """
+        Whether the point lies inside one of the imported extracts
+        """
+        row = self._connection().execute(
+            "SELECT 1 FROM bounds WHERE ? BETWEEN min_lat AND max_lat AND ? BETWEEN min_lon AND max_lon LIMIT 1",
+            (lat, lon)
+        ).fetchone()
+        return row is not None
+
+    def find_settlement(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Best matching city, town or village by name: larger places win ties
+        """
+        row = self._connection().execute(
+            "SELECT name, place, lat, lon FROM settlements WHERE name = ? "
+            "ORDER BY CASE place WHEN 'city' THEN 0 WHEN 'town' THEN 1 WHEN 'suburb' THEN 2 ELSE 3 END, "
+            "population DESC LIMIT 1",
+            (name.strip(),)
+        ).fetchone()
+        if not row:
+            return None
+        return {"name": row[0], "place": row[1], "lat": row[2], "lon": row[3], "radius": SETTLEMENT_RADIUS.get(row[1], 5000)}
+
+    def find_near(self, lat: float, lon: float, radius: float, limit: int) -> List[Dict[str, Any]]:
+        """
+        Accommodations within radius metres, nearest first
+        """
+        min_lat, max_lat, min_lon, max_lon = bbox_around(lat, lon, radius)
+        rows = self._connection().execute(
+            "SELECT p.osm_type, p.osm_id, p.lat, p.lon, p.tags FROM places_rtree r JOIN places p ON p.id = r.id "
+            "WHERE r.min_lat >= ? AND r.max_lat <= ? AND r.min_lon >= ? AND r.max_lon <= ?",
+            (min_lat, max_lat, min_lon, max_lon)
+        ).fetchall()
+
+        places = []
+        for osm_type, osm_id, place_lat, place_lon, tags in rows:
+            distance = haversine_m(lat, lon, place_lat, place_lon)
+            if distance <= radius:
+                places.append((distance, osm_type, osm_id, place_lat, place_lon, tags))
+        places.sort(key=lambda place: place[0])
+
+        return [
+            {
+                "osm_type": osm_type,
+                "osm_id": osm_id,
+                "lat": place_lat,
+                "lon": place_lon,
+                "distance": round(distance),
+                "tags": json.loads(tags)
+            }
+            for distance, osm_type, osm_id, place_lat, place_lon, tags in places[:limit]
+        ]
+
+    def get(self, osm_type: str, osm_id: int) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT osm_type, osm_id, lat, lon, tags FROM places WHERE osm_id = ? AND osm_type = ?", (osm_id, osm_type)
+        ).fetchone()
+        if not row:
+            return None
+        return {"osm_type": row[0], "osm_id": row[1], "lat": row[2], "lon": row[3], "tags": json.loads(row[4])}
+
+    def find_in_bbox(self, south: float, west: float, north: float, east: float, limit: int) -> List[Tuple[str, int, float, float, Dict[str, str]]]:
+        """
+        (osm_type, osm_id, lat, lon, tags) of accommodations inside the box
+        """
+        rows = self._connection().execute(
+            "SELECT p.osm_type, p.osm_id, p.lat, p.lon, p.tags FROM places_rtree r JOIN places p ON p.id = r.id "
+            "WHERE r.min_lat >= ? AND r.max_lat <= ? AND r.min_lon >= ? AND r.max_lon <= ? LIMIT ?",
+            (south, north, west, east, limit)
+        ).fetchall()
+        return [(osm_type, osm_id, lat, lon, json.loads(tags)) for osm_type, osm_id, lat, lon, tags in rows]
+
+    def count_in_bbox(self, south: float, west: float, north: float, east: float) -> int:
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM places_rtree WHERE min_lat >= ? AND max_lat <= ? AND min_lon >= ? AND max_lon <= ?",
+            (south, north, west, east)
+        ).fetchone()[0]
+
+    def cluster_bbox(self, south: float, west: float, north: float, east: float, cell: float) -> List[Tuple[int, float, float, float, float, float, float, int]]:
+        """
+        (count, mean lat, mean lon, min lat, min lon, max lat, max lon, any place id)
+        for each grid cell of size cell degrees that has accommodations in the box
+        """
+        return self._connection().execute(
+            "SELECT COUNT(*), AVG(min_lat), AVG(min_lon), MIN(min_lat), MIN(min_lon), MAX(min_lat), MAX(min_lon), MIN(id) "
+            "FROM places_rtree WHERE min_lat >= ? AND max_lat <= ? AND min_lon >= ? AND max_lon <= ? "
+            "GROUP BY CAST((min_lat + 90) / ? AS INTEGER), CAST((min_lon + 180) / ? AS INTEGER)",
+            (south, north, west, east, cell, cell)
+        ).fetchall()
+
+    def get_by_ids(self, ids: List[int]) -> List[Tuple[str, int, float, float, Dict[str, str]]]:
+        rows = []
+        # SQLite caps bound parameters per statement
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            rows.extend(self._connection().execute(
+                f"SELECT osm_type, osm_id, lat, lon, tags FROM places WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall())
+        return [(osm_type, osm_id, lat, lon, json.loads(tags)) for osm_type, osm_id, lat, lon, tags in rows]
+
+    def stats(self) -> Dict[str, int]:
+        connection = self._connection()
+        return {
+            "places": connection.execute("SELECT COUNT(*) FROM places").fetchone()[0],
+            "settlements": connection.execute("SELECT COUNT(*) FROM settlements").fetchone()[0]
+        }
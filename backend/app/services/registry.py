@@ -0,0 +1,110 @@
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict
+
+from fastapi import Request
+
+from app.services.accommodation_service import AccommodationService
+from app.services.currency_service import CurrencyService
+from app.services.destination_service import DestinationService
+from app.services.gazetteer import get_gazetteer
+from app.services.route_service import RouteService
+from app.services.translation_service import TranslationService
+from app.services.weather_service import WeatherService
+
+if TYPE_CHECKING:
+    from app.services.ai_service import AIService
+
+
+class ServiceRegistry:
+    """
+    One shared instance of each service per process.
+    Instances are built on first access so heavy services only load when used.
+    """
+
+    def __init__(self):
+        self._instances: Dict[str, Any] = {}
+        # Re-entrant so a factory can build the services it depends on
+        self._lock = threading.RLock()
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = self._instances[name] = factory()
+        return instance
+
+    @property
+    def weather(self) -> WeatherService:
+        return self._get("weather", WeatherService)
+
+    @property
+    def currency(self) -> CurrencyService:
+        return self._get("currency", CurrencyService)
+
+    @property
+    def translation(self) -> TranslationService:
+        return self._get("translation", TranslationService)
+
+    @property
+    def route(self) -> RouteService:
+        return self._get("route", RouteService)
+
+    @property
+    def accommodation(self) -> AccommodationService:
+        return self._get("accommodation", AccommodationService)
+
+    @property
+    def destination(self) -> DestinationService:
+        return self._get("destination", lambda: DestinationService(self.weather, self.currency, self.accommodation))
+    
+    @property
+    def ai(self) -> "AIService":
+        def build():
+            from app.services.ai_service import AIService
+            return AIService()
+        return self._get("ai", build)
+
+    def preload(self, include_ai: bool = False):
+        """
+        Build the lightweight services up front; the AI service only on request
+        """
+        for name in ("weather", "currency", "translation", "route", "accommodation"):
+            getattr(self, name)
+        get_gazetteer()
+        if include_ai:
+            self.ai.preload()
+
+
+def get_services(request: Request) -> ServiceRegistry:
+    """Dependency to get the app-wide service registry"""
+    return request.app.state.services
+
+
+def get_weather_service(request: Request) -> WeatherService:
+    return get_services(request).weather
+
+
+def get_currency_service(request: Request) -> CurrencyService:
+    return get_services(request).currency
+
+
+def get_translation_service(request: Request) -> TranslationService:
+    return get_services(request).translation
+
+
+def get_route_service(request: Request) -> RouteService:
+    return get_services(request).route
+
+
+def get_accommodation_service(request: Request) -> AccommodationService:
+    return get_services(request).accommodation
+
+
+def get_destination_service(request: Request) -> DestinationService:
+    return get_services(request).destination
+
+
+def get_ai_service(request: Request) -> "AIService":
+    return get_services(request).ai
@@ -1,77 +1,137 @@
 import requests
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from app.config import settings
+from app.services.gazetteer import get_gazetteer
+from app.utils.cache import get_cache
+from app.utils.geo import decode_polyline, encode_polyline, haversine_m
+from app.utils.metrics import track_fallback
+from app.utils.rate_limiter import upstream_scheduler
+
+# Travel mode to OpenRouteService profile
+PROFILES = {
+    "driving": "driving-car",
+    "walking": "foot-walking",
+    "cycling": "cycling-regular",
+    "transit": "driving-car"  # OpenRouteService doesn't have transit, using driving as fallback
+}
+# Average door-to-door speeds in m/s for great-circle estimates
+ESTIMATE_SPEEDS = {"driving": 8.3, "walking": 1.3, "cycling": 4.2, "transit": 6.9}
+# Street distance is rarely the straight line; typical urban detour ratio
+DETOUR_FACTOR = 1.3
 
 
 class RouteService:
     def __init__(self):
         self.api_key = settings.openroute_api_key
-        self.base_url = "https://api.openrouteservice.org/v2"
+        self.base_url = f"{settings.openroute_api_url}/v2"
+        self.geocode_url = f"{settings.openroute_api_url}/geocode/search"
+        self.geocode_cache = get_cache("geocode", settings.geocode_cache_ttl)
+        self.matrix_cache = get_cache("route_matrix", settings.route_matrix_cache_ttl)
+        self.route_cache = get_cache("route", settings.route_cache_ttl)
         
-    def get_route(self, start: str, end: str, mode: str = "driving") -> Dict[str, Any]:
+    def get_route(self, start: str, end: str, mode: str = "driving", waypoints: Optional[List[str]] = None) -> Dict[str, Any]:
         """
-        Get route between two points using OpenRouteService API
+        Get route between two points, via any ordered waypoints, using OpenRouteService API
         """
+        waypoints = waypoints or []
         try:
             # First, geocode the addresses to get coordinates
-            start_coords = self._geocode_address(start)
-            end_coords = self._geocode_address(end)
-            
-            if not start_coords or not end_coords:
-                return self._get_mock_route(start, end, mode)
-            
-            # Map mode to OpenRouteService profile
-            profile_map = {
-                "driving": "driving-car",
-                "walking": "foot-walking",
-                "cycling": "cycling-regular",
-                "transit": "driving-car"  # OpenRouteService doesn't have transit, using driving as fallback
-            }
-            
-            profile = profile_map.get(mode, "driving-car")
+            stops = [start, *waypoints, end]
+            coords = [self._geocode_address(stop) for stop in stops]
             
-            url = f"{self.base_url}/directions/{profile}/geojson"
+            if not all(coords):
+                return self._get_mock_route(start, end, mode, waypoints)
             
-            payload = {
-                "coordinates": [
-                    [start_coords["lon"], start_coords["lat"]],
-                    [end_coords["lon"], end_coords["lat"]]
-                ],
-                "instructions": True,
-                "preference": "fastest",
-                "units": "km"
-            }
+            profile = PROFILES.get(mode, "driving-car")
             
-            headers = {
-                "Authorization": self.api_key,
-                "Content-Type": "application/json"
-            }
+            key = self._route_key(profile, coords)
+            route = self.route_cache.get(key)
+            if route is None:
+                route = self._fetch_route(profile, coords)
+                self.route_cache.set(key, route)
             
-            response = requests.post(url, json=payload, headers=headers)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            # Process the route data
-            route = data["features"][0]
-            properties = route["properties"]
-            geometry = route["geometry"]
+            legs = []
+            for i, cached_leg in enumerate(route["legs"]):
+                leg = {
+                    "start": stops[i],
+                    "end": stops[i + 1],
+                    "distance": cached_leg["distance"],
+                    "duration": cached_leg["duration"],
+                    "instructions": [
+                        {"instruction": step[0], "distance": step[1], "duration": step[2], "type": step[3]}
+                        for step in cached_leg["steps"]
+                    ]
+                }
+                if cached_leg["range"]:
+                    leg["geometry_range"] = cached_leg["range"]
+                legs.append(leg)
             
             return {
                 "start": start,
                 "end": end,
+                "waypoints": waypoints,
                 "mode": mode,
-                "distance": properties["segments"][0]["distance"] / 1000,  # Convert to km
-                "duration": properties["segments"][0]["duration"] / 60,  # Convert to minutes
-                "coordinates": geometry["coordinates"],
-                "instructions": self._process_instructions(properties["segments"][0]["steps"]),
+                "distance": sum(leg["distance"] for leg in legs),
+                "duration": sum(leg["duration"] for leg in legs),
+                "coordinates": decode_polyline(route["polyline"]),
+                "instructions": [instruction for leg in legs for instruction in leg["instructions"]],
+                "legs": legs,
                 "success": True
             }
             
         except requests.RequestException as e:
-            return self._get_mock_route(start, end, mode)
+            return self._get_mock_route(start, end, mode, waypoints)
+    
+    def _route_key(self, profile: str, coords: List[Dict[str, float]]) -> Tuple[str, ...]:
+        # About 10 m of rounding so repeated transfers between the same places share an entry
+        return (profile, *(f"{point['lat']:.4f},{point['lon']:.4f}" for point in coords))
+    
+    def _fetch_route(self, profile: str, coords: List[Dict[str, float]]) -> Dict[str, Any]:
+        """
+        One ORS directions request through every stop, reduced to the compact form kept in the route cache:
+        an encoded polyline plus per-leg totals and [instruction, distance, duration, type] steps
+        """
+        url = f"{self.base_url}/directions/{profile}/geojson"
+        
+        # All stops go in one request; ORS returns one segment per leg
+        payload = {
+            "coordinates": [[point["lon"], point["lat"]] for point in coords],
+            "instructions": True,
+            "preference": "fastest",
+            "units": "km"
+        }
+        
+        headers = {
+            "Authorization": self.api_key,
+            "Content-Type": "application/json"
+        }
+        
+        response = upstream_scheduler.request("openroute", "POST", url, operation="route.get_route", json=payload, headers=headers)
+        response.raise_for_status()
+        
+        data = response.json()
+        
+        # Process the route data
+        route = data["features"][0]
+        properties = route["properties"]
+        # Indices of each stop in the combined geometry, when ORS reports them
+        way_points = properties.get("way_points")
+        
+        legs = []
+        for i, segment in enumerate(properties["segments"]):
+            legs.append({
+                "distance": segment["distance"] / 1000,  # Convert to km
+                "duration": segment["duration"] / 60,  # Convert to minutes
+                "range": [way_points[i], way_points[i + 1]] if way_points and len(way_points) > i + 1 else None,
+                "steps": [
+                    [step["instruction"], step["distance"], step["duration"], step["type"]]
+                    for step in self._process_instructions(segment["steps"])
+                ]
+            })
+        
+        return {"polyline": encode_polyline(route["geometry"]["coordinates"]), "legs": legs}
     
-    def get_multimodal_route(self, start: str, end: str) -> Dict[str, Any]:
+    def get_multimodal_route(self, start: str, end: str, waypoints: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         Get multimodal route suggestions (combining different transport modes)
         """
@@ -80,7 +140,7 @@ class RouteService:
             
             # Get routes for different modes
             for mode in ["driving", "walking", "cycling"]:
-                route = self.get_route(start, end, mode)
+                route = self.get_route(start, end, mode, waypoints)
                 if route["success"]:
                     routes[mode] = route
             
@@ -92,14 +152,137 @@ class RouteService:
             }
             
         except Exception as e:
-            return self._get_mock_multimodal_route(start, end)
+            return self._get_mock_multimodal_route(start, end, waypoints)
+    
+    def get_matrix(self, places: List[str], modes: List[str]) -> Dict[str, Any]:
+        """
+        Travel distance (km) and duration (minutes) between every pair of places, per mode.
+        Uses at most one OpenRouteService matrix request per mode; cached cells and
+        pairs closer than ROUTE_MATRIX_ESTIMATE_BELOW_M are filled without it.
+        """
+        coords = [self._geocode_address(place) for place in places]
+        located = [i for i, point in enumerate(coords) if point]
+        
+        result = {}
+        for mode in modes:
+            size = len(places)
+            distances: List[List[Optional[float]]] = [[None] * size for _ in range(size)]
+            durations: List[List[Optional[float]]] = [[None] * size for _ in range(size)]
+            cells = {"cache": 0, "openroute": 0, "estimate": 0}
+            profile = PROFILES.get(mode, "driving-car")
+            
+            missing: List[Tuple[int, int]] = []
+            for i in located:
+                for j in located:
+                    if i == j:
+                        distances[i][j] = durations[i][j] = 0.0
+                        continue
+                    straight = haversine_m(coords[i]["lat"], coords[i]["lon"], coords[j]["lat"], coords[j]["lon"])
+                    if straight < settings.route_matrix_estimate_below_m:
+                        cell = self._estimate_cell(straight, mode)
+                        source = "estimate"
+                    else:
+                        cell = self.matrix_cache.get(self._matrix_key(profile, coords[i], coords[j]))
+                        source = "cache"
+                    if cell is None:
+                        missing.append((i, j))
+                        continue
+                    distances[i][j], durations[i][j] = cell[0] / 1000, cell[1] / 60
+                    cells[source] += 1
+            
+            if missing:
+                # One request over just the locations that still have unknown cells
+                needed = sorted({i for pair in missing for i in pair})
+                fetched = self._fetch_matrix(profile, [coords[i] for i in needed])
+                position = {index: k for k, index in enumerate(needed)}
+                for i, j in missing:
+                    cell = None
+                    if fetched is not None:
+                        cell = fetched[position[i]][position[j]]
+                    if cell is not None:
+                        self.matrix_cache.set(self._matrix_key(profile, coords[i], coords[j]), cell)
+                        cells["openroute"] += 1
+                    else:
+                        straight = haversine_m(coords[i]["lat"], coords[i]["lon"], coords[j]["lat"], coords[j]["lon"])
+                        cell = self._estimate_cell(straight, mode)
+                        cells["estimate"] += 1
+                    distances[i][j], durations[i][j] = cell[0] / 1000, cell[1] / 60
+            
+            result[mode] = {
+                "distances": [[round(value, 3) if value is not None else None for value in row] for row in distances],
+                "durations": [[round(value, 1) if value is not None else None for value in row] for row in durations],
+                "cells": cells
+            }
+        
+        return {
+            "places": [
+                {"query": place, "latitude": point["lat"] if point else None, "longitude": point["lon"] if point else None}
+                for place, point in zip(places, coords)
+            ],
+            "unresolved": [place for place, point in zip(places, coords) if not point],
+            "modes": result,
+            "success": True
+        }
+    
+    def _matrix_key(self, profile: str, origin: Dict[str, float], destination: Dict[str, float]) -> Tuple[str, ...]:
+        # About 10 m of rounding so the same stop geocoded twice shares cells
+        return (profile, f"{origin['lat']:.4f}", f"{origin['lon']:.4f}", f"{destination['lat']:.4f}", f"{destination['lon']:.4f}")
+    
+    def _estimate_cell(self, straight_m: float, mode: str) -> List[float]:
+        """
+        [distance m, duration s] from the great-circle distance
+        """
+        distance = straight_m * DETOUR_FACTOR
+        return [distance, distance / ESTIMATE_SPEEDS.get(mode, ESTIMATE_SPEEDS["driving"])]
+    
+    def _fetch_matrix(self, profile: str, points: List[Dict[str, float]]) -> Optional[List[List[Optional[List[float]]]]]:
+        """
+        [[distance m, duration s] or None] for every ordered pair, or None if the request failed
+        """
+        try:
+            url = f"{self.base_url}/matrix/{profile}"
+            payload = {
+                "locations": [[point["lon"], point["lat"]] for point in points],
+                "metrics": ["distance", "duration"],
+                "units": "m"
+            }
+            headers = {
+                "Authorization": self.api_key,
+                "Content-Type": "application/json"
+            }
+            
+            response = upstream_scheduler.request("openroute", "POST", url, operation="route.get_matrix", json=payload, headers=headers)
+            response.raise_for_status()
+            
+            data = response.json()
+            return [
+                [
+                    [distance, duration] if distance is not None and duration is not None else None
+                    for distance, duration in zip(distance_row, duration_row)
+                ]
+                for distance_row, duration_row in zip(data["distances"], data["durations"])
+            ]
+            
+        except (requests.RequestException, KeyError, ValueError):
+            return None
     
     def _geocode_address(self, address: str) -> Optional[Dict[str, float]]:
         """
         Geocode an address to get coordinates
         """
+        # City and landmark names resolve locally; street addresses (anything with a number) need ORS
+        if not any(char.isdigit() for char in address):
+            place = get_gazetteer().lookup(address)
+            if place is not None:
+                return {"lat": place.latitude, "lon": place.longitude}
+        
+        key = address.strip().lower()
+        cached = self.geocode_cache.get(key)
+        if cached is not None:
+            return cached
+        
         try:
-            url = "https://api.openrouteservice.org/geocode/search"
+            url = self.geocode_url
             params = {
                 "text": address,
                 "size": 1
@@ -109,17 +292,19 @@ class RouteService:
                 "Authorization": self.api_key
             }
             
-            response = requests.get(url, params=params, headers=headers)
+            response = upstream_scheduler.request("openroute", "GET", url, operation="route._geocode_address", params=params, headers=headers)
             response.raise_for_status()
             
             data = response.json()
             
             if data["features"]:
                 feature = data["features"][0]
-                return {
+                coords = {
                     "lat": feature["geometry"]["coordinates"][1],
                     "lon": feature["geometry"]["coordinates"][0]
                 }
+                self.geocode_cache.set(key, coords)
+                return coords
             
             return None
             
@@ -142,10 +327,12 @@ class RouteService:
         
         return instructions
     
-    def _get_mock_route(self, start: str, end: str, mode: str) -> Dict[str, Any]:
+    @track_fallback("route")
+    def _get_mock_route(self, start: str, end: str, mode: str, waypoints: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         Return mock route data when API is unavailable
         """
+        waypoints = waypoints or []
         # Mock distances and durations based on mode
         mock_data = {
             "driving": {"distance": 15.5, "duration": 25},
@@ -155,42 +342,55 @@ class RouteService:
         }
         
         data = mock_data.get(mode, mock_data["driving"])
+        stops = [start, *waypoints, end]
+        
+        legs = []
+        for i in range(len(stops) - 1):
+            legs.append({
+                "start": stops[i],
+                "end": stops[i + 1],
+                "distance": data["distance"],
+                "duration": data["duration"],
+                "instructions": [
+                    {
+                        "instruction": f"Start from {stops[i]}",
+                        "distance": 0,
+                        "duration": 0,
+                        "type": "start"
+                    },
+                    {
+                        "instruction": f"Travel to {stops[i + 1]}",
+                        "distance": data["distance"],
+                        "duration": data["duration"],
+                        "type": "travel"
+                    }
+                ]
+            })
         
         return {
             "start": start,
             "end": end,
+            "waypoints": waypoints,
             "mode": mode,
-            "distance": data["distance"],
-            "duration": data["duration"],
+            "distance": data["distance"] * len(legs),
+            "duration": data["duration"] * len(legs),
             "coordinates": [
                 [-74.006, 40.7128],  # Mock coordinates
                 [-73.935242, 40.730610]
             ],
-            "instructions": [
-                {
-                    "instruction": f"Start from {start}",
-                    "distance": 0,
-                    "duration": 0,
-                    "type": "start"
-                },
-                {
-                    "instruction": f"Travel to {end}",
-                    "distance": data["distance"],
-                    "duration": data["duration"],
-                    "type": "travel"
-                }
-            ],
+            "instructions": [instruction for leg in legs for instruction in leg["instructions"]],
+            "legs": legs,
             "success": True
         }
     
-    def _get_mock_multimodal_route(self, start: str, end: str) -> Dict[str, Any]:
+    def _get_mock_multimodal_route(self, start: str, end: str, waypoints: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         Return mock multimodal route data when API is unavailable
         """
         routes = {}
         
         for mode in ["driving", "walking", "cycling"]:
-            routes[mode] = self._get_mock_route(start, end, mode)
+            routes[mode] = self._get_mock_route(start, end, mode, waypoints)
         
         return {
             "start": start,
@@ -1,17 +1,32 @@
+import hashlib
 import requests
 from typing import Dict, Any, Optional
 from app.config import settings
+from app.services.language_detector import Detection, get_language_detector
+from app.utils.cache import get_cache
+from app.utils.metrics import track_fallback
+from app.utils.rate_limiter import upstream_scheduler
 
 
 class TranslationService:
     def __init__(self):
         self.base_url = settings.libretranslate_api_url
+        self.translation_cache = get_cache("translation", settings.translation_cache_ttl)
         
     def translate_text(self, text: str, target_language: str, source_language: Optional[str] = "auto") -> Dict[str, Any]:
         """
         Translate text using LibreTranslate.de API
         """
         try:
+            # Detect locally so the server does not have to
+            if not source_language or source_language == "auto":
+                source_language = self._local_source_language(text)
+            
+            key = (source_language, target_language, hashlib.sha1(text.encode("utf-8")).hexdigest())
+            cached = self.translation_cache.get(key)
+            if cached is not None:
+                return cached
+            
             payload = {
                 "q": text,
                 "source": source_language,
@@ -23,18 +38,20 @@ class TranslationService:
                 "Content-Type": "application/json"
             }
             
-            response = requests.post(self.base_url, json=payload, headers=headers)
+            response = upstream_scheduler.request("libretranslate", "POST", self.base_url, operation="translation.translate_text", json=payload, headers=headers)
             response.raise_for_status()
             
             data = response.json()
             
-            return {
+            result = {
                 "original_text": text,
                 "translated_text": data["translatedText"],
-                "source_language": data.get("detectedLanguage", {}).get("confidence", 0),
+                "source_language": data.get("detectedLanguage", {}).get("language", source_language),
                 "target_language": target_language,
                 "success": True
             }
+            self.translation_cache.set(key, result)
+            return result
             
         except requests.RequestException as e:
             return self._get_mock_translation(text, target_language, source_language)
@@ -46,7 +63,7 @@ class TranslationService:
         try:
             url = f"{self.base_url.replace('/translate', '/languages')}"
             
-            response = requests.get(url)
+            response = upstream_scheduler.request("libretranslate", "GET", url, operation="translation.get_supported_languages")
             response.raise_for_status()
             
             data = response.json()
@@ -61,8 +78,15 @@ class TranslationService:
     
     def detect_language(self, text: str) -> Dict[str, Any]:
         """
-        Detect the language of the input text
+        Detect the language of the input text.
+        Uses the local model and only asks LibreTranslate when it is unsure.
         """
+        local = get_language_detector().detect(text)
+        if local and local.confidence >= settings.language_detect_min_confidence:
+            return self._local_detection(text, local)
+        if not settings.language_detect_remote_fallback:
+            return self._local_detection(text, local) if local else self._get_mock_detection(text)
+        
         try:
             url = f"{self.base_url.replace('/translate', '/detect')}"
             
@@ -74,7 +98,7 @@ class TranslationService:
                 "Content-Type": "application/json"
             }
             
-            response = requests.post(url, json=payload, headers=headers)
+            response = upstream_scheduler.request("libretranslate", "POST", url, operation="translation.detect_language", json=payload, headers=headers)
             response.raise_for_status()
             
             data = response.json()
@@ -82,13 +106,35 @@ class TranslationService:
             return {
                 "text": text,
                 "detected_language": data[0]["language"],
-                "confidence": data[0]["confidence"],
+                # LibreTranslate reports 0-100; every other source uses 0-1
+                "confidence": min(1.0, max(0.0, data[0]["confidence"] / 100)),
+                "method": "remote",
                 "success": True
             }
             
         except requests.RequestException as e:
+            if local:
+                return self._local_detection(text, local)
             return self._get_mock_detection(text)
     
+    def _local_detection(self, text: str, detection: Detection) -> Dict[str, Any]:
+        return {
+            "text": text,
+            "detected_language": detection.language,
+            "confidence": detection.confidence,
+            "method": detection.method,
+            "success": True
+        }
+    
+    def _local_source_language(self, text: str) -> str:
+        """
+        Source language from the local model, or "auto" when it is unsure
+        """
+        detection = get_language_detector().detect(text)
+        if detection and detection.confidence >= settings.language_detect_min_confidence:
+            return detection.language
+        return "auto"
+    
     def translate_itinerary(self, itinerary: str, target_language: str) -> Dict[str, Any]:
         """
         Translate a complete travel itinerary
@@ -97,10 +143,12 @@ class TranslationService:
             # Split itinerary into paragraphs for better translation
             paragraphs = itinerary.split('\n\n')
             translated_paragraphs = []
+            # Detect once for the whole text instead of once per paragraph
+            source_language = self._local_source_language(itinerary)
             
             for paragraph in paragraphs:
                 if paragraph.strip():
-                    result = self.translate_text(paragraph.strip(), target_language)
+                    result = self.translate_text(paragraph.strip(), target_language, source_language)
                     if result["success"]:
                         translated_paragraphs.append(result["translated_text"])
                     else:
@@ -126,6 +174,7 @@ class TranslationService:
                 "error": str(e)
             }
     
+    @track_fallback("translation")
     def _get_mock_translation(self, text: str, target_language: str, source_language: str) -> Dict[str, Any]:
         """
         Return mock translation when API is unavailable
@@ -154,6 +203,7 @@ class TranslationService:
             "success": True
         }
     
+    @track_fallback("translation")
     def _get_mock_languages(self) -> Dict[str, Any]:
         """
         Return mock supported languages when API is unavailable
@@ -176,6 +226,7 @@ class TranslationService:
             "success": True
         }
     
+    @track_fallback("translation")
     def _get_mock_detection(self, text: str) -> Dict[str, Any]:
         """
         Return mock language detection when API is unavailable
@@ -0,0 +1,168 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.database import SessionLocal
+from app.models.trip import Trip
+from app.services.registry import ServiceRegistry
+from app.utils.metrics import WARMUP_DURATION, WARMUP_LAST_SUCCESS, WARMUP_REFRESHES, WARMUP_RUNS
+from app.utils.rate_limiter import PRIORITY_BACKGROUND, upstream_priority
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, every process runs its own warmup
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupScheduler:
+    """
+    Background thread that keeps weather, forecast and exchange rate caches
+    warm for the most planned destinations.
+
+    Each run refreshes only entries that would expire before the next run,
+    at background priority so interactive requests keep their upstream slots.
+
+    With WARMUP_SINGLE_RUNNER only the first worker on a host to take the lock
+    file runs warmup; the others skip it. Pair this with a shared cache backend
+    (sqlite or redis) so that one runner's refreshes reach every worker.
+    """
+
+    def __init__(self, services: ServiceRegistry, session_factory: Callable[[], Session] = SessionLocal):
+        self.services = services
+        self.session_factory = session_factory
+        self.interval = settings.warmup_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_run: Dict[str, Any] = {}
+        self._lock_fd: Optional[int] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> bool:
+        """
+        Start the warmup thread; False when another process holds the runner lock
+        """
+        if self._thread is not None:
+            return True
+        if settings.warmup_single_runner and not self._acquire_lock():
+            logger.info("Cache warmup already runs in another process (lock %s)", settings.warmup_lock_path)
+            return False
+        self._thread = threading.Thread(target=self._loop, name="cache-warmup", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)  # Closing releases the flock
+            self._lock_fd = None
+
+    def _acquire_lock(self) -> bool:
+        if fcntl is None:
+            return True
+        fd = os.open(settings.warmup_lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._lock_fd = fd
+        return True
+
+    def _loop(self):
+        if self._stop.wait(settings.warmup_initial_delay):
+            return
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                WARMUP_RUNS.labels("error").inc()
+                logger.exception("Cache warmup run failed")
+            self._stop.wait(self.interval)
+
+    def popular_destinations(self) -> List[str]:
+        """
+        Most planned destinations from the trips table plus the configured list
+        """
+        destinations = list(settings.warmup_destinations)
+
+        if settings.warmup_top_destinations > 0:
+            db = self.session_factory()
+            try:
+                rows = (
+                    db.query(Trip.destination, func.count(Trip.id).label("trips"))
+                    .group_by(Trip.destination)
+                    .order_by(func.count(Trip.id).desc())
+                    .limit(settings.warmup_top_destinations)
+                    .all()
+                )
+                destinations.extend(row.destination for row in rows)
+            finally:
+                db.close()
+
+        unique = {}
+        for destination in destinations:
+            unique.setdefault(destination.strip().lower(), destination.strip())
+        return list(unique.values())
+
+    def run_once(self) -> Dict[str, Any]:
+        start = time.perf_counter()
+        # Refresh anything that would expire before the next run finishes
+        min_ttl = self.interval + settings.warmup_margin
+        refreshed = failed = 0
+
+        with upstream_priority(PRIORITY_BACKGROUND):
+            for destination in self.popular_destinations():
+                try:
+                    fetched = self.services.weather.refresh(destination, min_ttl=min_ttl)
+                    for kind, done in fetched.items():
+                        if done:
+                            WARMUP_REFRESHES.labels(kind, "success").inc()
+                            refreshed += 1
+                except (requests.RequestException, KeyError, ValueError) as e:
+                    WARMUP_REFRESHES.labels("weather", "error").inc()
+                    failed += 1
+                    logger.warning("Warmup of %s failed: %s", destination, e)
+
+            for base_currency in settings.warmup_currencies:
+                remaining = self.services.currency.rates_cache.ttl_remaining(base_currency.upper())
+                if remaining is not None and remaining > min_ttl:
+                    continue
+                try:
+                    self.services.currency.refresh_exchange_rates(base_currency)
+                    WARMUP_REFRESHES.labels("rates", "success").inc()
+                    refreshed += 1
+                except (requests.RequestException, KeyError, ValueError) as e:
+                    WARMUP_REFRESHES.labels("rates", "error").inc()
+                    failed += 1
+                    logger.warning("Warmup of %s rates failed: %s", base_currency, e)
+
+        duration = time.perf_counter() - start
+        WARMUP_DURATION.observe(duration)
+        WARMUP_RUNS.labels("success" if not failed else "partial").inc()
+        if not failed:
+            WARMUP_LAST_SUCCESS.set_to_current_time()
+
+        self.last_run = {
+            "finished_at": time.time(),
+            "duration": round(duration, 3),
+            "refreshed": refreshed,
+            "failed": failed
+        }
+        return self.last_run
@@ -1,91 +1,488 @@
+import bisect
+import calendar
+import contextvars
 import requests
-from typing import Dict, Any, Optional
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Any, Optional, List, Tuple, Union
 from app.config import settings
+from app.services.climatology import get_climate_normals
+from app.utils.cache import SingleFlight, get_cache
+from app.utils.metrics import track_fallback
+from app.utils.rate_limiter import upstream_scheduler
+
+
+# OpenWeather's group endpoint accepts at most 20 city IDs per call
+GROUP_LOOKUP_SIZE = 20
+
+# OpenWeather city IDs do not change; keep them long but bounded
+CITY_ID_TTL = 30 * 86400
+
+# Per-slot forecast fields, in response order
+FORECAST_FIELDS = ("datetime", "temperature", "feels_like", "humidity", "description", "icon", "wind_speed", "pop")
+
+# Per-day fields of the daily aggregate
+DAILY_FIELDS = ("date", "temp_min", "temp_max", "temp_mean", "pop_max", "description", "icon", "slots")
+
+# Per-day fields of the climatology outlook
+CLIMATE_FIELDS = ("date", "temp_min", "temp_max", "temp_mean", "precip_mm")
+
+# Longest span the climatology outlook covers
+MAX_OUTLOOK_DAYS = 366
+
+DateLike = Union[date, datetime]
 
 
 class WeatherService:
     def __init__(self):
         self.api_key = settings.openweather_api_key
-        self.base_url = "http://api.openweathermap.org/data/2.5"
+        self.base_url = settings.openweather_api_url
+        self.current_cache = get_cache("weather_current", settings.weather_cache_ttl, settings.weather_cache_size)
+        self.forecast_cache = get_cache("weather_forecast", settings.forecast_cache_ttl, settings.weather_cache_size)
+        # Location -> OpenWeather city ID, learned from earlier lookups
+        self.city_ids = get_cache("weather_city_ids", CITY_ID_TTL, settings.weather_cache_size)
+        # Concurrent misses for the same location share one upstream call
+        self._inflight = SingleFlight()
         
-    def get_current_weather(self, city: str, country_code: Optional[str] = None) -> Dict[str, Any]:
+    def get_current_weather(self, city: str, country_code: Optional[str] = None, fallback: bool = True) -> Dict[str, Any]:
         """
-        Get current weather for a city
+        Get current weather for a city.
+        fallback=False raises upstream errors instead of returning mock data.
         """
+        location = self._location(city, country_code)
+        
+        cached = self.current_cache.get(self._cache_key(location))
+        if cached is not None:
+            return cached
+        
         try:
-            location = f"{city},{country_code}" if country_code else city
-            url = f"{self.base_url}/weather"
-            params = {
-                "q": location,
-                "appid": self.api_key,
-                "units": "metric"  # Use Celsius
-            }
-            
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            return {
-                "city": data["name"],
-                "country": data["sys"]["country"],
-                "temperature": data["main"]["temp"],
-                "feels_like": data["main"]["feels_like"],
-                "humidity": data["main"]["humidity"],
-                "pressure": data["main"]["pressure"],
-                "description": data["weather"][0]["description"],
-                "icon": data["weather"][0]["icon"],
-                "wind_speed": data["wind"]["speed"],
-                "wind_direction": data["wind"].get("deg", 0),
-                "visibility": data.get("visibility", 0),
-                "sunrise": data["sys"]["sunrise"],
-                "sunset": data["sys"]["sunset"]
-            }
+            return self._inflight.do(("current", self._cache_key(location)), self._fetch_current_weather, location)
             
         except requests.RequestException as e:
+            if not fallback:
+                raise
             return self._get_mock_weather(city)
     
-    def get_forecast(self, city: str, country_code: Optional[str] = None) -> Dict[str, Any]:
+    def get_forecast(self, city: str, country_code: Optional[str] = None, aggregate: Optional[str] = None,
+                     start_date: Optional[DateLike] = None, end_date: Optional[DateLike] = None,
+                     format: str = "rows", fallback: bool = True) -> Dict[str, Any]:
         """
-        Get 5-day weather forecast for a city
+        Get 5-day weather forecast for a city.
+        aggregate="daily" returns one summary per day instead of 3-hour slots;
+        start_date/end_date keep only the days of that window (city local time);
+        format="columnar" returns one array per field instead of one dict per entry;
+        fallback=False raises upstream errors instead of returning mock data.
         """
-        try:
-            location = f"{city},{country_code}" if country_code else city
-            url = f"{self.base_url}/forecast"
-            params = {
-                "q": location,
-                "appid": self.api_key,
-                "units": "metric"
+        location = self._location(city, country_code)
+        
+        data = self.forecast_cache.get(self._cache_key(location))
+        if data is None:
+            try:
+                data = self._inflight.do(("forecast", self._cache_key(location)), self._fetch_forecast, location)
+                
+            except requests.RequestException as e:
+                if not fallback:
+                    raise
+                data = self._get_mock_forecast(city)
+        
+        return self._render_forecast(data, aggregate, start_date, end_date, format)
+    
+    def in_forecast_window(self, start_date: DateLike, end_date: Optional[DateLike] = None) -> bool:
+        """
+        Whether any day from start_date to end_date is covered by the live forecast
+        """
+        today = datetime.now(timezone.utc).date()
+        end = _as_date(end_date) if end_date else _as_date(start_date)
+        return _as_date(start_date) <= today + timedelta(days=settings.forecast_horizon_days) and end >= today
+    
+    def get_climate_outlook(self, city: str, start_date: DateLike, end_date: Optional[DateLike] = None,
+                            format: str = "rows") -> Optional[Dict[str, Any]]:
+        """
+        Expected temperature and precipitation per day from the bundled monthly
+        normals of the nearest station. No network call; None when no station
+        lies within CLIMATE_NORMALS_MAX_DISTANCE_KM of the city.
+        """
+        normals = get_climate_normals()
+        match = normals.find(city, settings.climate_normals_max_distance_km * 1000)
+        if match is None:
+            return None
+        index, distance = match
+        
+        start = _as_date(start_date)
+        end = _as_date(end_date) if end_date else start
+        end = min(max(start, end), start + timedelta(days=MAX_OUTLOOK_DAYS - 1))
+        
+        daily = [
+            {
+                "date": day.isoformat(),
+                "temp_min": round(temp_min, 1),
+                "temp_max": round(temp_max, 1),
+                "temp_mean": round((temp_min + temp_max) / 2, 1),
+                "precip_mm": round(precip, 1)
             }
+            for day, temp_min, temp_max, precip in normals.daily(index, start, end)
+        ]
+        
+        station = normals.station(index)
+        result = {
+            "city": city,
+            "country": station["country"],
+            "source": "climatology",
+            "station": {**station, "distance_km": round(distance / 1000, 1)},
+            "window": {"start_date": start.isoformat(), "end_date": end.isoformat()},
+            "summary": {
+                "temp_min": min(day["temp_min"] for day in daily),
+                "temp_max": max(day["temp_max"] for day in daily),
+                "temp_mean": round(sum(day["temp_mean"] for day in daily) / len(daily), 1),
+                "precip_mm": round(sum(day["precip_mm"] for day in daily), 1)
+            }
+        }
+        if format == "columnar":
+            result["format"] = "columnar"
+            result["daily"] = {field: [day[field] for day in daily] for field in CLIMATE_FIELDS}
+        else:
+            result["daily"] = daily
+        return result
+    
+    def refresh(self, city: str, country_code: Optional[str] = None, forecast: bool = True,
+                min_ttl: float = 0) -> Dict[str, bool]:
+        """
+        Re-fetch current weather and forecast into the cache unless the cached
+        entry still has more than `min_ttl` seconds to live. Raises on failure.
+        Returns which of the two were fetched.
+        """
+        location = self._location(city, country_code)
+        key = self._cache_key(location)
+        fetched = {"current": False, "forecast": False}
+        
+        remaining = self.current_cache.ttl_remaining(key)
+        if remaining is None or remaining <= min_ttl:
+            self._inflight.do(("current", key), self._fetch_current_weather, location)
+            fetched["current"] = True
+        
+        if forecast:
+            remaining = self.forecast_cache.ttl_remaining(key)
+            if remaining is None or remaining <= min_ttl:
+                self._inflight.do(("forecast", key), self._fetch_forecast, location)
+                fetched["forecast"] = True
+        
+        return fetched
+    
+    def get_weather_batch(self, cities: List[str], country_code: Optional[str] = None,
+                          include_current: bool = True, include_forecast: bool = False,
+                          forecast_format: str = "rows") -> Dict[str, Any]:
+        """
+        Get weather for many cities at once.
+        Cached entries are served directly; misses are fetched concurrently,
+        using OpenWeather group lookups for cities whose ID is already known.
+        Errors are reported per city instead of falling back to mock data.
+        """
+        locations = {}
+        seen = set()
+        for city in cities:
+            location = self._location(city, country_code)
+            if self._cache_key(location) not in seen:
+                seen.add(self._cache_key(location))
+                locations[location] = city
+        
+        results = {location: {"city": city, "errors": {}} for location, city in locations.items()}
+        jobs = []
+        
+        if include_current:
+            misses = []
+            for location in locations:
+                cached = self.current_cache.get(self._cache_key(location))
+                if cached is not None:
+                    results[location]["current"] = cached
+                else:
+                    misses.append(location)
             
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
+            for location in self._fetch_current_group(misses, results):
+                jobs.append(("current", location, self._fetch_current_weather))
+        
+        if include_forecast:
+            for location in locations:
+                cached = self.forecast_cache.get(self._cache_key(location))
+                if cached is not None:
+                    results[location]["forecast"] = self._render_forecast(cached, format=forecast_format)
+                else:
+                    jobs.append(("forecast", location, self._fetch_forecast))
+        
+        if jobs:
+            workers = min(settings.weather_batch_concurrency, len(jobs))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                # Copy the context per job so the caller's upstream priority applies
+                futures = [
+                    (kind, location, pool.submit(
+                        contextvars.copy_context().run, self._inflight.do, (kind, self._cache_key(location)), fetch, location
+                    ))
+                    for kind, location, fetch in jobs
+                ]
+                for kind, location, future in futures:
+                    try:
+                        results[location][kind] = future.result()
+                        if kind == "forecast":
+                            results[location][kind] = self._render_forecast(results[location][kind], format=forecast_format)
+                    except (requests.RequestException, KeyError, ValueError) as e:
+                        results[location][kind] = None
+                        results[location]["errors"][kind] = str(e)
+        
+        entries = []
+        for entry in results.values():
+            entry["success"] = not entry["errors"]
+            entries.append(entry)
+        
+        return {
+            "results": entries,
+            "count": len(entries),
+            "success": all(entry["success"] for entry in entries)
+        }
+    
+    def _fetch_current_weather(self, location: str) -> Dict[str, Any]:
+        """
+        Fetch current weather from OpenWeather and cache it; raises on failure
+        """
+        url = f"{self.base_url}/weather"
+        params = {
+            "q": location,
+            "appid": self.api_key,
+            "units": "metric"  # Use Celsius
+        }
+        
+        response = upstream_scheduler.request("openweather", "GET", url, operation="weather.get_current_weather", params=params)
+        response.raise_for_status()
+        
+        data = response.json()
+        
+        return self._store_current(location, data)
+    
+    def _fetch_current_group(self, locations: List[str], results: Dict[str, Dict[str, Any]]) -> List[str]:
+        """
+        Fetch current weather for locations with known city IDs in group calls.
+        Fills `results` and returns the locations that still need a lookup.
+        """
+        city_ids = {location: self.city_ids.get(self._cache_key(location)) for location in locations}
+        known = [location for location in locations if city_ids[location] is not None]
+        remaining = [location for location in locations if city_ids[location] is None]
+        
+        for i in range(0, len(known), GROUP_LOOKUP_SIZE):
+            chunk = known[i:i + GROUP_LOOKUP_SIZE]
+            by_id = {city_ids[location]: location for location in chunk}
             
-            # Process forecast data
-            forecast = []
-            for item in data["list"]:
-                forecast.append({
-                    "datetime": item["dt"],
-                    "temperature": item["main"]["temp"],
-                    "feels_like": item["main"]["feels_like"],
-                    "humidity": item["main"]["humidity"],
-                    "description": item["weather"][0]["description"],
-                    "icon": item["weather"][0]["icon"],
-                    "wind_speed": item["wind"]["speed"],
-                    "pop": item.get("pop", 0)  # Probability of precipitation
-                })
+            try:
+                # Identical concurrent batches share one group call
+                ids = ",".join(str(city_id) for city_id in sorted(by_id))
+                for data in self._inflight.do(("group", ids), self._fetch_group, ids):
+                    location = by_id.pop(data["id"], None)
+                    if location is not None:
+                        results[location]["current"] = self._store_current(location, data)
+            except (requests.RequestException, KeyError, ValueError):
+                pass
             
-            return {
-                "city": data["city"]["name"],
-                "country": data["city"]["country"],
-                "forecast": forecast
+            # Anything the group call did not answer falls back to a single lookup
+            remaining.extend(by_id.values())
+        
+        return remaining
+    
+    def _fetch_group(self, ids: str) -> List[Dict[str, Any]]:
+        """
+        Raw current weather for comma-separated OpenWeather city IDs; raises on failure
+        """
+        params = {
+            "id": ids,
+            "appid": self.api_key,
+            "units": "metric"
+        }
+        response = upstream_scheduler.request("openweather", "GET", f"{self.base_url}/group", operation="weather.get_weather_batch", params=params)
+        response.raise_for_status()
+        return response.json()["list"]
+    
+    def _store_current(self, location: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        weather = {
+            "city": data["name"],
+            "country": data["sys"]["country"],
+            "temperature": data["main"]["temp"],
+            "feels_like": data["main"]["feels_like"],
+            "humidity": data["main"]["humidity"],
+            "pressure": data["main"]["pressure"],
+            "description": data["weather"][0]["description"],
+            "icon": data["weather"][0]["icon"],
+            "wind_speed": data["wind"]["speed"],
+            "wind_direction": data["wind"].get("deg", 0),
+            "visibility": data.get("visibility", 0),
+            "sunrise": data["sys"]["sunrise"],
+            "sunset": data["sys"]["sunset"]
+        }
+        
+        key = self._cache_key(location)
+        if "id" in data:
+            self.city_ids.set(key, data["id"])
+        self.current_cache.set(key, weather)
+        
+        return weather
+    
+    def _fetch_forecast(self, location: str) -> Dict[str, Any]:
+        """
+        Fetch the 5-day forecast from OpenWeather and cache it; raises on failure.
+        Slots are stored as one list per field, which is what aggregation and
+        windowing work on.
+        """
+        url = f"{self.base_url}/forecast"
+        params = {
+            "q": location,
+            "appid": self.api_key,
+            "units": "metric"
+        }
+        
+        response = upstream_scheduler.request("openweather", "GET", url, operation="weather.get_forecast", params=params)
+        response.raise_for_status()
+        
+        data = response.json()
+        
+        # Process forecast data
+        columns = {field: [] for field in FORECAST_FIELDS}
+        for item in data["list"]:
+            columns["datetime"].append(item["dt"])
+            columns["temperature"].append(item["main"]["temp"])
+            columns["feels_like"].append(item["main"]["feels_like"])
+            columns["humidity"].append(item["main"]["humidity"])
+            columns["description"].append(item["weather"][0]["description"])
+            columns["icon"].append(item["weather"][0]["icon"])
+            columns["wind_speed"].append(item["wind"]["speed"])
+            columns["pop"].append(item.get("pop", 0))  # Probability of precipitation
+        
+        result = {
+            "city": data["city"]["name"],
+            "country": data["city"]["country"],
+            "timezone": data["city"].get("timezone", 0),  # Offset from UTC in seconds
+            "columns": columns
+        }
+        
+        key = self._cache_key(location)
+        if "id" in data["city"] and self.city_ids.ttl_remaining(key) is None:
+            self.city_ids.set(key, data["city"]["id"])
+        self.forecast_cache.set(key, result)
+        
+        return result
+    
+    def _render_forecast(self, data: Dict[str, Any], aggregate: Optional[str] = None,
+                         start_date: Optional[DateLike] = None, end_date: Optional[DateLike] = None,
+                         format: str = "rows") -> Dict[str, Any]:
+        """
+        Build the forecast response from cached columns.
+        The columnar format slices the cached lists without building per-slot dicts.
+        """
+        columns = data["columns"]
+        offset = data.get("timezone", 0)
+        lo, hi = self._window_bounds(columns["datetime"], offset, start_date, end_date)
+        
+        result = {
+            "city": data["city"],
+            "country": data["country"]
+        }
+        
+        if start_date or end_date:
+            result["window"] = {
+                "start_date": _as_date(start_date).isoformat() if start_date else None,
+                "end_date": _as_date(end_date).isoformat() if end_date else None
             }
+        
+        if format == "columnar":
+            result["format"] = "columnar"
+        
+        if aggregate == "daily":
+            daily = self._aggregate_daily(columns, offset, lo, hi)
+            if format == "columnar":
+                result["daily"] = {field: [day[field] for day in daily] for field in DAILY_FIELDS}
+            else:
+                result["daily"] = daily
+        elif format == "columnar":
+            result["forecast"] = {field: columns[field][lo:hi] for field in FORECAST_FIELDS}
+        else:
+            result["forecast"] = [
+                {field: columns[field][i] for field in FORECAST_FIELDS}
+                for i in range(lo, hi)
+            ]
+        
+        return result
+    
+    def _window_bounds(self, timestamps: List[int], offset: int,
+                       start_date: Optional[DateLike], end_date: Optional[DateLike]) -> Tuple[int, int]:
+        """
+        Index range of the slots whose local date falls inside the window.
+        Slots are sorted by time, so this is two binary searches.
+        """
+        lo, hi = 0, len(timestamps)
+        if start_date:
+            start = calendar.timegm(_as_date(start_date).timetuple()) - offset
+            lo = bisect.bisect_left(timestamps, start)
+        if end_date:
+            end = calendar.timegm((_as_date(end_date) + timedelta(days=1)).timetuple()) - offset
+            hi = bisect.bisect_left(timestamps, end)
+        return lo, max(lo, hi)
+    
+    def _aggregate_daily(self, columns: Dict[str, List[Any]], offset: int, lo: int, hi: int) -> List[Dict[str, Any]]:
+        """
+        Summarize slots per local day in a single pass over the columns
+        """
+        timestamps = columns["datetime"]
+        temperatures = columns["temperature"]
+        pops = columns["pop"]
+        descriptions = columns["description"]
+        icons = columns["icon"]
+        
+        days = []
+        current_day = None
+        for i in range(lo, hi):
+            day = (timestamps[i] + offset) // 86400
+            if day != current_day:
+                current_day = day
+                summary = {
+                    "day": day,
+                    "temp_min": temperatures[i],
+                    "temp_max": temperatures[i],
+                    "temp_sum": 0.0,
+                    "slots": 0,
+                    "pop_max": pops[i],
+                    "conditions": Counter()
+                }
+                days.append(summary)
             
-        except requests.RequestException as e:
-            return self._get_mock_forecast(city)
+            temperature = temperatures[i]
+            if temperature < summary["temp_min"]:
+                summary["temp_min"] = temperature
+            if temperature > summary["temp_max"]:
+                summary["temp_max"] = temperature
+            if pops[i] > summary["pop_max"]:
+                summary["pop_max"] = pops[i]
+            summary["temp_sum"] += temperature
+            summary["slots"] += 1
+            summary["conditions"][(descriptions[i], icons[i])] += 1
+        
+        daily = []
+        for summary in days:
+            description, icon = summary["conditions"].most_common(1)[0][0]
+            daily.append({
+                "date": (date(1970, 1, 1) + timedelta(days=summary["day"])).isoformat(),
+                "temp_min": summary["temp_min"],
+                "temp_max": summary["temp_max"],
+                "temp_mean": round(summary["temp_sum"] / summary["slots"], 1),
+                "pop_max": summary["pop_max"],
+                "description": description,
+                "icon": icon,
+                "slots": summary["slots"]
+            })
+        
+        return daily
+    
+    def _location(self, city: str, country_code: Optional[str] = None) -> str:
+        return f"{city},{country_code}" if country_code else city
     
+    def _cache_key(self, location: str) -> str:
+        return location.strip().lower()
+    
+    @track_fallback("weather")
     def _get_mock_weather(self, city: str) -> Dict[str, Any]:
         """
         Return mock weather data when API is unavailable
@@ -106,6 +503,7 @@ class WeatherService:
             "sunset": 1641038400
         }
     
+    @track_fallback("weather")
     def _get_mock_forecast(self, city: str) -> Dict[str, Any]:
         """
         Return mock forecast data when API is unavailable
@@ -113,21 +511,24 @@ class WeatherService:
         import time
         current_time = int(time.time())
         
-        forecast = []
-        for i in range(40):  # 5 days * 8 forecasts per day
-            forecast.append({
-                "datetime": current_time + (i * 10800),  # 3 hours apart
-                "temperature": 20 + (i % 10),  # Varying temperature
-                "feels_like": 22 + (i % 8),
-                "humidity": 60 + (i % 20),
-                "description": "partly cloudy",
-                "icon": "02d",
-                "wind_speed": 2.5 + (i % 3),
-                "pop": 0.1 + (i % 5) * 0.1
-            })
+        slots = range(40)  # 5 days * 8 forecasts per day
         
         return {
             "city": city,
             "country": "Unknown",
-            "forecast": forecast
-        } 
\ No newline at end of file
+            "timezone": 0,
+            "columns": {
+                "datetime": [current_time + (i * 10800) for i in slots],  # 3 hours apart
+                "temperature": [20 + (i % 10) for i in slots],  # Varying temperature
+                "feels_like": [22 + (i % 8) for i in slots],
+                "humidity": [60 + (i % 20) for i in slots],
+                "description": ["partly cloudy" for i in slots],
+                "icon": ["02d" for i in slots],
+                "wind_speed": [2.5 + (i % 3) for i in slots],
+                "pop": [0.1 + (i % 5) * 0.1 for i in slots]
+            }
+        }
+
+
+def _as_date(value: DateLike) -> date:
+    return value.date() if isinstance(value, datetime) else value
@@ -0,0 +1 @@
+# Shared utilities
\ No newline at end of file
@@ -0,0 +1,120 @@
+import asyncio
+import time
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from app.utils.metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTIONS, ADMISSION_WAIT
+
+ROUTE_CLASSES = ("llm", "default")
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, route_class: str, reason: str, retry_after: int):
+        super().__init__(f"{route_class} admission rejected: {reason}")
+        self.route_class = route_class
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+    """
+    Caps concurrent requests of one route class in this worker.
+
+    Up to max_concurrent requests run at once and up to max_queue wait for a
+    slot for at most max_wait seconds. Anything beyond that is rejected right
+    away so the client can retry instead of holding a connection open.
+    """
+
+    def __init__(self, route_class: str, max_concurrent: int, max_queue: int, max_wait: float, retry_after: int):
+        self.route_class = route_class
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.retry_after = retry_after
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self._waiting = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._wait_histogram = ADMISSION_WAIT.labels(route_class)
+        ADMISSION_IN_FLIGHT.labels(route_class).set_function(lambda: self._in_flight)
+        ADMISSION_QUEUE_DEPTH.labels(route_class).set_function(lambda: self._waiting)
+
+    async def acquire(self):
+        if self._semaphore is None:
+            # Created lazily so it binds to the worker's running event loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        start = time.perf_counter()
+        if self._semaphore.locked():
+            if self._waiting >= self.max_queue:
+                self._reject("queue_full")
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait)
+            except asyncio.TimeoutError:
+                self._reject("timeout")
+            finally:
+                self._waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self._in_flight += 1
+        self._admitted += 1
+        self._wait_histogram.observe(time.perf_counter() - start)
+
+    def release(self):
+        self._in_flight -= 1
+        self._semaphore.release()
+
+    def _reject(self, reason: str):
+        self._rejected += 1
+        ADMISSION_REJECTIONS.labels(self.route_class, reason).inc()
+        raise AdmissionRejected(self.route_class, reason, self.retry_after)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "admitted": self._admitted,
+            "rejected": self._rejected
+        }
+
+
+class AdmissionController:
+    """
+    Maps requests to a route class and its limiter.
+    Health and metrics endpoints are never limited.
+    """
+
+    def __init__(self):
+        self.limiters = {
+            route_class: AdmissionLimiter(
+                route_class,
+                max_concurrent=getattr(settings, f"admission_{route_class}_concurrency"),
+                max_queue=getattr(settings, f"admission_{route_class}_queue"),
+                max_wait=getattr(settings, f"admission_{route_class}_max_wait"),
+                retry_after=getattr(settings, f"admission_{route_class}_retry_after")
+            )
+            for route_class in ROUTE_CLASSES
+        }
+
+    def route_class(self, method: str, path: str) -> Optional[str]:
+        if any(fnmatchcase(path, pattern) for pattern in settings.admission_exempt_paths):
+            return None
+        if method != "GET" and any(fnmatchcase(path, pattern) for pattern in settings.admission_llm_paths):
+            return "llm"
+        return "default"
+
+    def limiter(self, method: str, path: str) -> Optional[AdmissionLimiter]:
+        route_class = self.route_class(method, path)
+        return self.limiters[route_class] if route_class else None
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {route_class: limiter.stats() for route_class, limiter in self.limiters.items()}
+
+
+admission_controller = AdmissionController()
@@ -0,0 +1,405 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from app.config import settings
+from app.utils.metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+
+def _encode_key(key: Hashable) -> str:
+    if isinstance(key, tuple):
+        return "|".join(str(part) for part in key)
+    return str(key)
+
+
+class Cache:
+    """
+    Namespaced cache with per-entry expiry, a size bound and hit/miss stats.
+
+    Backend errors are logged and treated as misses, so a broken shared cache
+    only costs upstream calls. Keys may be strings or tuples of strings.
+    """
+
+    backend = "base"
+    errors: Tuple[type, ...] = ()
+
+    def __init__(self, name: str, ttl: float, max_entries: int = 1000):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._stats_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._errors = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        try:
+            value = self._get(_encode_key(key))
+        except self.errors as e:
+            self._error("get", e)
+            value = None
+        with self._stats_lock:
+            if value is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        record_cache_lookup(self.name, value is not None)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        try:
+            self._set(_encode_key(key), value, self.ttl if ttl is None else ttl)
+        except self.errors as e:
+            self._error("set", e)
+
+    def ttl_remaining(self, key: Hashable) -> Optional[float]:
+        """
+        Seconds until the entry expires, or None if it is missing or expired.
+        Does not count as a lookup.
+        """
+        try:
+            remaining = self._ttl_remaining(_encode_key(key))
+        except self.errors as e:
+            self._error("ttl", e)
+            return None
+        return remaining if remaining is not None and remaining > 0 else None
+
+    def delete(self, key: Hashable):
+        try:
+            self._delete(_encode_key(key))
+        except self.errors as e:
+            self._error("delete", e)
+
+    def clear(self):
+        try:
+            self._clear()
+        except self.errors as e:
+            self._error("clear", e)
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            size = self._size()
+        except self.errors as e:
+            self._error("stats", e)
+            size = None
+        with self._stats_lock:
+            return {
+                "backend": self.backend,
+                "size": size,
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "errors": self._errors
+            }
+
+    def _error(self, operation: str, error: Exception):
+        with self._stats_lock:
+            self._errors += 1
+        logger.warning("%s cache %s %s failed: %s", self.backend, self.name, operation, error)
+
+    def _get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def _set(self, key: str, value: Any, ttl: float):
+        raise NotImplementedError
+
+    def _ttl_remaining(self, key: str) -> Optional[float]:
+        raise NotImplementedError
+
+    def _delete(self, key: str):
+        raise NotImplementedError
+
+    def _clear(self):
+        raise NotImplementedError
+
+    def _size(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryCache(Cache):
+    """
+    Thread-safe in-process LRU; each worker process has its own copy
+    """
+
+    backend = "memory"
+
+    def __init__(self, name: str, ttl: float, max_entries: int = 1000):
+        super().__init__(name, ttl, max_entries)
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._evictions = 0
+
+    def _get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def _set(self, key: str, value: Any, ttl: float):
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def _ttl_remaining(self, key: str) -> Optional[float]:
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry[0] - time.monotonic() if entry else None
+
+    def _delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _size(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "evictions": self._evictions}
+
+
+class SQLiteCache(Cache):
+    """
+    Cache in a local SQLite file shared by all worker processes on the host.
+    Values are stored as JSON. When the namespace is over its size bound the
+    entries closest to expiry are dropped, so reads never have to write.
+    """
+
+    backend = "sqlite"
+    errors = (sqlite3.Error, TypeError, ValueError)
+
+    def __init__(self, name: str, ttl: float, max_entries: int = 1000, path: str = "journeo_cache.db"):
+        super().__init__(name, ttl, max_entries)
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        # Trim every few writes rather than counting rows on each one; overshoot stays within ~5%
+        self._trim_every = max(1, min(50, max_entries // 20))
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL NOT NULL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS ix_cache_entries_expiry ON cache_entries (namespace, expires_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            # WAL lets readers in other workers proceed while one writes
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _get(self, key: str) -> Optional[Any]:
+        row = self._connection().execute(
+            "SELECT value FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (self.name, key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _set(self, key: str, value: Any, ttl: float):
+        payload = json.dumps(value, separators=(",", ":"))
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (self.name, key, payload, time.time() + ttl)
+            )
+            self._writes += 1
+            if self._writes % self._trim_every == 0:
+                self._trim(connection)
+
+    def _trim(self, connection: sqlite3.Connection):
+        connection.execute("DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?", (self.name, time.time()))
+        connection.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key IN ("
+            "SELECT key FROM cache_entries WHERE namespace = ? ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.name, self.name, self.max_entries)
+        )
+
+    def _ttl_remaining(self, key: str) -> Optional[float]:
+        row = self._connection().execute(
+            "SELECT expires_at FROM cache_entries WHERE namespace = ? AND key = ?", (self.name, key)
+        ).fetchone()
+        return row[0] - time.time() if row else None
+
+    def _delete(self, key: str):
+        with self._connection() as connection:
+            connection.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.name, key))
+
+    def _clear(self):
+        with self._connection() as connection:
+            connection.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.name,))
+
+    def _size(self) -> int:
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ? AND expires_at > ?", (self.name, time.time())
+        ).fetchone()[0]
+
+
+class RedisCache(Cache):
+    """
+    Cache on any Redis-protocol server, shared across workers and hosts.
+
+    Entries expire through Redis TTLs; a sorted set per namespace, scored by
+    expiry, enforces the size bound. Pass client to use a stand-in such as
+    fakeredis instead of connecting to url.
+    """
+
+    backend = "redis"
+
+    def __init__(self, name: str, ttl: float, max_entries: int = 1000, url: str = "redis://localhost:6379/0", client: Any = None):
+        super().__init__(name, ttl, max_entries)
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requires the redis package (pip install redis)") from e
+        self.errors = (redis.RedisError, TypeError, ValueError)
+        self.client = client if client is not None else redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+        self.prefix = f"{settings.cache_key_prefix}:{name}:"
+        self.index_key = f"{settings.cache_key_prefix}:{name}"
+
+    def _get(self, key: str) -> Optional[Any]:
+        value = self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def _set(self, key: str, value: Any, ttl: float):
+        expires_at = time.time() + ttl
+        pipeline = self.client.pipeline()
+        pipeline.set(self.prefix + key, json.dumps(value, separators=(",", ":")), px=max(1, int(ttl * 1000)))
+        pipeline.zadd(self.index_key, {key: expires_at})
+        pipeline.zremrangebyscore(self.index_key, "-inf", time.time())
+        pipeline.zcard(self.index_key)
+        size = pipeline.execute()[-1]
+        if size > self.max_entries:
+            self._evict(size - self.max_entries)
+
+    def _evict(self, count: int):
+        # Entries closest to expiry go first
+        evicted: List[Tuple[bytes, float]] = self.client.zpopmin(self.index_key, count)
+        if evicted:
+            self.client.delete(*(self.prefix + _decode(member) for member, _ in evicted))
+
+    def _ttl_remaining(self, key: str) -> Optional[float]:
+        milliseconds = self.client.pttl(self.prefix + key)
+        return milliseconds / 1000 if milliseconds is not None and milliseconds >= 0 else None
+
+    def _delete(self, key: str):
+        pipeline = self.client.pipeline()
+        pipeline.delete(self.prefix + key)
+        pipeline.zrem(self.index_key, key)
+        pipeline.execute()
+
+    def _clear(self):
+        members = self.client.zrange(self.index_key, 0, -1)
+        for start in range(0, len(members), 500):
+            self.client.delete(*(self.prefix + _decode(member) for member in members[start:start + 500]))
+        self.client.delete(self.index_key)
+
+    def _size(self) -> int:
+        self.client.zremrangebyscore(self.index_key, "-inf", time.time())
+        return self.client.zcard(self.index_key)
+
+
+def _decode(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time. Callers that arrive while a call
+    for their key is in flight wait for it and share its result or exception,
+    so concurrent cache misses for the same key cost one upstream request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, "_Call"] = {}
+
+    def do(self, key: Hashable, func: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+_caches: Dict[str, Cache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name: str, ttl: float, max_entries: Optional[int] = None) -> Cache:
+    """
+    Cache for a namespace on the backend selected by CACHE_BACKEND.
+    Each namespace is created once per process.
+    """
+    with _caches_lock:
+        cache = _caches.get(name)
+        if cache is not None:
+            return cache
+
+        max_entries = max_entries or settings.cache_max_entries
+        backend = settings.cache_backend.lower()
+        if backend == "memory":
+            cache = MemoryCache(name, ttl, max_entries)
+        elif backend == "sqlite":
+            cache = SQLiteCache(name, ttl, max_entries, path=settings.cache_sqlite_path)
+        elif backend == "redis":
+            cache = RedisCache(name, ttl, max_entries, url=settings.cache_redis_url)
+        else:
+            raise ValueError(f"Unknown CACHE_BACKEND {settings.cache_backend!r}; use memory, sqlite or redis")
+
+        _caches[name] = cache
+        return cache
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    with _caches_lock:
+        caches = list(_caches.values())
+    return {cache.name: cache.stats() for cache in caches}
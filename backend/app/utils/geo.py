@@ -0,0 +1,69 @@
+import math
+from typing import List, Tuple
+
+EARTH_RADIUS_M = 6371008.8
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Great-circle distance in metres
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bbox_around(lat: float, lon: float, radius_m: float) -> Tuple[float, float, float, float]:
+    """
+    (min_lat, max_lat, min_lon, max_lon) of a box containing the circle
+    """
+    dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+    # Longitude degrees shrink towards the poles; clamp to avoid dividing by ~0
+    dlon = math.degrees(radius_m / (EARTH_RADIUS_M * max(0.01, math.cos(math.radians(lat)))))
+    return lat - dlat, lat + dlat, max(-180.0, lon - dlon), min(180.0, lon + dlon)
+
+
+def encode_polyline(coordinates: List[List[float]], precision: int = 5) -> str:
+    """
+    Encoded polyline (Google algorithm) of [lon, lat] pairs, about 1 m resolution at precision 5
+    """
+    factor = 10 ** precision
+    encoded = []
+    previous_lat = previous_lon = 0
+    for point in coordinates:
+        lat, lon = round(point[1] * factor), round(point[0] * factor)
+        for delta in (lat - previous_lat, lon - previous_lon):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                encoded.append(chr((0x20 | (value & 0x1f)) + 63))
+                value >>= 5
+            encoded.append(chr(value + 63))
+        previous_lat, previous_lon = lat, lon
+    return "".join(encoded)
+
+
+def decode_polyline(encoded: str, precision: int = 5) -> List[List[float]]:
+    """
+    [lon, lat] pairs from an encoded polyline
+    """
+    factor = 10 ** precision
+    coordinates = []
+    index = lat = lon = 0
+    while index < len(encoded):
+        deltas = []
+        for _ in range(2):
+            result = shift = 0
+            while True:
+                byte = ord(encoded[index]) - 63
+                index += 1
+                result |= (byte & 0x1f) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lon += deltas[1]
+        coordinates.append([lon / factor, lat / factor])
+    return coordinates
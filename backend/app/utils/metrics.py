@@ -0,0 +1,181 @@
+import functools
+import os
+from typing import Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+
+# Buckets for calls that take milliseconds to seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Buckets for the LLM crew, which takes tens of seconds to minutes
+LLM_BUCKETS = (1.0, 5.0, 10.0, 20.0, 30.0, 45.0, 60.0, 90.0, 120.0, 180.0, 300.0, 600.0)
+
+
+HTTP_REQUEST_DURATION = Histogram(
+    "journeo_http_request_duration_seconds",
+    "Latency of API requests by route template",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS
+)
+
+HTTP_REQUESTS = Counter(
+    "journeo_http_requests_total",
+    "API requests by route template and status code",
+    ["method", "route", "status"]
+)
+
+UPSTREAM_REQUEST_DURATION = Histogram(
+    "journeo_upstream_request_duration_seconds",
+    "Latency of upstream API calls by service method",
+    ["upstream", "operation"],
+    buckets=LATENCY_BUCKETS
+)
+
+UPSTREAM_REQUESTS = Counter(
+    "journeo_upstream_requests_total",
+    "Upstream API calls by service method and outcome",
+    ["upstream", "operation", "status"]
+)
+
+RATE_LIMIT_WAIT = Histogram(
+    "journeo_upstream_rate_limit_wait_seconds",
+    "Time spent waiting for an upstream rate limit slot",
+    ["upstream"],
+    buckets=LATENCY_BUCKETS
+)
+
+RATE_LIMIT_QUEUE_DEPTH = Gauge(
+    "journeo_upstream_rate_limit_queue_depth",
+    "Callers currently waiting for an upstream rate limit slot",
+    ["upstream"]
+)
+
+ADMISSION_WAIT = Histogram(
+    "journeo_admission_wait_seconds",
+    "Time admitted requests waited for a slot, by route class",
+    ["route_class"],
+    buckets=LATENCY_BUCKETS
+)
+
+ADMISSION_IN_FLIGHT = Gauge(
+    "journeo_admission_in_flight",
+    "Requests currently running per route class",
+    ["route_class"]
+)
+
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "journeo_admission_queue_depth",
+    "Requests waiting for a slot per route class",
+    ["route_class"]
+)
+
+ADMISSION_REJECTIONS = Counter(
+    "journeo_admission_rejections_total",
+    "Requests shed with a 503, by route class and reason (queue_full or timeout)",
+    ["route_class", "reason"]
+)
+
+MOCK_FALLBACKS = Counter(
+    "journeo_mock_fallbacks_total",
+    "Responses served from mock data because the upstream failed",
+    ["service", "method"]
+)
+
+LLM_PIPELINE_DURATION = Histogram(
+    "journeo_llm_pipeline_duration_seconds",
+    "Wall time of the itinerary generation crew",
+    ["outcome"],
+    buckets=LLM_BUCKETS
+)
+
+LLM_TOKENS = Counter(
+    "journeo_llm_tokens_total",
+    "LLM tokens used per crew stage, reported by crewai or estimated",
+    ["stage", "kind"]
+)
+
+LLM_STAGE_RUNS = Counter(
+    "journeo_llm_stage_runs_total",
+    "Crew stages by where their output came from (run, cache, stored)",
+    ["stage", "source"]
+)
+
+PIPELINE_STAGE_DURATION = Histogram(
+    "journeo_pipeline_stage_duration_seconds",
+    "Wall time of each stage of a multi-step request pipeline",
+    ["pipeline", "stage"],
+    buckets=LATENCY_BUCKETS + LLM_BUCKETS[9:]
+)
+
+WARMUP_RUNS = Counter(
+    "journeo_warmup_runs_total",
+    "Background cache warmup runs by outcome",
+    ["outcome"]
+)
+
+WARMUP_REFRESHES = Counter(
+    "journeo_warmup_refreshes_total",
+    "Cache entries refreshed by the warmup scheduler",
+    ["kind", "outcome"]
+)
+
+WARMUP_DURATION = Histogram(
+    "journeo_warmup_duration_seconds",
+    "Wall time of a background cache warmup run",
+    buckets=LATENCY_BUCKETS
+)
+
+WARMUP_LAST_SUCCESS = Gauge(
+    "journeo_warmup_last_success_timestamp_seconds",
+    "Unix time of the last warmup run without failures"
+)
+
+CACHE_REQUESTS = Counter(
+    "journeo_cache_requests_total",
+    "Cache lookups by cache name and result (hit or miss)",
+    ["cache", "result"]
+)
+
+
+def track_fallback(service: str):
+    """
+    Decorator for _get_mock_* methods that counts every mock fallback
+    """
+    def decorator(func):
+        counter = MOCK_FALLBACKS.labels(service, func.__name__)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            counter.inc()
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Render all metrics in the Prometheus text format.
+    Aggregates across worker processes when PROMETHEUS_MULTIPROC_DIR is set.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
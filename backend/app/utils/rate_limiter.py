@@ -0,0 +1,246 @@
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+
+import requests
+from app.config import settings
+from app.utils.metrics import (
+    RATE_LIMIT_QUEUE_DEPTH,
+    RATE_LIMIT_WAIT,
+    UPSTREAM_REQUEST_DURATION,
+    UPSTREAM_REQUESTS,
+)
+
+
+# Lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+UPSTREAMS = ("openweather", "exchangerate", "libretranslate", "openroute", "overpass", "groq")
+
+_current_priority: ContextVar[int] = ContextVar("upstream_priority", default=PRIORITY_INTERACTIVE)
+
+
+class RateLimitExceeded(requests.RequestException):
+    """
+    Raised when no upstream slot became available within the allowed wait.
+    Subclasses RequestException so services fall back the same way they do
+    for any other upstream failure.
+    """
+
+
+@contextmanager
+def upstream_priority(priority: int):
+    """
+    Run the enclosed upstream calls at the given priority
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class TokenBucket:
+    """
+    Token bucket with a priority-ordered wait queue.
+
+    Callers queue in (priority, arrival) order and only the head of the queue
+    may take tokens, so interactive requests overtake queued background work.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int, max_wait: float):
+        self.name = name
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_wait = max_wait
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._cond = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+        self._acquired = 0
+        self._rejected = 0
+        self._throttled = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_histogram = RATE_LIMIT_WAIT.labels(name)
+        RATE_LIMIT_QUEUE_DEPTH.labels(name).set_function(lambda: len(self._queue))
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+
+    def acquire(self, cost: float = 1.0, priority: Optional[int] = None, timeout: Optional[float] = None) -> float:
+        """
+        Block until `cost` tokens are available and return the time waited.
+        Raises RateLimitExceeded if the slot does not open within `timeout`.
+        """
+        if self.rate <= 0:
+            return 0.0
+
+        cost = min(cost, self.burst)
+        priority = _current_priority.get() if priority is None else priority
+        timeout = self.max_wait if timeout is None else timeout
+
+        start = time.monotonic()
+        deadline = start + timeout
+        entry = (priority, next(self._seq))
+
+        with self._cond:
+            heapq.heappush(self._queue, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+
+                    if self._queue[0] == entry and now >= self._blocked_until and self._tokens >= cost:
+                        heapq.heappop(self._queue)
+                        self._tokens -= cost
+                        waited = now - start
+                        self._acquired += 1
+                        self._wait_total += waited
+                        self._wait_max = max(self._wait_max, waited)
+                        self._wait_histogram.observe(waited)
+                        self._cond.notify_all()
+                        return waited
+
+                    if self._queue[0] == entry:
+                        ready_at = max(self._blocked_until, now + (cost - self._tokens) / self.rate)
+                    else:
+                        # Not at the head; wake up when the queue moves
+                        ready_at = deadline
+
+                    if ready_at > deadline or now >= deadline:
+                        self._queue.remove(entry)
+                        heapq.heapify(self._queue)
+                        self._rejected += 1
+                        self._cond.notify_all()
+                        raise RateLimitExceeded(
+                            f"No {self.name} slot available within {timeout:.2f}s"
+                        )
+
+                    self._cond.wait(ready_at - now)
+            except BaseException:
+                if entry in self._queue:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    self._cond.notify_all()
+                raise
+
+    def penalize(self, delay: float):
+        """
+        Hold back all callers for `delay` seconds after the upstream answered 429
+        """
+        with self._cond:
+            self._throttled += 1
+            self._tokens = 0.0
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                "available_tokens": round(self._tokens, 3),
+                "queue_depth": len(self._queue),
+                "acquired": self._acquired,
+                "rejected": self._rejected,
+                "throttled": self._throttled,
+                "avg_wait": self._wait_total / self._acquired if self._acquired else 0.0,
+                "max_wait": self._wait_max
+            }
+
+
+class UpstreamScheduler:
+    """
+    Per-upstream token buckets configured from Settings
+    """
+
+    def __init__(self):
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, upstream: str) -> TokenBucket:
+        with self._lock:
+            if upstream not in self._buckets:
+                self._buckets[upstream] = TokenBucket(
+                    upstream,
+                    rate=getattr(settings, f"{upstream}_rate_limit", 0.0),
+                    burst=getattr(settings, f"{upstream}_rate_burst", 1),
+                    max_wait=getattr(settings, f"{upstream}_max_wait", settings.upstream_max_wait)
+                )
+            return self._buckets[upstream]
+
+    def acquire(self, upstream: str, cost: float = 1.0, priority: Optional[int] = None) -> float:
+        return self.bucket(upstream).acquire(cost, priority)
+
+    def request(self, upstream: str, method: str, url: str, operation: str = "unknown",
+                priority: Optional[int] = None, **kwargs) -> requests.Response:
+        """
+        Issue an HTTP request once the upstream has a free slot.
+        A 429 answer pauses the bucket for Retry-After and is retried once.
+        `operation` names the calling service method in metrics.
+        """
+        bucket = self.bucket(upstream)
+
+        response = self._send(bucket, operation, priority, method, url, **kwargs)
+
+        if response.status_code == 429:
+            delay = _parse_retry_after(response.headers.get("Retry-After"))
+            bucket.penalize(delay)
+            if delay <= bucket.max_wait:
+                response = self._send(bucket, operation, priority, method, url, **kwargs)
+
+        return response
+
+    def _send(self, bucket: TokenBucket, operation: str, priority: Optional[int],
+              method: str, url: str, **kwargs) -> requests.Response:
+        try:
+            bucket.acquire(priority=priority)
+        except RateLimitExceeded:
+            UPSTREAM_REQUESTS.labels(bucket.name, operation, "rate_limited").inc()
+            raise
+
+        start = time.perf_counter()
+        try:
+            response = requests.request(method, url, **kwargs)
+        except requests.RequestException:
+            UPSTREAM_REQUESTS.labels(bucket.name, operation, "error").inc()
+            raise
+        finally:
+            UPSTREAM_REQUEST_DURATION.labels(bucket.name, operation).observe(time.perf_counter() - start)
+
+        UPSTREAM_REQUESTS.labels(bucket.name, operation, str(response.status_code)).inc()
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: self.bucket(name).stats() for name in UPSTREAMS}
+
+
+def _parse_retry_after(value: Optional[str], default: float = 1.0) -> float:
+    """
+    Parse a Retry-After header given either in seconds or as an HTTP date
+    """
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+upstream_scheduler = UpstreamScheduler()
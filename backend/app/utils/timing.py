@@ -0,0 +1,56 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Any
+
+from app.utils.metrics import PIPELINE_STAGE_DURATION
+
+
+class StageTimer:
+    """
+    Wall-clock timings for the named stages of a request pipeline
+    """
+
+    def __init__(self, pipeline: str):
+        self.pipeline = pipeline
+        self.stages: Dict[str, float] = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+            PIPELINE_STAGE_DURATION.labels(self.pipeline, name).observe(elapsed)
+
+    @property
+    def total(self) -> float:
+        return time.perf_counter() - self._start
+
+    def as_dict(self) -> Dict[str, float]:
+        """
+        Stage durations in milliseconds, including the running total
+        """
+        timings = {name: round(seconds * 1000, 1) for name, seconds in self.stages.items()}
+        timings["total"] = round(self.total * 1000, 1)
+        return timings
+
+    def server_timing_header(self) -> str:
+        """
+        Format the stages as a Server-Timing header value
+        """
+        return ", ".join(f"{name};dur={ms}" for name, ms in self.as_dict().items())
+
+    def log(self, logger: logging.Logger, **context: Any):
+        """
+        Emit the timings as a single JSON log line
+        """
+        logger.info(json.dumps({
+            "event": f"{self.pipeline}.timings",
+            **context,
+            "timings_ms": self.as_dict()
+        }, default=str))
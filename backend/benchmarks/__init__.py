@@ -0,0 +1 @@
+# Offline benchmark suite
\ No newline at end of file
@@ -0,0 +1,110 @@
+"""
+Import-time and startup profile of the API.
+
+Runs `python -X importtime -c "import app.main"` in a clean interpreter,
+reports the slowest modules, and times the FastAPI lifespan startup.
+
+    python -m benchmarks.import_profile --top 20
+    python -m benchmarks.import_profile --max-import-ms 1500 --json import.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+STARTUP_SCRIPT = """
+import asyncio, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def boot():
+    async with app.router.lifespan_context(app):
+        pass
+
+asyncio.run(boot())
+print(f"{(imported - start) * 1000:.1f} {(time.perf_counter() - imported) * 1000:.1f}")
+"""
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='journeo-import-')}/profile.db")
+    return env
+
+
+def profile_imports() -> List[Dict[str, Any]]:
+    """
+    Parse -X importtime output into rows of (module, self_ms, cumulative_ms)
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=_env(), capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|", 2)
+        rows.append({
+            "module": module.strip(),
+            "depth": (len(module) - len(module.lstrip())) // 2,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000
+        })
+    return rows
+
+
+def profile_startup() -> Dict[str, float]:
+    completed = subprocess.run(
+        [sys.executable, "-c", STARTUP_SCRIPT],
+        cwd=BACKEND_DIR, env=_env(), capture_output=True, text=True, check=True
+    )
+    import_ms, lifespan_ms = completed.stdout.split()[-2:]
+    return {"import_ms": float(import_ms), "lifespan_ms": float(lifespan_ms)}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Profile API import and startup time")
+    parser.add_argument("--top", type=int, default=20, help="Number of modules to list")
+    parser.add_argument("--json", dest="json_path", help="Write the report to this file")
+    parser.add_argument("--max-import-ms", type=float, help="Fail if importing app.main takes longer")
+    args = parser.parse_args(argv)
+
+    rows = profile_imports()
+    startup = profile_startup()
+
+    # Top-level packages are the ones a change can actually move
+    top_level = sorted((row for row in rows if row["depth"] <= 1), key=lambda row: -row["cumulative_ms"])
+    total_ms = sum(row["cumulative_ms"] for row in rows if row["depth"] == 0)
+
+    print(f"{'cumulative ms':>14}{'self ms':>10}  module")
+    for row in top_level[:args.top]:
+        print(f"{row['cumulative_ms']:>14.1f}{row['self_ms']:>10.1f}  {row['module']}")
+    print(f"\nimport app.main: {startup['import_ms']:.1f} ms (importtime total {total_ms:.1f} ms)")
+    print(f"lifespan startup: {startup['lifespan_ms']:.1f} ms")
+
+    heavy = [name for name in ("crewai", "groq") if any(row["module"] == name for row in rows)]
+    if heavy:
+        print(f"warning: {', '.join(heavy)} imported eagerly")
+
+    if args.json_path:
+        with open(args.json_path, "w") as handle:
+            json.dump({"startup": startup, "modules": top_level[:args.top]}, handle, indent=2)
+
+    if args.max_import_ms is not None and startup["import_ms"] > args.max_import_ms:
+        print(f"import time {startup['import_ms']:.1f} ms exceeds {args.max_import_ms:.1f} ms")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""
+Load driver for the offline benchmark suite.
+
+Starts the stub upstreams, boots the API under uvicorn pointed at them and
+measures throughput and latency percentiles per endpoint.
+
+    python -m benchmarks.run --requests 200 --concurrency 8 --json results.json
+    python -m benchmarks.run --baseline results.json --max-regression 0.25
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from benchmarks.stubs import HANDLERS, StubConfig, start_stubs, stub_environment
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str
+    body: Optional[Dict[str, Any]] = None
+    requests: Optional[int] = None  # Overrides --requests for slow endpoints
+
+
+SCENARIOS = [
+    Scenario("health", "GET", "/health"),
+    Scenario("weather", "GET", "/api/weather/Paris"),
+    Scenario("forecast", "GET", "/api/weather/Paris/forecast"),
+    Scenario("forecast_columnar", "GET", "/api/weather/Paris/forecast?format=columnar"),
+    Scenario("weather_batch", "POST", "/api/weather/batch", {
+        "cities": ["Paris", "London", "Rome", "Berlin", "Madrid", "Lisbon", "Vienna", "Prague", "Dublin", "Oslo"],
+        "include": ["current", "forecast"]
+    }),
+    Scenario("currency_rates", "GET", "/api/currency/rates?base_currency=USD"),
+    Scenario("currency_convert", "GET", "/api/currency/convert?from_currency=USD&to_currency=EUR&amount=10"),
+    Scenario("translate", "POST", "/api/translate/", {"text": "Welcome to your trip", "target_language": "fr"}),
+    Scenario("route", "GET", "/api/routes/?start=Louvre&end=Eiffel%20Tower&mode=walking"),
+    Scenario("accommodations", "GET", "/api/accommodations/Paris?limit=20"),
+    Scenario("plan_trip", "POST", "/api/trips/plan", {
+        "source": "London",
+        "destination": "Paris",
+        "start_date": "2030-06-01T00:00:00",
+        "end_date": "2030-06-04T00:00:00",
+        "budget": 1500,
+        "travel_type": "culture",
+        "language": "fr"
+    }, requests=20),
+]
+
+
+@dataclass
+class Result:
+    name: str
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0.0
+
+    def percentile(self, pct: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+        return ordered[index]
+
+    def summary(self) -> Dict[str, Any]:
+        count = len(self.latencies)
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "throughput_rps": round(count / self.elapsed, 2) if self.elapsed else 0.0,
+            "mean_ms": round(sum(self.latencies) / count * 1000, 2) if count else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p99_ms": round(self.percentile(99) * 1000, 2)
+        }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_api(env: Dict[str, str], workers: int) -> Tuple[subprocess.Popen, str]:
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API exited with code {process.returncode}")
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).ok:
+                return process, base_url
+        except requests.RequestException:
+            time.sleep(0.2)
+
+    process.terminate()
+    raise RuntimeError("API did not become healthy within 60s")
+
+
+def run_scenario(base_url: str, scenario: Scenario, total: int, concurrency: int) -> Result:
+    result = Result(scenario.name)
+    local = threading.local()
+    lock = threading.Lock()
+
+    def one(_):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            response = session.request(scenario.method, base_url + scenario.path, json=scenario.body, timeout=300)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            result.latencies.append(elapsed)
+            if not ok:
+                result.errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def count_mock_fallbacks(base_url: str) -> int:
+    """
+    Sum journeo_mock_fallbacks_total so silent fallbacks show up in the report
+    """
+    try:
+        text = requests.get(f"{base_url}/metrics", timeout=5).text
+    except requests.RequestException:
+        return -1
+    total = 0.0
+    for line in text.splitlines():
+        if line.startswith("journeo_mock_fallbacks_total{"):
+            total += float(line.rsplit(" ", 1)[1])
+    return int(total)
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], max_regression: float) -> List[str]:
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric in ("p50_ms", "p99_ms"):
+            if previous[metric] and current[metric] > previous[metric] * (1 + max_regression):
+                regressions.append(
+                    f"{name} {metric}: {previous[metric]:.1f} -> {current[metric]:.1f} ms"
+                )
+    return regressions
+
+
+def print_table(results: Dict[str, Dict[str, Any]]):
+    header = f"{'endpoint':<18}{'requests':>9}{'errors':>8}{'rps':>10}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, row in results.items():
+        print(f"{name:<18}{row['requests']:>9}{row['errors']:>8}{row['throughput_rps']:>10}"
+              f"{row['mean_ms']:>10}{row['p50_ms']:>10}{row['p99_ms']:>10}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline Journeo API benchmarks")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--cache-backend", choices=("memory", "sqlite", "redis"), default="memory",
+                        help="Cache backend; sqlite or redis share entries between workers")
+    parser.add_argument("--scenario", action="append", help="Only run the named scenario(s)")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Stub upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--forecast-slots", type=int, default=40)
+    parser.add_argument("--rate-count", type=int, default=160)
+    parser.add_argument("--route-points", type=int, default=500)
+    parser.add_argument("--overpass-elements", type=int, default=200)
+    parser.add_argument("--completion-words", type=int, default=400)
+    parser.add_argument("--json", dest="json_path", help="Write results to this file")
+    parser.add_argument("--baseline", help="Fail if p50/p99 regress against this results file")
+    parser.add_argument("--max-regression", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        forecast_slots=args.forecast_slots,
+        rate_count=args.rate_count,
+        route_points=args.route_points,
+        overpass_elements=args.overpass_elements,
+        completion_words=args.completion_words
+    )
+    stubs = start_stubs(config)
+
+    workdir = tempfile.mkdtemp(prefix="journeo-bench-")
+    env = dict(os.environ)
+    env.update(stub_environment(stubs))
+    env["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+    env["LOG_LEVEL"] = "WARNING"
+    env["CACHE_BACKEND"] = args.cache_backend
+    env["CACHE_SQLITE_PATH"] = f"{workdir}/cache.db"
+    # Background warmup would add upstream calls the scenarios did not make
+    env["WARMUP_ENABLED"] = "false"
+    # Measure the API itself, not the client-side rate limits
+    for upstream in HANDLERS:
+        env[f"{upstream.upper()}_RATE_LIMIT"] = "0"
+
+    process, base_url = start_api(env, args.workers)
+    try:
+        results = {}
+        for scenario in SCENARIOS:
+            if args.scenario and scenario.name not in args.scenario:
+                continue
+            total = scenario.requests or args.requests
+            results[scenario.name] = run_scenario(base_url, scenario, total, args.concurrency).summary()
+        fallbacks = count_mock_fallbacks(base_url)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        for stub in stubs.values():
+            stub.stop()
+
+    print_table(results)
+    print(f"\nmock fallbacks: {fallbacks}")
+    print("upstream calls: " + ", ".join(f"{name}={stub.requests}" for name, stub in stubs.items()))
+
+    if args.json_path:
+        with open(args.json_path, "w") as handle:
+            json.dump({"config": vars(config), "results": results}, handle, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)["results"]
+        regressions = compare(results, baseline, args.max_regression)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
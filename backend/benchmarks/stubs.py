@@ -0,0 +1,336 @@
+"""
+Local stub servers for every upstream API the backend talks to.
+
+Each stub answers with payloads shaped like the real provider's, after a
+configurable latency, so benchmarks run offline and deterministically.
+"""
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 50.0  # Mean added latency per response
+    jitter_ms: float = 10.0  # Uniform jitter around the mean
+    forecast_slots: int = 40  # OpenWeather forecast entries
+    rate_count: int = 160  # exchangerate.host currencies per table
+    route_points: int = 500  # ORS geometry coordinates per route
+    route_steps: int = 20  # ORS instructions per route
+    overpass_elements: int = 200  # Overpass accommodation nodes
+    completion_words: int = 400  # Groq completion length
+
+
+# A handler gets (method, path, query, body) and returns (status, payload)
+Handler = Callable[[str, str, Dict[str, List[str]], bytes], Tuple[int, Any]]
+
+
+class StubServer:
+    """
+    A threaded HTTP server on 127.0.0.1 that dispatches to a handler
+    """
+
+    def __init__(self, name: str, handler: Handler, config: StubConfig, port: int = 0):
+        self.name = name
+        self.handler = handler
+        self.config = config
+        self.requests = 0
+        stub = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _dispatch(self):
+                stub.requests += 1
+                parsed = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+
+                delay = stub.config.latency_ms + random.uniform(-stub.config.jitter_ms, stub.config.jitter_ms)
+                if delay > 0:
+                    time.sleep(delay / 1000)
+
+                status, payload = stub.handler(self.command, parsed.path, parse_qs(parsed.query), body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = _dispatch
+            do_POST = _dispatch
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), RequestHandler)
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.server.serve_forever, name=f"stub-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _query_value(query: Dict[str, List[str]], key: str, default: str = "") -> str:
+    return query.get(key, [default])[0]
+
+
+def _json_body(body: bytes) -> Dict[str, Any]:
+    try:
+        return json.loads(body or b"{}")
+    except ValueError:
+        return {}
+
+
+def openweather_handler(config: StubConfig) -> Handler:
+    def current(city: str, city_id: int) -> Dict[str, Any]:
+        return {
+            "id": city_id,
+            "name": city,
+            "sys": {"country": "XX", "sunrise": 1700000000, "sunset": 1700040000},
+            "main": {"temp": 18.5, "feels_like": 17.9, "humidity": 60, "pressure": 1012},
+            "weather": [{"description": "scattered clouds", "icon": "03d"}],
+            "wind": {"speed": 3.4, "deg": 200},
+            "visibility": 10000
+        }
+
+    def handle(method, path, query, body):
+        city = _query_value(query, "q", "Stubville").split(",")[0]
+        city_id = zlib.crc32(city.encode()) % 10_000_000
+
+        if path.endswith("/weather"):
+            return 200, current(city, city_id)
+
+        if path.endswith("/group"):
+            ids = [int(i) for i in _query_value(query, "id").split(",") if i]
+            return 200, {"cnt": len(ids), "list": [current(f"City {i}", i) for i in ids]}
+
+        if path.endswith("/forecast"):
+            start = int(time.time()) // 10800 * 10800
+            slots = [{
+                "dt": start + i * 10800,
+                "main": {"temp": 15 + (i % 8), "feels_like": 14 + (i % 8), "humidity": 55 + (i % 30)},
+                "weather": [{"description": "light rain" if i % 5 == 0 else "clear sky",
+                             "icon": "10d" if i % 5 == 0 else "01d"}],
+                "wind": {"speed": 2.0 + (i % 4)},
+                "pop": (i % 10) / 10
+            } for i in range(config.forecast_slots)]
+            return 200, {
+                "city": {"id": city_id, "name": city, "country": "XX", "timezone": 3600},
+                "list": slots
+            }
+
+        return 404, {"message": "not found"}
+
+    return handle
+
+
+def exchangerate_handler(config: StubConfig) -> Handler:
+    codes = [f"C{i:02d}" for i in range(max(0, config.rate_count - 10))]
+    codes = ["USD", "EUR", "GBP", "JPY", "CAD", "AUD", "CHF", "CNY", "INR", "BRL"] + codes
+    codes = codes[:config.rate_count]
+
+    def handle(method, path, query, body):
+        rates = {code: round(0.5 + (i % 50) / 10, 4) for i, code in enumerate(codes)}
+
+        if path == "/convert":
+            amount = float(_query_value(query, "amount", "1"))
+            rate = rates.get(_query_value(query, "to").upper(), 1.0)
+            return 200, {"result": amount * rate, "info": {"rate": rate, "timestamp": int(time.time())}}
+
+        if path == "/symbols":
+            return 200, {"symbols": {code: {"description": code, "code": code} for code in codes}}
+
+        if path == "/latest" or re.fullmatch(r"/\d{4}-\d{2}-\d{2}", path):
+            return 200, {
+                "base": _query_value(query, "base", "USD"),
+                "date": time.strftime("%Y-%m-%d"),
+                "rates": rates,
+                "timestamp": int(time.time())
+            }
+
+        return 404, {"error": "not found"}
+
+    return handle
+
+
+def libretranslate_handler(config: StubConfig) -> Handler:
+    def handle(method, path, query, body):
+        payload = _json_body(body)
+
+        if path.endswith("/translate"):
+            response = {"translatedText": f"[{payload.get('target', '?')}] {payload.get('q', '')}"}
+            # Like LibreTranslate, only report a detected language when asked to detect
+            if payload.get("source", "auto") == "auto":
+                response["detectedLanguage"] = {"language": "en", "confidence": 90}
+            return 200, response
+
+        if path.endswith("/detect"):
+            return 200, [{"language": "en", "confidence": 90.0}]
+
+        if path.endswith("/languages"):
+            return 200, [{"code": code, "name": code.upper()} for code in ("en", "es", "fr", "de", "it", "pt")]
+
+        return 404, {"error": "not found"}
+
+    return handle
+
+
+def openroute_handler(config: StubConfig) -> Handler:
+    def handle(method, path, query, body):
+        if path.endswith("/geocode/search"):
+            seed = zlib.crc32(_query_value(query, "text").encode()) % 1000
+            return 200, {"features": [{"geometry": {"coordinates": [2.2 + seed / 10000, 48.8 + seed / 10000]}}]}
+
+        if "/matrix/" in path:
+            locations = _json_body(body).get("locations", [])
+            distances = [[
+                round(((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2) ** 0.5 * 111000 * 1.3, 1) for b in locations
+            ] for a in locations]
+            durations = [[round(distance / 10, 1) for distance in row] for row in distances]
+            return 200, {"distances": distances, "durations": durations}
+
+        if "/directions/" in path:
+            payload = _json_body(body)
+            coords = payload.get("coordinates", [[0, 0], [1, 1]])
+            legs = max(1, len(coords) - 1)
+            points = [[coords[0][0] + i * 1e-4, coords[0][1] + i * 1e-4] for i in range(config.route_points)]
+            steps = [{
+                "instruction": f"Continue on street {i}",
+                "distance": 100.0 + i,
+                "duration": 30.0 + i,
+                "type": i % 12
+            } for i in range(config.route_steps)]
+            segments = [{"distance": 5000.0, "duration": 600.0, "steps": steps} for _ in range(legs)]
+            return 200, {"features": [{
+                "geometry": {"type": "LineString", "coordinates": points},
+                "properties": {
+                    "segments": segments,
+                    "way_points": [round(i * (config.route_points - 1) / legs) for i in range(legs + 1)],
+                    "summary": {"distance": 5000.0 * legs, "duration": 600.0 * legs}
+                }
+            }]}
+
+        return 404, {"error": "not found"}
+
+    return handle
+
+
+def overpass_handler(config: StubConfig) -> Handler:
+    def handle(method, path, query, body):
+        kinds = ("hotel", "guest_house", "hostel")
+        elements = [{
+            "type": "node",
+            "id": 1000 + i,
+            "lat": 48.85 + (i % 100) * 1e-3,
+            "lon": 2.35 + (i // 100) * 1e-3,
+            "tags": {
+                "tourism": kinds[i % 3],
+                "name": f"Stub Hotel {i}",
+                "addr:street": "Rue de Stub",
+                "addr:housenumber": str(i),
+                "addr:city": "Stubville",
+                "internet_access": "wlan",
+                "stars": str(i % 5 + 1)
+            }
+        } for i in range(config.overpass_elements)]
+        # Lookups by id, e.g. "node(1005);"
+        match = re.search(r"\b(node|way|relation)\((\d+)\)", body.decode(errors="ignore"))
+        if match:
+            elements = [element for element in elements if element["id"] == int(match.group(2))]
+        return 200, {"elements": elements}
+
+    return handle
+
+
+def groq_handler(config: StubConfig) -> Handler:
+    def handle(method, path, query, body):
+        if path.endswith("/chat/completions"):
+            payload = _json_body(body)
+            words = " ".join(f"word{i}" for i in range(config.completion_words))
+            return 200, {
+                "id": "stub-completion",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": f"**Day 1:**\n- {words}"},
+                    "finish_reason": "stop"
+                }],
+                "usage": {
+                    "prompt_tokens": 500,
+                    "completion_tokens": config.completion_words,
+                    "total_tokens": 500 + config.completion_words
+                }
+            }
+
+        return 404, {"error": "not found"}
+
+    return handle
+
+
+HANDLERS = {
+    "openweather": openweather_handler,
+    "exchangerate": exchangerate_handler,
+    "libretranslate": libretranslate_handler,
+    "openroute": openroute_handler,
+    "overpass": overpass_handler,
+    "groq": groq_handler,
+}
+
+
+def start_stubs(config: Optional[StubConfig] = None) -> Dict[str, StubServer]:
+    """
+    Start one stub server per upstream on free local ports
+    """
+    config = config or StubConfig()
+    return {name: StubServer(name, factory(config), config).start() for name, factory in HANDLERS.items()}
+
+
+def stub_environment(stubs: Dict[str, StubServer]) -> Dict[str, str]:
+    """
+    Settings overrides that point the backend at the stub servers
+    """
+    return {
+        "OPENWEATHER_API_URL": f"{stubs['openweather'].url}/data/2.5",
+        "OPENWEATHER_API_KEY": "stub",
+        "EXCHANGERATE_API_URL": stubs["exchangerate"].url,
+        "LIBRETRANSLATE_API_URL": f"{stubs['libretranslate'].url}/translate",
+        "OPENROUTE_API_URL": stubs["openroute"].url,
+        "OPENROUTE_API_KEY": "stub",
+        "OVERPASS_API_URL": f"{stubs['overpass'].url}/api/interpreter",
+        "GROQ_API_URL": stubs["groq"].url,
+        "GROQ_API_KEY": "stub",
+    }
+
+
+if __name__ == "__main__":
+    servers = start_stubs()
+    for key, value in stub_environment(servers).items():
+        print(f"{key}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for server in servers.values():
+            server.stop()
@@ -0,0 +1,85 @@
+"""
+Build the character trigram profiles used by the local language detector.
+
+By default the profiles come from the wordfreq word frequency lists (built
+from Wikipedia, subtitles, news and web text), for every language LibreTranslate
+translates that is not already identified by its script. wordfreq is only
+needed to rebuild the profiles:
+
+    pip install wordfreq
+    python -m scripts.build_language_profiles
+    python -m scripts.build_language_profiles --words 100000 --top 3000
+
+Alternatively read one UTF-8 text file per language from a corpus directory,
+named by language code (en.txt, fr.txt, ...); any plain text in the language
+works, the more the better:
+
+    python -m scripts.build_language_profiles --corpus ~/corpora
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.services.language_detector import NGRAM_SIZE, PROFILES_PATH, build_profile, build_profile_from_frequencies
+
+
+# LibreTranslate languages that share a script with others; el, he, ja, ko, th
+# and zh are detected by script and need no profile
+LANGUAGES = (
+    "ar", "bg", "bn", "ca", "cs", "da", "de", "en", "es", "fa", "fi", "fr", "hi", "hu", "id", "it",
+    "lt", "lv", "ms", "nb", "nl", "pl", "pt", "ro", "ru", "sk", "sl", "sv", "tl", "tr", "uk", "ur",
+)
+# LibreTranslate code -> wordfreq code where they differ
+WORDFREQ_CODES = {"tl": "fil"}
+
+
+def from_wordfreq(languages: List[str], words: int, top: int) -> Dict[str, Dict[str, object]]:
+    try:
+        import wordfreq
+    except ImportError as e:
+        raise RuntimeError("Building profiles from word lists requires wordfreq (pip install wordfreq)") from e
+
+    profiles = {}
+    for language in languages:
+        code = WORDFREQ_CODES.get(language, language)
+        frequencies = wordfreq.get_frequency_dict(code)
+        ranked = wordfreq.top_n_list(code, words)
+        profiles[language] = build_profile_from_frequencies(((word, frequencies[word]) for word in ranked), top)
+    return profiles
+
+
+def from_corpus(corpus: Path, top: int) -> Dict[str, Dict[str, object]]:
+    return {
+        path.stem: build_profile([path.read_text(encoding="utf-8")], top)
+        for path in sorted(corpus.glob("*.txt"))
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build language detection profiles")
+    parser.add_argument("--corpus", type=Path, help="Directory of <language>.txt files instead of wordfreq")
+    parser.add_argument("--languages", nargs="+", default=list(LANGUAGES), help="Languages to build from wordfreq")
+    parser.add_argument("--words", type=int, default=50000, help="Most frequent words read per language")
+    parser.add_argument("--output", type=Path, default=PROFILES_PATH)
+    parser.add_argument("--top", type=int, default=2000, help="N-grams kept per language")
+    args = parser.parse_args(argv)
+
+    languages = from_corpus(args.corpus, args.top) if args.corpus else from_wordfreq(args.languages, args.words, args.top)
+    for language, profile in languages.items():
+        print(f"{language}: kept {len(profile['counts'])} n-grams")
+
+    if not languages:
+        print(f"no corpus files found in {args.corpus}")
+        return 1
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump({"ngram_size": NGRAM_SIZE, "languages": languages}, handle, ensure_ascii=False, separators=(",", ":"))
+    print(f"wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
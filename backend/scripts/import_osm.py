@@ -0,0 +1,188 @@
+"""
+Import hotels, guest houses and hostels from an OpenStreetMap XML extract
+into the local accommodation index used by AccommodationService.
+
+Accepts .osm, .osm.bz2 and .osm.gz files (e.g. from download.geofabrik.de;
+convert .pbf first with `osmium cat extract.osm.pbf -o extract.osm.bz2`).
+City, town and village nodes are imported too so city searches work offline.
+
+    python -m scripts.import_osm france-latest.osm.bz2
+    python -m scripts.import_osm extract.osm.gz --output ./journeo_osm.db --append
+
+The file is streamed with iterparse, so memory grows with the number of
+matching features, not the size of the extract:
+  1. tagged nodes, tagged ways (node refs) and tagged relations (member refs)
+  2. node refs of ways that are members of tagged relations, if any
+  3. coordinates of every node referenced above
+Ways and relations are stored at the centroid of their nodes. The extract's
+<bounds> are recorded so searches outside it still go to Overpass.
+"""
+import argparse
+import bz2
+import gzip
+import os
+import sqlite3
+import sys
+import time
+import xml.etree.ElementTree as ElementTree
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.services.osm_index import ACCOMMODATION_TYPES, SETTLEMENT_RADIUS, create_schema, insert_places
+
+BATCH_SIZE = 5000
+
+
+def open_extract(path: str):
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def iter_elements(path: str, tags: Tuple[str, ...]) -> Iterator[ElementTree.Element]:
+    """
+    Stream top-level OSM elements of the given kinds, freeing each one after use.
+    The <osm> root is cleared too, otherwise every parsed element stays attached
+    to it and memory grows with the size of the extract.
+    """
+    with open_extract(path) as handle:
+        root = None
+        depth = 0
+        for event, element in ElementTree.iterparse(handle, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = element
+                depth += 1
+                continue
+            depth -= 1
+            # Only direct children of <osm>; <tag>, <nd> and <member> are read through their parent
+            if depth != 1:
+                continue
+            if element.tag in tags:
+                yield element
+            if element.tag in ("node", "way", "relation"):
+                root.clear()
+
+
+def _tags(element: ElementTree.Element) -> Dict[str, str]:
+    return {tag.get("k"): tag.get("v") for tag in element.iter("tag")}
+
+
+def _population(tags: Dict[str, str]) -> Optional[int]:
+    try:
+        return int(tags.get("population", "").replace(",", "").replace(" ", ""))
+    except ValueError:
+        return None
+
+
+def import_extract(path: str, output: str, append: bool = False) -> Dict[str, int]:
+    start = time.perf_counter()
+    if not append and os.path.exists(output):
+        os.remove(output)
+
+    places: List[Tuple[str, int, str, float, float, Dict[str, str]]] = []
+    settlements: List[Tuple[str, str, Optional[int], float, float]] = []
+    ways: Dict[int, Tuple[List[int], Dict[str, str]]] = {}
+    relations: Dict[int, Tuple[List[int], Dict[str, str]]] = {}
+    bounds: Optional[Tuple[float, float, float, float]] = None
+
+    # Pass 1: tagged features
+    for element in iter_elements(path, ("bounds", "node", "way", "relation")):
+        if element.tag == "bounds":
+            bounds = tuple(float(element.get(key)) for key in ("minlat", "maxlat", "minlon", "maxlon"))
+            continue
+        tags = _tags(element)
+        tourism = tags.get("tourism")
+        if element.tag == "node":
+            if tourism in ACCOMMODATION_TYPES:
+                places.append(("node", int(element.get("id")), tourism, float(element.get("lat")), float(element.get("lon")), tags))
+            place = tags.get("place")
+            if place in SETTLEMENT_RADIUS:
+                lat, lon = float(element.get("lat")), float(element.get("lon"))
+                names = {tags.get(key) for key in ("name", "name:en", "int_name") if tags.get(key)}
+                settlements.extend((name, place, _population(tags), lat, lon) for name in names)
+        elif tourism in ACCOMMODATION_TYPES and element.tag == "way":
+            ways[int(element.get("id"))] = ([int(nd.get("ref")) for nd in element.iter("nd")], tags)
+        elif tourism in ACCOMMODATION_TYPES and element.tag == "relation":
+            members = [int(member.get("ref")) for member in element.iter("member") if member.get("type") == "way"]
+            relations[int(element.get("id"))] = (members, tags)
+
+    # Pass 2: nodes of ways that make up tagged relations (usually multipolygon buildings)
+    member_ways: Dict[int, List[int]] = {}
+    wanted_ways = {way_id for members, _ in relations.values() for way_id in members} - ways.keys()
+    if wanted_ways:
+        for element in iter_elements(path, ("way",)):
+            way_id = int(element.get("id"))
+            if way_id in wanted_ways:
+                member_ways[way_id] = [int(nd.get("ref")) for nd in element.iter("nd")]
+
+    # Pass 3: coordinates of every node the ways and relations need
+    wanted_nodes: Set[int] = {ref for refs, _ in ways.values() for ref in refs}
+    wanted_nodes.update(ref for refs in member_ways.values() for ref in refs)
+    coords: Dict[int, Tuple[float, float]] = {}
+    if wanted_nodes:
+        for element in iter_elements(path, ("node",)):
+            node_id = int(element.get("id"))
+            if node_id in wanted_nodes:
+                coords[node_id] = (float(element.get("lat")), float(element.get("lon")))
+
+    def centroid(refs: List[int]) -> Optional[Tuple[float, float]]:
+        points = [coords[ref] for ref in refs if ref in coords]
+        if not points:
+            return None
+        return sum(point[0] for point in points) / len(points), sum(point[1] for point in points) / len(points)
+
+    for way_id, (refs, tags) in ways.items():
+        center = centroid(refs)
+        if center:
+            places.append(("way", way_id, tags["tourism"], center[0], center[1], tags))
+    for relation_id, (members, tags) in relations.items():
+        refs = [ref for way_id in members for ref in (ways.get(way_id, (None,))[0] or member_ways.get(way_id, []))]
+        center = centroid(refs)
+        if center:
+            places.append(("relation", relation_id, tags["tourism"], center[0], center[1], tags))
+
+    if bounds is None:
+        # Extracts without a <bounds> element cover at least the features they contain
+        points = [(place[3], place[4]) for place in places] + [(row[3], row[4]) for row in settlements]
+        if points:
+            lats, lons = [point[0] for point in points], [point[1] for point in points]
+            bounds = (min(lats), max(lats), min(lons), max(lons))
+
+    connection = sqlite3.connect(output)
+    with connection:
+        create_schema(connection)
+        for offset in range(0, len(places), BATCH_SIZE):
+            insert_places(connection, places[offset:offset + BATCH_SIZE])
+        connection.executemany(
+            "INSERT INTO settlements (name, place, population, lat, lon) VALUES (?, ?, ?, ?, ?)", settlements
+        )
+        if bounds:
+            connection.execute("INSERT INTO bounds (min_lat, max_lat, min_lon, max_lon) VALUES (?, ?, ?, ?)", bounds)
+    connection.execute("ANALYZE")
+    connection.close()
+
+    return {
+        "places": len(places),
+        "settlements": len(settlements),
+        "seconds": round(time.perf_counter() - start, 1)
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Import accommodations from an OSM XML extract")
+    parser.add_argument("extract", help=".osm, .osm.bz2 or .osm.gz file")
+    parser.add_argument("--output", default=settings.osm_index_path, help="SQLite index to write")
+    parser.add_argument("--append", action="store_true", help="Add to an existing index instead of replacing it")
+    args = parser.parse_args(argv)
+
+    result = import_extract(args.extract, args.output, append=args.append)
+    print(f"imported {result['places']} accommodations and {result['settlements']} settlement names "
+          f"into {args.output} in {result['seconds']}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
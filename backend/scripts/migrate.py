@@ -0,0 +1,24 @@
+"""
+Create missing tables and add columns introduced since the database was created.
+
+The backend does this at startup unless DATABASE_AUTO_MIGRATE=false. With several
+workers against one database, turn that off and run this once per deploy instead:
+
+    python -m scripts.migrate
+"""
+import sys
+from typing import List, Optional
+
+# Register every model on Base.metadata before migrating
+from app.models import itinerary, trip  # noqa: F401
+from app.models.database import engine, migrate
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    migrate()
+    print(f"database at {engine.url.render_as_string(hide_password=True)} is up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,10 @@
+"""
+Shared test setup. Settings are read when app modules are first imported,
+so the defaults here keep tests off Postgres, shared caches and the network.
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("CACHE_BACKEND", "memory")
+os.environ.setdefault("WARMUP_ENABLED", "false")
+os.environ.setdefault("OSM_INDEX_PATH", "/nonexistent")
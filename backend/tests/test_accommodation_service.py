@@ -0,0 +1,116 @@
+import pytest
+import requests
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import accommodations
+from app.services import accommodation_service
+from app.services.accommodation_service import AccommodationService, AccommodationUnavailable
+from app.services.registry import get_accommodation_service
+
+
+class _Response:
+    status_code = 200
+
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+
+@pytest.fixture
+def service():
+    service = AccommodationService()
+    service.local_index = None
+    service.overpass_cache.clear()
+    yield service
+    service.overpass_cache.clear()
+
+
+@pytest.fixture
+def overpass_down(monkeypatch):
+    def fail(*args, **kwargs):
+        raise requests.ConnectionError("Overpass unreachable")
+
+    monkeypatch.setattr(accommodation_service.upstream_scheduler, "request", fail)
+
+
+@pytest.fixture
+def client(service):
+    app = FastAPI()
+    app.include_router(accommodations.router)
+    app.dependency_overrides[get_accommodation_service] = lambda: service
+    return TestClient(app)
+
+
+def test_viewport_raises_when_overpass_is_down(service, overpass_down):
+    with pytest.raises(AccommodationUnavailable):
+        service.find_in_viewport(48.85, 2.34, 48.86, 2.36, 16)
+
+
+def test_detail_raises_and_is_not_cached_when_overpass_is_down(service, overpass_down, monkeypatch):
+    with pytest.raises(AccommodationUnavailable):
+        service.get_accommodation("node", 42)
+
+    element = {"type": "node", "id": 42, "lat": 48.85, "lon": 2.35, "tags": {"tourism": "hotel", "name": "Hôtel du Nord"}}
+    monkeypatch.setattr(accommodation_service.upstream_scheduler, "request", lambda *args, **kwargs: _Response({"elements": [element]}))
+    assert service.get_accommodation("node", 42)["name"] == "Hôtel du Nord"
+
+
+def test_routes_answer_503_when_overpass_is_down(client, overpass_down):
+    viewport = client.get("/api/accommodations/viewport", params={"south": 48.85, "west": 2.34, "north": 48.86, "east": 2.36, "zoom": 16})
+    detail = client.get("/api/accommodations/detail/node/42")
+
+    assert viewport.status_code == 503
+    assert detail.status_code == 503
+    assert "unavailable" in detail.json()["detail"]
+
+
+def test_unknown_detail_is_404_and_cached(client, service, monkeypatch):
+    calls = []
+
+    def empty(*args, **kwargs):
+        calls.append(args)
+        return _Response({"elements": []})
+
+    monkeypatch.setattr(accommodation_service.upstream_scheduler, "request", empty)
+
+    assert client.get("/api/accommodations/detail/way/7").status_code == 404
+    assert client.get("/api/accommodations/detail/way/7").status_code == 404
+    assert len(calls) == 1
+
+
+def test_viewport_points_cluster_by_grid_cell(service):
+    places = [
+        ["node", 1, 48.8570, 2.3520, {"tourism": "hotel", "name": "Hôtel A"}],
+        ["node", 2, 48.8572, 2.3524, {"tourism": "hostel"}],
+        ["node", 3, 48.8700, 2.3000, {"tourism": "guest_house", "name": "Maison C"}],
+    ]
+
+    clustered = service._viewport_points(places, True, 0.01)
+    assert clustered["total"] == 3
+    assert clustered["clusters"] == [{"count": 2, "latitude": 48.8571, "longitude": 2.3522, "bounds": [48.857, 2.352, 48.8572, 2.3524]}]
+    assert [point["id"] for point in clustered["points"]] == ["node/3"]
+
+    points = service._viewport_points(places, False, 0.01)
+    assert (points["clusters"], points["total"]) == ([], 3)
+    assert points["points"][1] == {"id": "node/2", "name": "Unnamed", "tourism_type": "hostel",
+                                   "latitude": 48.8572, "longitude": 2.3524, "stars": None}
+
+
+def test_viewport_from_overpass_keeps_only_points_inside(service, monkeypatch):
+    elements = [
+        {"type": "node", "id": 1, "lat": 48.8570, "lon": 2.3520, "tags": {"tourism": "hotel"}},
+        {"type": "way", "id": 10, "center": {"lat": 48.8601, "lon": 2.3402}, "tags": {"tourism": "hotel"}},
+        {"type": "node", "id": 3, "lat": 48.8700, "lon": 2.3000, "tags": {"tourism": "guest_house"}},
+    ]
+    monkeypatch.setattr(accommodation_service.upstream_scheduler, "request", lambda *args, **kwargs: _Response({"elements": elements}))
+
+    result = service.find_in_viewport(48.85, 2.33, 48.865, 2.36, 16)
+
+    assert (result["source"], result["clustered"], result["total"]) == ("overpass", False, 2)
+    assert [point["id"] for point in result["points"]] == ["node/1", "way/10"]
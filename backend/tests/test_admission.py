@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.utils.admission import AdmissionController, AdmissionLimiter, AdmissionRejected
+
+
+def _limiter(name, max_concurrent=1, max_queue=1, max_wait=1.0, retry_after=5):
+    return AdmissionLimiter(name, max_concurrent, max_queue, max_wait, retry_after)
+
+
+def test_route_classes():
+    controller = AdmissionController()
+
+    assert controller.route_class("POST", "/api/trips/plan") == "llm"
+    assert controller.route_class("POST", "/api/trips/42/replan") == "llm"
+    assert controller.route_class("GET", "/api/trips/plan") == "default"
+    assert controller.route_class("GET", "/api/weather/Paris") == "default"
+    assert controller.route_class("GET", "/health/admission") is None
+    assert controller.route_class("GET", "/metrics") is None
+    assert controller.limiter("GET", "/health") is None
+    assert controller.limiter("POST", "/api/trips/plan") is controller.limiters["llm"]
+
+
+def test_requests_under_the_limit_are_admitted():
+    limiter = _limiter("test_admit", max_concurrent=2)
+
+    async def scenario():
+        await limiter.acquire()
+        await limiter.acquire()
+        in_flight = limiter.stats()["in_flight"]
+        limiter.release()
+        limiter.release()
+        return in_flight
+
+    assert asyncio.run(scenario()) == 2
+    stats = limiter.stats()
+    assert (stats["in_flight"], stats["admitted"], stats["rejected"]) == (0, 2, 0)
+
+
+def test_full_queue_is_rejected_right_away():
+    limiter = _limiter("test_queue_full", max_queue=0, max_wait=5.0, retry_after=7)
+
+    async def scenario():
+        await limiter.acquire()
+        try:
+            await limiter.acquire()
+        finally:
+            limiter.release()
+
+    with pytest.raises(AdmissionRejected) as excinfo:
+        asyncio.run(scenario())
+    assert (excinfo.value.route_class, excinfo.value.reason, excinfo.value.retry_after) == ("test_queue_full", "queue_full", 7)
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_queued_request_times_out():
+    limiter = _limiter("test_timeout", max_wait=0.05)
+
+    async def scenario():
+        await limiter.acquire()
+        try:
+            await limiter.acquire()
+        finally:
+            limiter.release()
+
+    with pytest.raises(AdmissionRejected) as excinfo:
+        asyncio.run(scenario())
+    assert excinfo.value.reason == "timeout"
+    stats = limiter.stats()
+    assert (stats["in_flight"], stats["waiting"], stats["admitted"]) == (0, 0, 1)
+
+
+def test_queued_request_gets_the_released_slot():
+    limiter = _limiter("test_handoff")
+
+    async def scenario():
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        waiting = limiter.stats()["waiting"]
+        limiter.release()
+        await waiter
+        limiter.release()
+        return waiting
+
+    assert asyncio.run(scenario()) == 1
+    assert limiter.stats()["admitted"] == 2
+
+
+def test_middleware_sheds_load_with_retry_after(monkeypatch):
+    busy = _limiter("test_busy", max_concurrent=0, max_queue=0, retry_after=9)
+    monkeypatch.setitem(main.admission_controller.limiters, "default", busy)
+    client = TestClient(main.app)
+
+    response = client.get("/")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "9"
+    assert response.json() == {"detail": "Server is busy, please retry later"}
+
+    # Exempt paths bypass the limiter
+    assert client.get("/health").status_code == 200
+    assert busy.stats()["rejected"] == 1
@@ -0,0 +1,86 @@
+import pytest
+
+from app.services.ai_service import AIService, _cap_context
+
+TRIP = {"destination": "Lisbon", "travel_type": "Cultural", "start_date": "2024-06-15", "end_date": "2024-06-17"}
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = AIService()
+    service.research_cache.clear()
+    runs = []
+
+    def run_stage(stage, trip_data, outputs):
+        runs.append(stage)
+        return f"{stage} {len(runs)}", {"source": "run", "prompt_tokens": 10, "completion_tokens": 5}
+
+    monkeypatch.setattr(service, "_run_stage", run_stage)
+    service.runs = runs
+    yield service
+    service.research_cache.clear()
+
+
+def test_first_plan_runs_every_stage_and_caches_research(service):
+    plan = service.run_stages(TRIP)
+
+    assert plan["ran"] == ["research", "planning", "budget"]
+    assert plan["itinerary"] == "budget 3"
+    assert plan["usage"]["prompt_tokens"] == 30
+    assert service.research_cache.get(("lisbon", "cultural")) == "research 1"
+
+
+def test_research_is_shared_across_trips(service):
+    service.run_stages(TRIP)
+    plan = service.run_stages({**TRIP, "destination": " lisbon ", "start_date": "2024-09-01"})
+
+    assert plan["ran"] == ["planning", "budget"]
+    assert plan["usage"]["stages"]["research"]["source"] == "cache"
+    assert plan["stages"]["research"] == "research 1"
+
+
+def test_stages_not_rerun_reuse_stored_output(service):
+    previous = service.run_stages(TRIP)["stages"]
+    plan = service.run_stages(TRIP, previous=previous, rerun=["budget"])
+
+    assert plan["ran"] == ["budget"]
+    assert plan["stages"]["planning"] == previous["planning"]
+    assert plan["usage"]["stages"]["planning"]["source"] == "stored"
+
+
+def test_changed_output_reruns_later_stages(service):
+    previous = service.run_stages(TRIP)["stages"]
+    service.research_cache.clear()
+    plan = service.run_stages(TRIP, previous=previous, rerun=["research"])
+
+    # Research came out different, so planning and budget build on it again
+    assert plan["ran"] == ["research", "planning", "budget"]
+
+
+def test_refresh_skips_the_research_cache(service):
+    previous = service.run_stages(TRIP)["stages"]
+    cached = service.run_stages(TRIP, previous=previous, rerun=["research"])
+    fresh = service.run_stages(TRIP, previous=previous, rerun=["research"], refresh=["research"])
+
+    assert cached["ran"] == []
+    assert fresh["ran"] == ["research", "planning", "budget"]
+    assert service.research_cache.get(("lisbon", "cultural")) == fresh["stages"]["research"]
+
+
+def test_failure_falls_back_to_the_generic_itinerary(service, monkeypatch):
+    def fail(stage, trip_data, outputs):
+        raise RuntimeError("Groq unavailable")
+
+    monkeypatch.setattr(service, "_run_stage", fail)
+    plan = service.run_stages(TRIP)
+
+    assert plan["fallback"] is True
+    assert "Travel Itinerary for Lisbon" in plan["itinerary"]
+
+
+def test_cap_context_keeps_structure_first():
+    text = "\n".join(["Lisbon is hilly and the trams are busy in summer."] * 5 + ["## Day 1", "- Belém Tower"])
+    capped = _cap_context(text, max_chars=60)
+
+    assert capped.splitlines()[:2] == ["## Day 1", "- Belém Tower"]
+    assert len(capped) <= 60
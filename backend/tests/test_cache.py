@@ -0,0 +1,97 @@
+import threading
+import time
+
+import pytest
+
+from app.utils.cache import MemoryCache, RedisCache, SQLiteCache
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache("test_lru", ttl=60, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_memory_cache_expires_entries():
+    cache = MemoryCache("test_expiry", ttl=60)
+    cache.set("short", "value", ttl=0.02)
+    assert cache.get("short") == "value"
+    time.sleep(0.03)
+    assert cache.get("short") is None
+    assert cache.ttl_remaining("short") is None
+
+
+def test_cache_tuple_keys_and_stats():
+    cache = MemoryCache("test_stats", ttl=60)
+    cache.set(("paris", "metric"), {"temp": 20})
+    assert cache.get(("paris", "metric")) == {"temp": 20}
+    assert cache.get(("paris", "imperial")) is None
+    assert 59 < cache.ttl_remaining(("paris", "metric")) <= 60
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+
+
+def test_memory_cache_delete_and_clear():
+    cache = MemoryCache("test_delete", ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.delete("a")
+    assert cache.get("a") is None
+    cache.clear()
+    assert cache.stats()["size"] == 0
+
+
+def test_sqlite_cache_round_trip_and_expiry(tmp_path):
+    cache = SQLiteCache("test_sqlite", ttl=60, path=str(tmp_path / "cache.db"))
+    cache.set(("route", "driving"), {"distance": 1200.5, "steps": [1, 2]})
+    cache.set("short", "value", ttl=0.02)
+
+    assert cache.get(("route", "driving")) == {"distance": 1200.5, "steps": [1, 2]}
+    time.sleep(0.03)
+    assert cache.get("short") is None
+    assert cache.ttl_remaining("short") is None
+
+
+def test_sqlite_cache_namespaces_share_a_file(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = SQLiteCache("first", ttl=60, path=path)
+    second = SQLiteCache("second", ttl=60, path=path)
+    first.set("key", "first")
+    second.set("key", "second")
+    assert first.get("key") == "first"
+    assert SQLiteCache("first", ttl=60, path=path).get("key") == "first"
+
+    first.clear()
+    assert first.get("key") is None
+    assert second.get("key") == "second"
+
+
+def test_sqlite_cache_trims_entries_closest_to_expiry(tmp_path):
+    cache = SQLiteCache("test_trim", ttl=60, max_entries=4, path=str(tmp_path / "cache.db"))
+    for index in range(8):
+        cache.set(f"key{index}", index, ttl=100 + index)
+
+    assert cache.stats()["size"] == 4
+    assert [cache.get(f"key{index}") for index in range(8)] == [None] * 4 + [4, 5, 6, 7]
+
+
+def test_redis_cache_evicts_entries_closest_to_expiry():
+    fakeredis = pytest.importorskip("fakeredis")
+    cache = RedisCache("test_redis", ttl=60, max_entries=2, client=fakeredis.FakeRedis())
+    cache.set("a", 1, ttl=300)
+    cache.set("b", 2, ttl=100)
+    cache.set("c", 3, ttl=200)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert 199 < cache.ttl_remaining("c") <= 200
+    assert cache.stats()["size"] == 2
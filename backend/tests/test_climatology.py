@@ -0,0 +1,117 @@
+from datetime import date
+
+import pytest
+
+from app.services import weather_service
+from app.services.climatology import ClimateNormals, get_climate_normals
+from app.services.weather_service import MAX_OUTLOOK_DAYS, WeatherService
+
+
+def _row(name, country, lat, lon, temp_min, temp_max, precip):
+    return [name, country, str(lat), str(lon), *(",".join(str(value) for value in values) for values in (temp_min, temp_max, precip))]
+
+
+# Minimum temperature climbs 2 °C a month from 0 in January; monthly
+# precipitation equals the days of the month in 2027, so 1 mm a day all year
+TEMP_MIN = [2 * month for month in range(12)]
+TEMP_MAX = [value + 10 for value in TEMP_MIN]
+PRECIP = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
+
+@pytest.fixture
+def normals():
+    return ClimateNormals([
+        _row("Lisbon Airport", "PT", 38.77, -9.13, TEMP_MIN, TEMP_MAX, PRECIP),
+        _row("Sintra", "PT", 38.80, -9.38, [5] * 12, [15] * 12, [60] * 12),
+        _row("Nowhere Station", "XX", 10.0, 10.0, [20] * 12, [30] * 12, [0] * 12),
+    ])
+
+
+def test_rows_need_twelve_monthly_values():
+    with pytest.raises(ValueError):
+        ClimateNormals([_row("Short", "XX", 0, 0, TEMP_MIN[:11], TEMP_MAX, PRECIP)])
+
+
+def test_mid_month_matches_the_monthly_normal(normals):
+    assert normals.expected(0, date(2027, 1, 16)) == pytest.approx((0, 10, 1))
+    assert normals.expected(0, date(2027, 7, 16)) == pytest.approx((12, 22, 1))
+
+
+def test_values_are_interpolated_across_month_boundaries(normals):
+    end_of_march = normals.expected(0, date(2027, 3, 31))[0]
+    start_of_april = normals.expected(0, date(2027, 4, 1))[0]
+
+    assert 4 < end_of_march < start_of_april < 6
+    assert start_of_april - end_of_march < 0.1
+
+
+def test_interpolation_wraps_from_december_to_january(normals):
+    new_years_eve = normals.expected(0, date(2026, 12, 31))
+    new_years_day = normals.expected(0, date(2027, 1, 1))
+
+    # About halfway between December (22) and January (0) on either side of midnight
+    assert new_years_eve[0] == pytest.approx(22 * (1.5 - 30.5 / 31))
+    assert 10 < new_years_day[0] < new_years_eve[0] < 12
+    assert new_years_eve[2] == pytest.approx(1) and new_years_day[2] == pytest.approx(1)
+
+
+def test_daily_covers_every_day_inclusive(normals):
+    days = normals.daily(0, date(2027, 2, 27), date(2027, 3, 2))
+
+    assert [day.isoformat() for day, _, _, _ in days] == ["2027-02-27", "2027-02-28", "2027-03-01", "2027-03-02"]
+    assert all(precip == pytest.approx(1) for _, _, _, precip in days)
+
+
+def test_nearest_station_within_the_limit(normals):
+    index, distance = normals.nearest(38.71667, -9.13333, 50000)
+
+    assert normals.station(index)["name"] == "Lisbon Airport"
+    assert 5000 < distance < 7000
+    assert normals.nearest(38.71667, -9.13333, 5000) is None
+    assert normals.nearest(-33.9, 18.4, 50000) is None
+
+
+def test_find_resolves_names_through_the_gazetteer(normals):
+    assert normals.station(normals.find("Lisbon", 50000)[0])["name"] == "Lisbon Airport"
+    assert normals.station(normals.find("Lisbon, PT", 50000)[0])["name"] == "Lisbon Airport"
+    assert normals.find("Porto", 50000) is None
+    # Names the gazetteer does not know fall back to station names
+    assert normals.find("nowhere station", 50000) == (2, 0.0)
+    assert normals.find("Nowhere Station, XX", 50000) is None
+
+
+def test_bundled_table_loads():
+    normals = get_climate_normals()
+
+    assert len(normals) > 100
+    index, distance = normals.find("Paris", 50000)
+    assert normals.station(index)["country"] == "FR"
+    assert distance < 1000
+
+
+def test_climate_outlook(normals, monkeypatch):
+    monkeypatch.setattr(weather_service, "get_climate_normals", lambda: normals)
+    service = WeatherService()
+
+    outlook = service.get_climate_outlook("Lisbon", date(2027, 7, 15), date(2027, 7, 17))
+
+    assert outlook["source"] == "climatology"
+    assert outlook["station"]["name"] == "Lisbon Airport"
+    assert outlook["window"] == {"start_date": "2027-07-15", "end_date": "2027-07-17"}
+    assert [day["date"] for day in outlook["daily"]] == ["2027-07-15", "2027-07-16", "2027-07-17"]
+    assert outlook["daily"][1] == {"date": "2027-07-16", "temp_min": 12.0, "temp_max": 22.0, "temp_mean": 17.0, "precip_mm": 1.0}
+    assert outlook["summary"]["precip_mm"] == 3.0
+
+    columnar = service.get_climate_outlook("Lisbon", date(2027, 7, 15), date(2027, 7, 17), format="columnar")
+    assert columnar["daily"]["temp_min"] == [day["temp_min"] for day in outlook["daily"]]
+
+
+def test_climate_outlook_window_is_clamped(normals, monkeypatch):
+    monkeypatch.setattr(weather_service, "get_climate_normals", lambda: normals)
+    service = WeatherService()
+
+    single = service.get_climate_outlook("Lisbon", date(2027, 7, 15), date(2027, 7, 1))
+    assert len(single["daily"]) == 1
+    long = service.get_climate_outlook("Lisbon", date(2027, 1, 1), date(2029, 1, 1), format="columnar")
+    assert len(long["daily"]["date"]) == MAX_OUTLOOK_DAYS
+    assert service.get_climate_outlook("Porto", date(2027, 7, 15)) is None
@@ -0,0 +1,105 @@
+import threading
+
+import pytest
+import requests
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import destinations
+from app.services import destination_service
+from app.services.destination_service import DestinationService
+from app.services.registry import get_destination_service
+from app.utils.rate_limiter import PRIORITY_BACKGROUND, _current_priority, upstream_priority
+
+
+class _FakeWeather:
+    def __init__(self):
+        self.calls = []
+
+    def get_current_weather(self, city, country_code=None, fallback=True):
+        self.calls.append(("current", city, country_code, fallback))
+        return {"city": city, "temperature": 21.0}
+
+    def get_forecast(self, city, country_code=None, aggregate=None, fallback=True):
+        self.calls.append(("forecast", city, aggregate, fallback))
+        return {"city": city, "daily" if aggregate else "forecast": []}
+
+
+class _FakeCurrency:
+    def __init__(self):
+        self.release = threading.Event()
+
+    def get_exchange_rates(self, base_currency, fallback=True):
+        self.release.wait(5)
+        return {"base": base_currency, "rates": {"EUR": 0.9}}
+
+
+class _FakeAccommodations:
+    def find_accommodations(self, city, limit, fallback=True):
+        raise requests.ConnectionError("Overpass unreachable")
+
+
+@pytest.fixture
+def service():
+    currency = _FakeCurrency()
+    service = DestinationService(_FakeWeather(), currency, _FakeAccommodations())
+    currency.release.set()
+    yield service
+    currency.release.set()
+
+
+def test_overview_reports_each_section(service):
+    result = service.get_overview("Lisbon", "PT", base_currency="EUR")
+
+    assert result["weather"] == {"city": "Lisbon", "temperature": 21.0}
+    assert result["forecast"] == {"city": "Lisbon", "daily": []}
+    assert result["rates"]["base"] == "EUR"
+    assert result["accommodations"] is None
+    assert {name: section["status"] for name, section in result["sections"].items()} == {
+        "weather": "ok", "forecast": "ok", "rates": "ok", "accommodations": "error",
+    }
+    assert result["sections"]["accommodations"]["error"] == "Overpass unreachable"
+    assert result["success"] is False
+    # Sections must fail rather than fill the page with mock data
+    assert ("current", "Lisbon", "PT", False) in service.weather_service.calls
+    assert ("forecast", "Lisbon", "daily", False) in service.weather_service.calls
+
+
+def test_slow_section_times_out_without_holding_the_rest(service, monkeypatch):
+    monkeypatch.setattr(destination_service.settings, "destination_overview_timeout", 0.1)
+    service.currency_service.release.clear()
+
+    result = service.get_overview("Lisbon")
+
+    assert result["rates"] is None
+    assert result["sections"]["rates"]["status"] == "timeout"
+    assert 100 <= result["sections"]["rates"]["ms"] < 1000
+    assert result["weather"] is not None
+    assert result["sections"]["weather"]["status"] == "ok"
+
+
+def test_sections_run_at_the_caller_priority(service, monkeypatch):
+    seen = []
+
+    def current_weather(city, country_code=None, fallback=True):
+        seen.append(_current_priority.get())
+        return {}
+
+    monkeypatch.setattr(service.weather_service, "get_current_weather", current_weather)
+    with upstream_priority(PRIORITY_BACKGROUND):
+        service.get_overview("Lisbon")
+
+    assert seen == [PRIORITY_BACKGROUND]
+
+
+def test_overview_route_maps_the_forecast_option(service):
+    app = FastAPI()
+    app.include_router(destinations.router)
+    app.dependency_overrides[get_destination_service] = lambda: service
+    client = TestClient(app)
+
+    response = client.get("/api/destinations/Lisbon/overview", params={"forecast": "rows"})
+
+    assert response.status_code == 200
+    assert response.json()["forecast"] == {"city": "Lisbon", "forecast": []}
+    assert client.get("/api/destinations/Lisbon/overview", params={"accommodation_limit": 0}).status_code == 422
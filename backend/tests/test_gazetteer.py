@@ -0,0 +1,133 @@
+import zipfile
+
+import pytest
+
+from app.services.gazetteer import Gazetteer, fold, get_gazetteer, read_geonames
+
+
+def _row(geoname_id, name, alternates, lat, lon, country, admin1, population, feature=("P", "PPL"), ascii_name=None):
+    return [
+        str(geoname_id), name, ascii_name or name, ",".join(alternates), str(lat), str(lon),
+        feature[0], feature[1], country, "", admin1, "", "", "", str(population), "", "", "Europe/Paris", "2024-01-01"
+    ]
+
+
+ROWS = [
+    _row(1, "Paris", ["Parigi", "París"], 48.85, 2.35, "FR", "11", 2138551, ("P", "PPLC")),
+    _row(2, "Paris", [], 33.66, -95.56, "US", "TX", 24171),
+    _row(3, "Köln", ["Cologne", "Koeln"], 50.94, 6.96, "DE", "07", 1075935, ascii_name="Koln"),
+    _row(4, "São Paulo", ["Sampa"], -23.55, -46.64, "BR", "27", 12400232, ascii_name="Sao Paulo"),
+    _row(5, "Portland", [], 45.52, -122.68, "US", "OR", 652503),
+    _row(6, "Portland", [], 43.66, -70.26, "US", "ME", 68408),
+    _row(7, "Porto", ["Oporto"], 41.15, -8.61, "PT", "17", 249633),
+    _row(8, "Eiffel Tower", ["Tour Eiffel"], 48.86, 2.29, "FR", "11", 0, ("S", "TOWR")),
+    _row(9, "Parisville", [], 43.1, -83.0, "US", "MI", 800),
+    _row(10, "Cologne", [], 43.9, 0.97, "FR", "76", 500),
+]
+
+
+@pytest.fixture(scope="module")
+def gazetteer():
+    return Gazetteer(ROWS)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("São Paulo", "sao paulo"),
+    ("Köln", "koln"),
+    ("Straße", "strasse"),
+    ("Łódź", "lodz"),
+    ("  New-York!! ", "new york"),
+    ("北京", ""),
+])
+def test_fold(text, expected):
+    assert fold(text) == expected
+
+
+def test_lookup_prefers_the_largest_main_name(gazetteer):
+    place = gazetteer.lookup("paris")
+    assert (place.id, place.match) == (1, "exact")
+    assert gazetteer.lookup("Portland").id == 5
+
+
+def test_lookup_folds_accents_and_alternate_names(gazetteer):
+    assert gazetteer.lookup("Koln").id == 3
+    assert gazetteer.lookup("Sao Paulo").id == 4
+    assert gazetteer.lookup("Oporto").id == 7
+
+
+def test_main_names_rank_before_alternate_names(gazetteer):
+    # Köln has "Cologne" as an alternate name; the French village is called Cologne
+    assert gazetteer.lookup("Cologne").id == 10
+
+
+def test_lookup_with_country_and_admin_qualifiers(gazetteer):
+    assert gazetteer.lookup("Paris, US").id == 2
+    assert gazetteer.lookup("Paris, United States").id == 2
+    assert gazetteer.lookup("Paris, France").id == 1
+    assert gazetteer.lookup("Portland, ME").id == 6
+    assert gazetteer.lookup("Portland, Maine, US") is None
+    assert gazetteer.lookup("Paris, Atlantis") is None
+
+
+def test_lookup_is_exact_unless_fuzzy_is_asked_for(gazetteer):
+    assert gazetteer.lookup("Pariss") is None
+    assert gazetteer.lookup("Porte") is None
+    place = gazetteer.lookup("Pariss", fuzzy=True)
+    assert (place.id, place.match) == (1, "fuzzy")
+    assert gazetteer.lookup("Protland", fuzzy=True).id == 5
+
+
+def test_lookup_unknown_or_empty(gazetteer):
+    assert gazetteer.lookup("Atlantis") is None
+    assert gazetteer.lookup("   ") is None
+
+
+def test_autocomplete_orders_by_relevance(gazetteer):
+    places = gazetteer.autocomplete("par", fuzzy=False)
+    assert [place.id for place in places] == [1, 2, 9]
+    assert {place.match for place in places} == {"prefix"}
+    assert [place.id for place in gazetteer.autocomplete("paris", limit=2, fuzzy=False)] == [1, 2]
+
+
+def test_autocomplete_marks_exact_matches_and_adds_fuzzy_ones(gazetteer):
+    places = gazetteer.autocomplete("porto")
+    assert (places[0].id, places[0].match) == (7, "exact")
+    assert [place.match for place in gazetteer.autocomplete("kolm")] == ["fuzzy"]
+    assert gazetteer.autocomplete("") == []
+
+
+def test_landmarks_rank_after_places_and_get_a_small_radius(gazetteer):
+    tower = gazetteer.lookup("Tour Eiffel")
+    assert tower.id == 8
+    assert tower.search_radius == 1000
+    assert gazetteer.lookup("Paris").search_radius == 10000
+
+
+def test_min_population_and_alternate_names_options():
+    small = Gazetteer(ROWS, min_population=100000)
+    assert small.lookup("Parisville") is None
+    # Non-populated features are kept whatever their population
+    assert small.lookup("Eiffel Tower").id == 8
+
+    without_alternates = Gazetteer(ROWS, alternate_names=False)
+    assert without_alternates.lookup("Oporto") is None
+
+
+def test_read_geonames_text_and_zip(tmp_path):
+    lines = "# comment\n\n" + "\n".join("\t".join(row) for row in ROWS[:2]) + "\nshort\trow\n"
+    text_path = tmp_path / "cities.txt"
+    text_path.write_text(lines, encoding="utf-8")
+    zip_path = tmp_path / "cities.zip"
+    with zipfile.ZipFile(zip_path, "w") as archive:
+        archive.writestr("readme.txt", "not data")
+        archive.writestr("cities.txt", lines)
+
+    assert [row[0] for row in read_geonames(text_path)] == ["1", "2"]
+    assert [row[0] for row in read_geonames(zip_path)] == ["1", "2"]
+    assert len(Gazetteer.load(zip_path)) == 2
+
+
+def test_bundled_seed_resolves_common_destinations():
+    gazetteer = get_gazetteer()
+    assert gazetteer.lookup("Paris").country_code == "FR"
+    assert gazetteer.lookup("Roma").name == "Rome"
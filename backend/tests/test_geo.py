@@ -0,0 +1,61 @@
+import pytest
+
+from app.utils.geo import bbox_around, decode_polyline, encode_polyline, haversine_m
+
+# Example from Google's encoded polyline algorithm documentation, as [lon, lat]
+GOOGLE_POINTS = [[-120.2, 38.5], [-120.95, 40.7], [-126.453, 43.252]]
+GOOGLE_ENCODED = "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+
+def test_encode_matches_reference_example():
+    assert encode_polyline(GOOGLE_POINTS) == GOOGLE_ENCODED
+
+
+def test_decode_matches_reference_example():
+    assert decode_polyline(GOOGLE_ENCODED) == GOOGLE_POINTS
+
+
+@pytest.mark.parametrize("points", [
+    [],
+    [[2.35222, 48.85661]],
+    [[2.35222, 48.85661], [2.29448, 48.85837], [2.33764, 48.86061]],
+    [[-46.63331, -23.5505], [-43.17289, -22.90685], [151.20929, -33.86882]],
+    [[179.99999, 0.0], [-179.99999, -0.00001], [0.0, 89.99999]],
+])
+def test_round_trip(points):
+    assert decode_polyline(encode_polyline(points)) == points
+
+
+def test_round_trip_rounds_to_precision():
+    decoded = decode_polyline(encode_polyline([[2.352224, 48.856614]]))
+    assert decoded == [[2.35222, 48.85661]]
+
+
+def test_round_trip_at_precision_six():
+    points = [[-0.127758, 51.507351], [-0.141588, 51.501009]]
+    assert decode_polyline(encode_polyline(points, precision=6), precision=6) == points
+
+
+def test_long_line_round_trips_within_resolution():
+    points = [[2.0 + index * 0.00037, 48.0 - index * 0.00021] for index in range(2000)]
+    decoded = decode_polyline(encode_polyline(points))
+    assert len(decoded) == len(points)
+    assert all(abs(a - b) <= 0.000005 for point, other in zip(points, decoded) for a, b in zip(point, other))
+
+
+def test_haversine_paris_to_london():
+    assert haversine_m(48.85661, 2.35222, 51.50735, -0.12776) == pytest.approx(343_500, rel=0.01)
+    assert haversine_m(10.0, 20.0, 10.0, 20.0) == 0.0
+
+
+def test_bbox_contains_the_circle():
+    min_lat, max_lat, min_lon, max_lon = bbox_around(48.85661, 2.35222, 1000)
+    assert haversine_m(48.85661, 2.35222, max_lat, 2.35222) == pytest.approx(1000, rel=0.001)
+    assert haversine_m(48.85661, 2.35222, 48.85661, max_lon) >= 999
+    assert min_lat < 48.85661 < max_lat and min_lon < 2.35222 < max_lon
+
+
+def test_bbox_is_clamped_near_the_antimeridian():
+    _, _, min_lon, max_lon = bbox_around(0.0, 179.99, 10_000)
+    assert max_lon == 180.0
+    assert min_lon < 179.99
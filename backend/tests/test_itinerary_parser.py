@@ -0,0 +1,108 @@
+from datetime import date, datetime
+
+from app.services.ai_service import AIService
+from app.services.itinerary_parser import build_itinerary_days, parse_itinerary
+
+# Shape of the planning and budget agents' output: a title, prose, day
+# headings in varying markdown, timed list items and trailing sections
+GENERATED = """
+# 3-Day Paris Itinerary
+
+Paris in June is warm, so start early.
+
+## Day 1: Arrival in Paris
+- **9:00 AM - 11:00 AM:** Check in at the hotel
+- **Morning:** Walk along the Seine
+- 12:30 pm – Lunch at Café de Flore
+Take the metro to Trocadéro.
+- Evening: Eiffel Tower at sunset
+* Dinner near the Louvre
+
+### Day 2 – Museums (Tuesday)
+1. 10:00: Louvre Museum
+2) Musée d'Orsay
+
+**Day 3: Departure**
+- Breakfast: Croissants
+
+## Budget Summary
+- Hotel: €300
+
+## Day 1
+- Repeated in the summary
+"""
+
+
+def _activities(day):
+    return [(activity.time, activity.description) for activity in day.activities]
+
+
+def test_parses_day_headings_in_each_markdown_style():
+    days = parse_itinerary(GENERATED)
+    assert [(day.day_number, day.title) for day in days] == [
+        (1, "Arrival in Paris"),
+        (2, "Museums (Tuesday)"),
+        (3, "Departure"),
+    ]
+
+
+def test_parses_timed_activities():
+    day_one, day_two, day_three = parse_itinerary(GENERATED)
+    assert _activities(day_one) == [
+        ("9:00 AM - 11:00 AM", "Check in at the hotel"),
+        ("Morning", "Walk along the Seine"),
+        ("12:30 pm", "Lunch at Café de Flore"),
+        ("Evening", "Eiffel Tower at sunset"),
+        (None, "Dinner near the Louvre"),
+    ]
+    assert _activities(day_two) == [("10:00", "Louvre Museum"), (None, "Musée d'Orsay")]
+    assert _activities(day_three) == [("Breakfast", "Croissants")]
+
+
+def test_body_keeps_heading_and_prose_but_not_later_sections():
+    day_one, _, day_three = parse_itinerary(GENERATED)
+    assert day_one.body.startswith("## Day 1: Arrival in Paris")
+    assert "Take the metro to Trocadéro." in day_one.body
+    assert "Hotel" not in day_three.body
+    assert "Repeated in the summary" not in day_one.body
+
+
+def test_fallback_itinerary_is_parsed():
+    text = AIService()._generate_fallback_itinerary({
+        "destination": "Lisbon", "start_date": "2024-06-15", "end_date": "2024-06-17"
+    })
+    days = parse_itinerary(text)
+
+    assert [(day.day_number, day.title) for day in days] == [
+        (1, "Arrival and Orientation"),
+        (2, "Cultural Exploration"),
+        (3, "Nature and Adventure"),
+    ]
+    assert _activities(days[0])[0] == (None, "Arrive in Lisbon")
+    assert all("customs" not in activity.description for day in days for activity in day.activities)
+
+
+def test_plain_and_bracketed_day_headings():
+    days = parse_itinerary("Day 4 (Tuesday)\n- Sintra\nday 5\n- Cascais")
+    assert [(day.day_number, day.title) for day in days] == [(4, "Tuesday"), (5, None)]
+
+
+def test_text_without_day_headings_yields_nothing():
+    assert parse_itinerary("A relaxed week by the sea.\n- Swim\n- Read") == []
+
+
+def test_build_itinerary_days_assigns_dates_and_positions():
+    days = build_itinerary_days(GENERATED, datetime(2024, 6, 15, 10, 30))
+
+    assert [(day.day_number, day.date) for day in days] == [
+        (1, date(2024, 6, 15)),
+        (2, date(2024, 6, 16)),
+        (3, date(2024, 6, 17)),
+    ]
+    assert [activity.position for activity in days[0].activities] == [0, 1, 2, 3, 4]
+    assert days[1].activities[0].time == "10:00"
+
+
+def test_build_itinerary_days_without_start_date():
+    days = build_itinerary_days(GENERATED)
+    assert all(day.date is None for day in days)
@@ -0,0 +1,151 @@
+import pytest
+
+from app.services import translation_service
+from app.services.language_detector import (
+    LanguageDetector,
+    build_profile,
+    build_profile_from_frequencies,
+    extract_ngrams,
+    get_language_detector,
+)
+from app.services.translation_service import TranslationService
+
+KNOWN = [
+    ("en", "We walked along the river and had dinner in a small restaurant near the old bridge."),
+    ("fr", "Nous avons marché le long de la rivière avant de dîner dans un petit restaurant."),
+    ("de", "Wir sind am Fluss entlang spaziert und haben in einem kleinen Restaurant gegessen."),
+    ("es", "Caminamos junto al río y cenamos en un pequeño restaurante cerca del puente."),
+    ("it", "Abbiamo camminato lungo il fiume e cenato in un piccolo ristorante vicino al ponte."),
+    ("pt", "Caminhámos ao longo do rio e jantámos num pequeno restaurante perto da ponte."),
+    ("nl", "We liepen langs de rivier en aten in een klein restaurant bij de oude brug."),
+    ("sv", "Museet öppnar klockan nio på morgonen och biljetterna är billigare på nätet."),
+    ("fi", "Kävelimme joen rantaa pitkin ja söimme illallista pienessä ravintolassa sillan lähellä."),
+    ("pl", "Spacerowaliśmy wzdłuż rzeki i zjedliśmy kolację w małej restauracji przy moście."),
+    ("cs", "Procházeli jsme se podél řeky a večeřeli v malé restauraci u mostu."),
+    ("tr", "Nehir boyunca yürüdük ve köprünün yakınındaki küçük bir restoranda akşam yemeği yedik."),
+    ("hu", "Sétáltunk a folyó mentén, és egy kis étteremben vacsoráztunk a híd közelében."),
+    ("id", "Museum buka pukul sembilan pagi dan tiketnya lebih murah jika dibeli secara online."),
+    ("ro", "Muzeul se deschide la ora nouă dimineața, iar biletele sunt mai ieftine online."),
+    ("ru", "Мы гуляли вдоль реки и поужинали в маленьком ресторане у моста."),
+    ("uk", "Ми гуляли вздовж річки і вечеряли в маленькому ресторані біля мосту."),
+    ("bg", "Разходихме се покрай реката и вечеряхме в малък ресторант до моста."),
+    ("ar", "مشينا على طول النهر وتناولنا العشاء في مطعم صغير بالقرب من الجسر."),
+    ("fa", "ما در کنار رودخانه قدم زدیم و در یک رستوران کوچک نزدیک پل شام خوردیم."),
+    ("hi", "हम नदी के किनारे टहले और पुल के पास एक छोटे रेस्तरां में रात का खाना खाया।"),
+]
+
+# Languages without a profile; the closest profile must not claim them
+UNKNOWN = [
+    "Me jalutasime mööda jõge ja sõime õhtust väikeses restoranis silla lähedal.",
+    "Ibaiaren ondoan ibili ginen eta zubiaren ondoko jatetxe txiki batean afaldu genuen.",
+    "Ecëm përgjatë lumit dhe darkuam në një restorant të vogël pranë urës.",
+    "Tulitembea kando ya mto na kula chakula cha jioni katika mgahawa mdogo karibu na daraja.",
+    "Cerddon ni ar hyd yr afon a chael swper mewn bwyty bach ger y bont.",
+    "Shiúlamar feadh na habhann agus d'itheamar dinnéar i mbialann bheag in aice leis an droichead.",
+    "Xkq zzvt plorm quaxx vvbnt grrk asdf qwer zxcv uiop hjkl.",
+]
+
+
+@pytest.fixture(scope="module")
+def detector():
+    return get_language_detector()
+
+
+@pytest.mark.parametrize("language, text", KNOWN)
+def test_detects_profiled_languages(detector, language, text):
+    detection = detector.detect(text)
+    assert (detection.language, detection.method) == (language, "ngram")
+    assert detection.confidence >= 0.5
+
+
+@pytest.mark.parametrize("text", UNKNOWN)
+def test_languages_without_a_profile_are_not_confident(detector, text):
+    assert detector.detect(text).confidence < 0.5
+
+
+@pytest.mark.parametrize("language, text", [
+    ("ko", "박물관은 아침 아홉 시에 문을 엽니다."),
+    ("ja", "博物館は朝九時に開きます。"),
+    ("zh", "博物馆早上九点开门。"),
+    ("el", "Το μουσείο ανοίγει στις εννέα το πρωί."),
+    ("he", "המוזיאון נפתח בתשע בבוקר."),
+])
+def test_detects_languages_by_script(detector, language, text):
+    detection = detector.detect(text)
+    assert (detection.language, detection.method) == (language, "script")
+
+
+def test_short_text_is_not_confident(detector):
+    assert detector.detect("Bonjour").confidence < 0.5
+
+
+def test_text_without_letters_is_not_detected(detector):
+    assert detector.detect("12:30 - 14:00 !!") is None
+
+
+def test_extract_ngrams_pads_words_and_keeps_combining_marks():
+    assert extract_ngrams("Le 14 juin") == [" le", "le ", " ju", "jui", "uin", "in "]
+    assert extract_ngrams("नदी") == [" नद", "नदी", "दी "]
+
+
+def test_profiles_from_text_and_frequencies_agree():
+    from_text = build_profile(["abc abc abd"], top=10)
+    from_frequencies = build_profile_from_frequencies([("abc", 2.0), ("abd", 1.0)], top=10, scale=9)
+
+    assert from_text == {"total": 9, "counts": {" ab": 3, "abc": 2, "bc ": 2, "abd": 1, "bd ": 1}}
+    assert from_frequencies == from_text
+    assert build_profile_from_frequencies([], top=10) == {"total": 0, "counts": {}}
+
+
+def test_confidence_reflects_fit_to_the_winning_profile():
+    english = "the museum opens at nine and the river walk is lovely in the morning " * 3
+    detector = LanguageDetector({"en": build_profile([english], top=200)})
+
+    assert detector.detect("The river walk opens in the morning").confidence > 0.9
+    # Only one profile, so the posterior is 1.0; the fit has to reject this
+    assert detector.detect("Kävelimme joen rantaa pitkin pienessä ravintolassa").confidence == 0.0
+
+
+class _Response:
+    status_code = 200
+
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    calls = []
+
+    def fake_request(upstream, method, url, operation="unknown", **kwargs):
+        calls.append((url, kwargs.get("json")))
+        if url.endswith("/detect"):
+            return _Response([{"language": "et", "confidence": 92.0}])
+        return _Response({"translatedText": "translated"})
+
+    monkeypatch.setattr(translation_service.upstream_scheduler, "request", fake_request)
+    return calls
+
+
+def test_translation_sends_auto_when_the_detector_is_unsure(upstream):
+    service = TranslationService()
+    service.translate_text(UNKNOWN[0], "en")
+    service.translate_text(KNOWN[7][1], "en")
+
+    assert [payload["source"] for _, payload in upstream] == ["auto", "sv"]
+
+
+def test_detection_asks_libretranslate_when_unsure(upstream):
+    service = TranslationService()
+    remote = service.detect_language(UNKNOWN[0])
+    local = service.detect_language(KNOWN[8][1])
+
+    assert (remote["detected_language"], remote["method"], remote["confidence"]) == ("et", "remote", 0.92)
+    assert (local["detected_language"], local["method"]) == ("fi", "ngram")
+    assert len(upstream) == 1
@@ -0,0 +1,124 @@
+import gzip
+
+import pytest
+
+from app.services.accommodation_service import AccommodationService
+from app.services.osm_index import OSMIndex
+from app.utils.geo import haversine_m
+from scripts.import_osm import import_extract
+
+EXTRACT = """<?xml version="1.0" encoding="UTF-8"?>
+<osm version="0.6">
+  <bounds minlat="48.80" minlon="2.25" maxlat="48.92" maxlon="2.45"/>
+  <node id="1" lat="48.8570" lon="2.3520"><tag k="tourism" v="hotel"/><tag k="name" v="Hôtel A"/><tag k="stars" v="3"/></node>
+  <node id="2" lat="48.8572" lon="2.3524"><tag k="tourism" v="hostel"/><tag k="name" v="Hostel B"/></node>
+  <node id="3" lat="48.8700" lon="2.3000"><tag k="tourism" v="guest_house"/><tag k="name" v="Maison C"/></node>
+  <node id="4" lat="48.8571" lon="2.3521"><tag k="amenity" v="restaurant"/><tag k="name" v="Bistro"/></node>
+  <node id="100" lat="48.8600" lon="2.3400"/>
+  <node id="101" lat="48.8602" lon="2.3400"/>
+  <node id="102" lat="48.8602" lon="2.3404"/>
+  <node id="103" lat="48.8600" lon="2.3404"/>
+  <node id="200" lat="48.8566" lon="2.3522"><tag k="place" v="city"/><tag k="name" v="Paris"/><tag k="population" v="2 100 000"/></node>
+  <node id="201" lat="48.9000" lon="2.4000"><tag k="place" v="village"/><tag k="name" v="Paris"/><tag k="population" v="120"/></node>
+  <way id="10"><nd ref="100"/><nd ref="101"/><nd ref="102"/><nd ref="103"/><nd ref="100"/><tag k="tourism" v="hotel"/><tag k="name" v="Hôtel D"/></way>
+</osm>
+"""
+
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("osm")
+    extract = directory / "extract.osm.gz"
+    with gzip.open(extract, "wt", encoding="utf-8") as handle:
+        handle.write(EXTRACT)
+    counts = import_extract(str(extract), str(directory / "index.db"))
+    assert (counts["places"], counts["settlements"]) == (4, 2)
+    return OSMIndex.open(str(directory / "index.db"))
+
+
+@pytest.fixture
+def service(index):
+    service = AccommodationService()
+    service.local_index = index
+    return service
+
+
+def test_open_without_an_import_is_none(tmp_path):
+    assert OSMIndex.open(str(tmp_path / "missing.db")) is None
+    assert OSMIndex.open("") is None
+
+
+def test_import_stores_ways_at_their_centroid(index):
+    way = index.get("way", 10)
+    assert way["tags"]["name"] == "Hôtel D"
+    # The closing node counts twice, as it does in the extract
+    assert way["lat"] == pytest.approx(48.86008)
+    assert way["lon"] == pytest.approx(2.34016)
+    assert index.get("node", 4) is None
+    assert index.get("node", 10) is None
+    assert index.stats() == {"places": 4, "settlements": 2}
+
+
+def test_covers_uses_the_extract_bounds(index):
+    assert index.covers(48.85, 2.35)
+    assert not index.covers(45.76, 4.83)
+
+
+def test_find_settlement_prefers_larger_places(index):
+    settlement = index.find_settlement(" paris ")
+    assert settlement == {"name": "Paris", "place": "city", "lat": 48.8566, "lon": 2.3522, "radius": 10000}
+    assert index.find_settlement("Lyon") is None
+
+
+def test_find_near_cuts_the_bbox_to_the_radius(index):
+    places = index.find_near(48.8566, 2.3522, 1500, 10)
+
+    assert [(place["osm_type"], place["osm_id"]) for place in places] == [("node", 1), ("node", 2), ("way", 10)]
+    assert places[0]["distance"] == round(haversine_m(48.8566, 2.3522, 48.8570, 2.3520))
+    # Maison C, 4.1 km away, is inside the bounding box of a 4 km search but not its circle
+    assert [place["osm_id"] for place in index.find_near(48.8566, 2.3522, 4000, 10)] == [1, 2, 10]
+    assert [place["osm_id"] for place in index.find_near(48.8566, 2.3522, 4000, 2)] == [1, 2]
+
+
+def test_bbox_queries(index):
+    rows = index.find_in_bbox(48.85, 2.34, 48.87, 2.36, 10)
+
+    assert sorted((osm_type, osm_id) for osm_type, osm_id, _, _, _ in rows) == [("node", 1), ("node", 2), ("way", 10)]
+    assert index.count_in_bbox(48.85, 2.34, 48.87, 2.36) == 3
+    assert index.count_in_bbox(48.80, 2.25, 48.92, 2.45) == 4
+    assert len(index.find_in_bbox(48.80, 2.25, 48.92, 2.45, 2)) == 2
+
+
+def test_cluster_bbox_groups_by_grid_cell(index):
+    cells = index.cluster_bbox(48.80, 2.25, 48.92, 2.45, 0.01)
+
+    assert sorted(cell[0] for cell in cells) == [1, 1, 2]
+    pair = next(cell for cell in cells if cell[0] == 2)
+    assert pair[1:3] == pytest.approx((48.8571, 2.3522), abs=1e-4)
+
+
+def test_clustered_viewport_from_the_index(service):
+    result = service.find_in_viewport(48.80, 2.25, 48.92, 2.45, 12)
+
+    assert (result["source"], result["clustered"], result["total"]) == ("osm_index", True, 4)
+    assert [cluster["count"] for cluster in result["clusters"]] == [2]
+    assert result["clusters"][0]["bounds"] == pytest.approx([48.857, 2.352, 48.8572, 2.3524], abs=1e-4)
+    assert sorted(point["id"] for point in result["points"]) == ["node/3", "way/10"]
+
+
+def test_zoomed_in_viewport_returns_compact_points(service):
+    result = service.find_in_viewport(48.85, 2.34, 48.87, 2.36, 16)
+
+    assert (result["clustered"], result["clusters"], result["total"]) == (False, [], 3)
+    point = next(point for point in result["points"] if point["id"] == "node/1")
+    assert point == {"id": "node/1", "name": "Hôtel A", "tourism_type": "hotel",
+                     "latitude": pytest.approx(48.857), "longitude": pytest.approx(2.352), "stars": "3"}
+
+
+def test_city_search_uses_the_index(service):
+    result = service.find_accommodations("Paris", limit=2)
+
+    assert result["source"] == "osm_index"
+    assert result["count"] == 2
+    assert [accommodation["distance"] for accommodation in result["accommodations"]] == sorted(
+        accommodation["distance"] for accommodation in result["accommodations"])
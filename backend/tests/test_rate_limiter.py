@@ -0,0 +1,163 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+import requests
+
+from app.utils import rate_limiter
+from app.utils.rate_limiter import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    RateLimitExceeded,
+    TokenBucket,
+    UpstreamScheduler,
+    _current_priority,
+    _parse_retry_after,
+    upstream_priority,
+)
+
+
+def test_burst_is_served_without_waiting():
+    bucket = TokenBucket("test_burst", rate=1.0, burst=3, max_wait=1.0)
+    waits = [bucket.acquire() for _ in range(3)]
+    assert all(wait < 0.05 for wait in waits)
+    assert bucket.stats()["acquired"] == 3
+
+
+def test_empty_bucket_waits_for_refill():
+    bucket = TokenBucket("test_refill", rate=20.0, burst=1, max_wait=1.0)
+    bucket.acquire()
+    waited = bucket.acquire()
+    assert 0.03 <= waited < 0.5
+
+
+def test_timeout_raises_and_counts_rejection():
+    bucket = TokenBucket("test_timeout", rate=1.0, burst=1, max_wait=0.05)
+    bucket.acquire()
+    with pytest.raises(RateLimitExceeded):
+        bucket.acquire()
+    stats = bucket.stats()
+    assert stats["rejected"] == 1
+    assert stats["queue_depth"] == 0
+
+
+def test_rate_limit_exceeded_is_a_request_exception():
+    assert issubclass(RateLimitExceeded, requests.RequestException)
+
+
+def test_zero_rate_means_unlimited():
+    bucket = TokenBucket("test_unlimited", rate=0.0, burst=1, max_wait=0.0)
+    assert [bucket.acquire() for _ in range(100)] == [0.0] * 100
+
+
+def test_cost_is_capped_at_burst():
+    bucket = TokenBucket("test_cost", rate=1.0, burst=2, max_wait=0.05)
+    assert bucket.acquire(cost=10) < 0.05
+
+
+def test_penalize_holds_back_callers():
+    bucket = TokenBucket("test_penalize", rate=1000.0, burst=5, max_wait=1.0)
+    bucket.penalize(0.1)
+    waited = bucket.acquire()
+    assert waited >= 0.09
+    assert bucket.stats()["throttled"] == 1
+
+
+def test_penalize_beyond_timeout_rejects():
+    bucket = TokenBucket("test_penalize_reject", rate=1000.0, burst=5, max_wait=0.05)
+    bucket.penalize(1.0)
+    with pytest.raises(RateLimitExceeded):
+        bucket.acquire()
+
+
+def test_interactive_caller_overtakes_queued_background_work():
+    bucket = TokenBucket("test_priority", rate=10.0, burst=1, max_wait=2.0)
+    bucket.acquire()
+    order = []
+
+    def take(label, priority):
+        bucket.acquire(priority=priority)
+        order.append(label)
+
+    background = threading.Thread(target=take, args=("background", PRIORITY_BACKGROUND))
+    background.start()
+    _wait_for_queue(bucket, 1)
+    interactive = threading.Thread(target=take, args=("interactive", PRIORITY_INTERACTIVE))
+    interactive.start()
+    background.join()
+    interactive.join()
+
+    assert order == ["interactive", "background"]
+
+
+def test_upstream_priority_sets_and_resets_context():
+    assert _current_priority.get() == PRIORITY_INTERACTIVE
+    with upstream_priority(PRIORITY_BACKGROUND):
+        assert _current_priority.get() == PRIORITY_BACKGROUND
+    assert _current_priority.get() == PRIORITY_INTERACTIVE
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("5", 5.0),
+    ("0.5", 0.5),
+    ("-3", 0.0),
+    (None, 1.0),
+    ("", 1.0),
+    ("soon", 1.0),
+])
+def test_parse_retry_after_seconds(value, expected):
+    assert _parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    future = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    past = format_datetime(datetime.now(timezone.utc) - timedelta(seconds=30), usegmt=True)
+    assert 28 <= _parse_retry_after(future) <= 31
+    assert _parse_retry_after(past) == 0.0
+
+
+class _Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def test_request_retries_429_within_max_wait(monkeypatch):
+    responses = [_Response(429, {"Retry-After": "0.05"}), _Response(200)]
+    monkeypatch.setattr(rate_limiter.requests, "request", lambda method, url, **kwargs: responses.pop(0))
+    scheduler = UpstreamScheduler()
+    scheduler._buckets["openweather"] = TokenBucket("openweather", rate=100.0, burst=5, max_wait=1.0)
+
+    start = time.monotonic()
+    response = scheduler.request("openweather", "GET", "http://upstream.test", operation="test")
+
+    assert response.status_code == 200
+    assert time.monotonic() - start >= 0.04
+    assert scheduler.bucket("openweather").stats()["throttled"] == 1
+
+
+def test_request_returns_429_when_retry_after_exceeds_max_wait(monkeypatch):
+    calls = []
+
+    def fake_request(method, url, **kwargs):
+        calls.append(url)
+        return _Response(429, {"Retry-After": "60"})
+
+    monkeypatch.setattr(rate_limiter.requests, "request", fake_request)
+    scheduler = UpstreamScheduler()
+    scheduler._buckets["openweather"] = TokenBucket("openweather", rate=100.0, burst=5, max_wait=1.0)
+
+    response = scheduler.request("openweather", "GET", "http://upstream.test", operation="test")
+
+    assert response.status_code == 429
+    assert len(calls) == 1
+
+
+def _wait_for_queue(bucket, depth, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while bucket.stats()["queue_depth"] < depth:
+        if time.monotonic() > deadline:
+            raise AssertionError(f"queue never reached {depth}")
+        time.sleep(0.005)
@@ -0,0 +1,219 @@
+import pytest
+import requests
+
+from app.services import route_service
+from app.services.route_service import RouteService
+from app.utils.geo import decode_polyline, haversine_m
+
+STOPS = {
+    "Hotel": {"lat": 48.856614, "lon": 2.352222},
+    "Museum": {"lat": 48.860611, "lon": 2.337644},
+    "Tower": {"lat": 48.858370, "lon": 2.294481},
+    # Within rounding distance of the hotel
+    "Hotel lobby": {"lat": 48.856631, "lon": 2.352209},
+}
+GEOMETRY = [[2.352222, 48.856614], [2.34501, 48.85802], [2.337644, 48.860611], [2.31, 48.8597], [2.294481, 48.85837]]
+
+
+class _Response:
+    status_code = 200
+
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+
+def _step(instruction, distance, duration, step_type=11):
+    return {"instruction": instruction, "distance": distance, "duration": duration, "type": step_type}
+
+
+ORS_RESPONSE = {
+    "features": [{
+        "geometry": {"coordinates": GEOMETRY},
+        "properties": {
+            "way_points": [0, 2, 4],
+            "segments": [
+                {"distance": 1500.0, "duration": 300.0,
+                 "steps": [_step("Head west", 800.0, 160.0), _step("Arrive at Museum", 0.0, 0.0, 10)]},
+                {"distance": 3200.0, "duration": 540.0,
+                 "steps": [{"instruction": "Continue on Quai", "distance": 3200.0, "duration": 540.0}]},
+            ],
+        },
+    }]
+}
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = RouteService()
+    service.route_cache.clear()
+    monkeypatch.setattr(service, "_geocode_address", lambda address: STOPS.get(address))
+    calls = []
+
+    def fake_request(upstream, method, url, operation="unknown", **kwargs):
+        calls.append(kwargs["json"])
+        return _Response(ORS_RESPONSE)
+
+    monkeypatch.setattr(route_service.upstream_scheduler, "request", fake_request)
+    service.calls = calls
+    yield service
+    service.route_cache.clear()
+
+
+def test_route_key_rounds_to_about_ten_metres(service):
+    key = service._route_key("driving-car", [STOPS["Hotel"], STOPS["Tower"]])
+    assert key == ("driving-car", "48.8566,2.3522", "48.8584,2.2945")
+    assert service._route_key("driving-car", [STOPS["Hotel lobby"], STOPS["Tower"]]) == key
+    assert service._route_key("foot-walking", [STOPS["Hotel"], STOPS["Tower"]]) != key
+
+
+def test_fetch_route_returns_the_compact_cache_form(service):
+    route = service._fetch_route("driving-car", [STOPS["Hotel"], STOPS["Museum"], STOPS["Tower"]])
+
+    assert decode_polyline(route["polyline"]) == [[round(lon, 5), round(lat, 5)] for lon, lat in GEOMETRY]
+    assert route["legs"] == [
+        {"distance": 1.5, "duration": 5.0, "range": [0, 2],
+         "steps": [["Head west", 800.0, 160.0, 11], ["Arrive at Museum", 0.0, 0.0, 10]]},
+        {"distance": 3.2, "duration": 9.0, "range": [2, 4],
+         "steps": [["Continue on Quai", 3200.0, 540.0, "unknown"]]},
+    ]
+    assert service.calls[0]["coordinates"][0] == [2.352222, 48.856614]
+
+
+def test_get_route_expands_legs_and_geometry(service):
+    result = service.get_route("Hotel", "Tower", waypoints=["Museum"])
+
+    assert result["success"] is True
+    assert (result["distance"], result["duration"]) == pytest.approx((4.7, 14.0))
+    assert [(leg["start"], leg["end"], leg["geometry_range"]) for leg in result["legs"]] == [
+        ("Hotel", "Museum", [0, 2]),
+        ("Museum", "Tower", [2, 4]),
+    ]
+    assert result["instructions"][0] == {"instruction": "Head west", "distance": 800.0, "duration": 160.0, "type": 11}
+    assert len(result["instructions"]) == 3
+    assert result["coordinates"][0] == [2.35222, 48.85661]
+    assert len(result["coordinates"]) == len(GEOMETRY)
+
+
+def test_get_route_serves_nearby_stops_from_the_cache(service):
+    first = service.get_route("Hotel", "Tower", waypoints=["Museum"])
+    second = service.get_route("Hotel lobby", "Tower", waypoints=["Museum"])
+
+    assert len(service.calls) == 1
+    assert second["start"] == "Hotel lobby"
+    assert second["legs"][0]["start"] == "Hotel lobby"
+    assert second["coordinates"] == first["coordinates"]
+
+
+def test_get_route_falls_back_when_a_stop_is_unknown(service):
+    result = service.get_route("Hotel", "Atlantis")
+    assert service.calls == []
+    assert result["start"] == "Hotel" and result["end"] == "Atlantis"
+
+
+def test_geocoding_uses_the_gazetteer_for_exact_names_only(monkeypatch):
+    service = RouteService()
+    service.geocode_cache.clear()
+    calls = []
+
+    def fake_request(upstream, method, url, operation="unknown", **kwargs):
+        calls.append(kwargs["params"]["text"])
+        return _Response({"features": [{"geometry": {"coordinates": [2.33, 48.86]}}]})
+
+    monkeypatch.setattr(route_service.upstream_scheduler, "request", fake_request)
+
+    paris = service._geocode_address("Paris")
+    # A near miss must not become the closest gazetteer name; ORS decides
+    near_miss = service._geocode_address("Pariss")
+
+    assert calls == ["Pariss"]
+    assert round(paris["lat"]) == 49
+    assert near_miss == {"lat": 48.86, "lon": 2.33}
+    service.geocode_cache.clear()
+
+
+@pytest.fixture
+def matrix_service(monkeypatch):
+    service = RouteService()
+    service.matrix_cache.clear()
+    monkeypatch.setattr(service, "_geocode_address", lambda address: STOPS.get(address))
+    calls = []
+
+    def fake_request(upstream, method, url, operation="unknown", **kwargs):
+        locations = kwargs["json"]["locations"]
+        calls.append((url.rsplit("/", 1)[-1], locations))
+        distances = [[0.0 if a == b else 1000.0 + 10 * a + b for b in range(len(locations))] for a in range(len(locations))]
+        return _Response({"distances": distances, "durations": [[value / 10 for value in row] for row in distances]})
+
+    monkeypatch.setattr(route_service.upstream_scheduler, "request", fake_request)
+    service.calls = calls
+    yield service
+    service.matrix_cache.clear()
+
+
+def test_estimate_cell_applies_the_detour_factor(matrix_service):
+    assert matrix_service._estimate_cell(1000, "walking") == pytest.approx([1300, 1000])
+    assert matrix_service._estimate_cell(1000, "teleport") == matrix_service._estimate_cell(1000, "driving")
+
+
+def test_matrix_key_rounds_to_about_ten_metres(matrix_service):
+    key = matrix_service._matrix_key("foot-walking", STOPS["Hotel"], STOPS["Tower"])
+    assert key == ("foot-walking", "48.8566", "2.3522", "48.8584", "2.2945")
+    assert matrix_service._matrix_key("foot-walking", STOPS["Hotel lobby"], STOPS["Tower"]) == key
+
+
+def test_matrix_makes_one_request_per_mode(matrix_service):
+    result = matrix_service.get_matrix(["Hotel", "Museum", "Tower", "Hotel lobby", "Atlantis"], ["walking", "driving"])
+
+    assert [profile for profile, _ in matrix_service.calls] == ["foot-walking", "driving-car"]
+    assert len(matrix_service.calls[0][1]) == 4
+    assert result["unresolved"] == ["Atlantis"]
+    assert result["places"][4] == {"query": "Atlantis", "latitude": None, "longitude": None}
+
+    walking = result["modes"]["walking"]
+    # The hotel and its lobby are a few metres apart, so that pair is estimated
+    assert walking["cells"] == {"cache": 0, "openroute": 10, "estimate": 2}
+    assert walking["distances"][0][:3] == [0.0, 1.001, 1.002]
+    assert walking["durations"][0][1] == 1.7
+    assert walking["distances"][0][3] < 0.01
+    assert walking["distances"][4] == [None] * 5
+    assert [row[4] for row in walking["distances"]] == [None] * 5
+
+
+def test_matrix_serves_known_pairs_from_the_cache(matrix_service):
+    matrix_service.get_matrix(["Hotel", "Museum", "Tower"], ["walking"])
+    result = matrix_service.get_matrix(["Hotel lobby", "Museum", "Tower"], ["walking"])
+
+    assert len(matrix_service.calls) == 1
+    assert result["modes"]["walking"]["cells"] == {"cache": 6, "openroute": 0, "estimate": 0}
+    assert result["modes"]["walking"]["distances"][0][1] == 1.001
+
+
+def test_matrix_estimates_cells_the_upstream_cannot_fill(matrix_service, monkeypatch):
+    def partial(upstream, method, url, operation="unknown", **kwargs):
+        return _Response({"distances": [[0.0, None], [2500.0, 0.0]], "durations": [[0.0, None], [600.0, 0.0]]})
+
+    monkeypatch.setattr(route_service.upstream_scheduler, "request", partial)
+    result = matrix_service.get_matrix(["Hotel", "Tower"], ["cycling"])["modes"]["cycling"]
+
+    straight = haversine_m(48.856614, 2.352222, 48.858370, 2.294481)
+    assert result["cells"] == {"cache": 0, "openroute": 1, "estimate": 1}
+    assert result["distances"] == [[0.0, round(straight * 1.3 / 1000, 3)], [2.5, 0.0]]
+    # Estimated cells are not cached, so the next call asks again
+    assert matrix_service.matrix_cache.get(matrix_service._matrix_key("cycling-regular", STOPS["Hotel"], STOPS["Tower"])) is None
+
+
+def test_matrix_falls_back_to_estimates_when_the_upstream_fails(matrix_service, monkeypatch):
+    def fail(*args, **kwargs):
+        raise requests.ConnectionError("OpenRouteService unreachable")
+
+    monkeypatch.setattr(route_service.upstream_scheduler, "request", fail)
+    result = matrix_service.get_matrix(["Hotel", "Museum", "Tower"], ["driving"])
+
+    assert result["success"] is True
+    assert result["modes"]["driving"]["cells"] == {"cache": 0, "openroute": 0, "estimate": 6}
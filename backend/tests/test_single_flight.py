@@ -0,0 +1,55 @@
+import threading
+import time
+
+from app.utils.cache import SingleFlight
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+    results = []
+
+    def fetch(key):
+        calls.append(key)
+        release.wait(1)
+        return f"value for {key}"
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do("paris", fetch, "paris"))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["paris"]
+    assert results == ["value for paris"] * 5
+
+
+def test_single_flight_shares_errors_and_forgets_finished_calls():
+    flight = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def fail():
+        release.wait(1)
+        raise ValueError("upstream down")
+
+    def call():
+        try:
+            flight.do("key", fail)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 3
+    assert len({id(error) for error in errors}) == 1
+    assert flight.do("key", lambda: "recovered") == "recovered"
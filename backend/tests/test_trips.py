@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import itinerary  # noqa: F401
+from app.models.database import Base, get_db
+from app.models.trip import Trip
+from app.routers import trips
+from app.routers.trips import _changed_fields, _replan_stages
+from app.services.registry import (
+    get_ai_service,
+    get_currency_service,
+    get_translation_service,
+    get_weather_service,
+)
+
+
+@pytest.fixture
+def trip():
+    return Trip(
+        source="Berlin", destination="Lisbon", start_date=datetime(2024, 6, 15, 9, 0), end_date=datetime(2024, 6, 20),
+        budget=1500.0, travel_type="cultural", preferences={"pace": "slow"}
+    )
+
+
+def test_unchanged_fields_are_ignored(trip):
+    assert _changed_fields(trip, {"budget": 1500.0, "travel_type": "cultural", "preferences": {"pace": "slow"}}) == {}
+
+
+def test_aware_request_dates_compare_on_the_wall_clock(trip):
+    lisbon = timezone(timedelta(hours=1))
+    requested = {
+        "start_date": datetime(2024, 6, 15, 9, 0, tzinfo=lisbon),
+        "end_date": datetime(2024, 6, 21, tzinfo=timezone.utc),
+    }
+
+    assert _changed_fields(trip, requested) == {"end_date": datetime(2024, 6, 21)}
+
+
+def test_aware_stored_dates_are_normalized_too(trip):
+    trip.start_date = datetime(2024, 6, 15, 9, 0, tzinfo=timezone.utc)
+    assert _changed_fields(trip, {"start_date": datetime(2024, 6, 15, 9, 0)}) == {}
+
+
+@pytest.mark.parametrize("changes, stages", [
+    ({}, []),
+    ({"budget": 900.0}, ["budget"]),
+    ({"end_date": datetime(2024, 6, 21)}, ["planning", "budget"]),
+    ({"preferences": {"pace": "fast"}, "budget": 900.0}, ["planning", "budget"]),
+    ({"travel_type": "adventure"}, ["research", "planning", "budget"]),
+])
+def test_replan_stages(changes, stages):
+    assert _replan_stages(changes) == stages
+
+
+class _FakeAIService:
+    def __init__(self):
+        self.calls = []
+
+    def run_stages(self, trip_data, previous=None, rerun=(), refresh=()):
+        self.calls.append({"rerun": list(rerun), "refresh": list(refresh)})
+        stages = {stage: f"{stage} again" for stage in ("research", "planning", "budget")}
+        return {"itinerary": "## Day 1\n- Alfama", "stages": stages, "ran": list(rerun), "usage": {}, "fallback": False}
+
+
+@pytest.fixture
+def client():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add(Trip(
+            id=1, source="Berlin", destination="Lisbon", start_date=datetime(2024, 6, 15), end_date=datetime(2024, 6, 20),
+            budget=1500.0, travel_type="cultural", itinerary="## Day 1\n- Belém",
+            stage_outputs={"research": "research", "planning": "planning", "budget": "budget"}
+        ))
+        db.commit()
+
+    def session():
+        with Session() as db:
+            yield db
+
+    ai_service = _FakeAIService()
+    app = FastAPI()
+    app.include_router(trips.router)
+    app.dependency_overrides[get_db] = session
+    app.dependency_overrides[get_ai_service] = lambda: ai_service
+    for dependency in (get_weather_service, get_currency_service, get_translation_service):
+        app.dependency_overrides[dependency] = lambda: None
+    client = TestClient(app)
+    client.ai_service = ai_service
+    return client
+
+
+def test_replan_with_the_same_aware_date_changes_nothing(client):
+    response = client.post("/api/trips/1/replan", json={"start_date": "2024-06-15T00:00:00+02:00"})
+
+    assert response.json()["stages_run"] == []
+    assert client.ai_service.calls == []
+
+
+def test_replan_asking_for_research_refreshes_it(client):
+    response = client.post("/api/trips/1/replan", json={"stages": ["research"]})
+
+    assert response.status_code == 200
+    assert client.ai_service.calls == [{"rerun": ["research"], "refresh": ["research"]}]
+
+
+def test_replan_for_a_new_travel_type_may_use_cached_research(client):
+    client.post("/api/trips/1/replan", json={"travel_type": "food"})
+    assert client.ai_service.calls == [{"rerun": ["research", "planning", "budget"], "refresh": []}]
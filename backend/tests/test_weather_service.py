@@ -0,0 +1,191 @@
+import calendar
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import weather
+from app.services import weather_service
+from app.services.registry import get_weather_service
+from app.services.weather_service import DAILY_FIELDS, FORECAST_FIELDS, WeatherService
+
+
+# Slots every three hours from 2026-06-01 21:00 UTC in a city at UTC-2, so the
+# first two slots still fall on June 1st local time
+OFFSET = -7200
+START = calendar.timegm(datetime(2026, 6, 1, 21).timetuple())
+TEMPERATURES = [18.0, 16.5, 14.0, 15.0, 19.0, 23.5, 25.0, 22.0, 20.0, 17.0, 15.5, 16.0]
+POPS = [0.0, 0.1, 0.2, 0.0, 0.0, 0.6, 0.3, 0.0, 0.0, 0.0, 0.4, 0.2]
+DESCRIPTIONS = ["clear sky"] * 5 + ["light rain"] * 2 + ["clear sky"] * 3 + ["few clouds"] * 2
+
+
+class _Response:
+    status_code = 200
+
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+
+def _payload():
+    return {
+        "city": {"id": 2988507, "name": "Paris", "country": "FR", "timezone": OFFSET},
+        "list": [
+            {
+                "dt": START + i * 10800,
+                "main": {"temp": temperature, "feels_like": temperature - 1, "humidity": 70},
+                "weather": [{"description": DESCRIPTIONS[i], "icon": "10d" if "rain" in DESCRIPTIONS[i] else "01d"}],
+                "wind": {"speed": 3.0},
+                "pop": POPS[i],
+            }
+            for i, temperature in enumerate(TEMPERATURES)
+        ],
+    }
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = WeatherService()
+    service.forecast_cache.clear()
+    service.city_ids.clear()
+    calls = []
+
+    def fake_request(upstream, method, url, operation="unknown", **kwargs):
+        calls.append(kwargs["params"]["q"])
+        return _Response(_payload())
+
+    monkeypatch.setattr(weather_service.upstream_scheduler, "request", fake_request)
+    service.calls = calls
+    yield service
+    service.forecast_cache.clear()
+    service.city_ids.clear()
+
+
+@pytest.fixture
+def client(service):
+    app = FastAPI()
+    app.include_router(weather.router)
+    app.dependency_overrides[get_weather_service] = lambda: service
+    return TestClient(app)
+
+
+def _transpose(rows, fields):
+    return {field: [row[field] for row in rows] for field in fields}
+
+
+def test_fetch_forecast_caches_one_list_per_field(service):
+    data = service._fetch_forecast("Paris")
+
+    assert data["timezone"] == OFFSET
+    assert data["columns"]["datetime"] == [START + i * 10800 for i in range(12)]
+    assert data["columns"]["temperature"] == TEMPERATURES
+    assert service.forecast_cache.get("paris") == data
+
+
+def test_daily_aggregate_groups_slots_by_local_day(service):
+    daily = service.get_forecast("Paris", aggregate="daily")["daily"]
+
+    assert [(day["date"], day["slots"]) for day in daily] == [
+        ("2026-06-01", 2), ("2026-06-02", 8), ("2026-06-03", 2),
+    ]
+    assert daily[1] == {
+        "date": "2026-06-02",
+        "temp_min": 14.0,
+        "temp_max": 25.0,
+        "temp_mean": 19.4,
+        "pop_max": 0.6,
+        "description": "clear sky",
+        "icon": "01d",
+        "slots": 8,
+    }
+    assert daily[2]["description"] == "few clouds"
+
+
+def test_aggregate_daily_respects_the_index_range(service):
+    columns = service._fetch_forecast("Paris")["columns"]
+    daily = service._aggregate_daily(columns, OFFSET, 5, 7)
+
+    assert daily == [{
+        "date": "2026-06-02", "temp_min": 23.5, "temp_max": 25.0, "temp_mean": 24.2,
+        "pop_max": 0.6, "description": "light rain", "icon": "10d", "slots": 2,
+    }]
+    assert service._aggregate_daily(columns, OFFSET, 3, 3) == []
+
+
+def test_window_bounds_use_local_midnight(service):
+    timestamps = service._fetch_forecast("Paris")["columns"]["datetime"]
+
+    assert service._window_bounds(timestamps, OFFSET, None, None) == (0, 12)
+    assert service._window_bounds(timestamps, OFFSET, date(2026, 6, 2), date(2026, 6, 2)) == (2, 10)
+    assert service._window_bounds(timestamps, OFFSET, date(2026, 6, 3), None) == (10, 12)
+    assert service._window_bounds(timestamps, 0, date(2026, 6, 2), date(2026, 6, 2)) == (1, 9)
+    # Windows outside the forecast are empty rather than inverted
+    assert service._window_bounds(timestamps, OFFSET, date(2026, 6, 5), date(2026, 6, 1)) == (12, 12)
+
+
+def test_forecast_is_sliced_to_the_trip_window(service):
+    result = service.get_forecast("Paris", start_date=datetime(2026, 6, 2, 15), end_date=date(2026, 6, 2))
+
+    assert result["window"] == {"start_date": "2026-06-02", "end_date": "2026-06-02"}
+    assert [slot["datetime"] for slot in result["forecast"]] == [START + i * 10800 for i in range(2, 10)]
+
+    daily = service.get_forecast("Paris", aggregate="daily", start_date=date(2026, 6, 3))["daily"]
+    assert [day["date"] for day in daily] == ["2026-06-03"]
+    assert "window" not in service.get_forecast("Paris")
+    assert service.calls == ["Paris"]
+
+
+def test_in_forecast_window():
+    service = WeatherService()
+    today = datetime.now(timezone.utc).date()
+    horizon = timedelta(days=weather_service.settings.forecast_horizon_days)
+
+    assert service.in_forecast_window(today)
+    assert service.in_forecast_window(today - timedelta(days=3), today)
+    assert service.in_forecast_window(today + horizon)
+    assert not service.in_forecast_window(today + horizon + timedelta(days=1))
+    assert not service.in_forecast_window(today - timedelta(days=3), today - timedelta(days=1))
+
+
+def test_columnar_forecast_matches_the_rows(service):
+    rows = service.get_forecast("Paris", start_date=date(2026, 6, 2))
+    columnar = service.get_forecast("Paris", start_date=date(2026, 6, 2), format="columnar")
+
+    assert "format" not in rows
+    assert columnar["format"] == "columnar"
+    assert list(columnar["forecast"]) == list(FORECAST_FIELDS)
+    assert columnar["forecast"] == _transpose(rows["forecast"], FORECAST_FIELDS)
+    assert len(columnar["forecast"]["datetime"]) == 10
+    assert columnar["window"] == rows["window"]
+
+
+def test_columnar_slices_leave_the_cache_untouched(service):
+    columnar = service.get_forecast("Paris", format="columnar")
+    columnar["forecast"]["temperature"].clear()
+
+    assert service.forecast_cache.get("paris")["columns"]["temperature"] == TEMPERATURES
+
+
+def test_columnar_daily_aggregate_matches_the_rows(service):
+    rows = service.get_forecast("Paris", aggregate="daily")
+    columnar = service.get_forecast("Paris", aggregate="daily", format="columnar")
+
+    assert columnar["daily"] == _transpose(rows["daily"], DAILY_FIELDS)
+    assert columnar["daily"]["date"] == ["2026-06-01", "2026-06-02", "2026-06-03"]
+    assert "forecast" not in columnar
+
+
+def test_forecast_route_accepts_the_format(client):
+    response = client.get("/api/weather/Paris/forecast", params={"format": "columnar", "end_date": "2026-06-01"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["format"] == "columnar"
+    assert body["forecast"]["temperature"] == TEMPERATURES[:2]
+    assert client.get("/api/weather/Paris/forecast", params={"format": "csv"}).status_code == 422
@@ -51,6 +51,58 @@ const MapView: React.FC<MapViewProps> = ({ source, destination }) => {
           // Fit map to show both markers
           const group = L.featureGroup([sourceMarker, destMarker, routeLine])
           mapInstanceRef.current.fitBounds(group.getBounds().pad(0.1))
+
+          // Accommodations for the visible area: clusters when zoomed out, points when zoomed in
+          const accommodationLayer = L.layerGroup().addTo(mapInstanceRef.current)
+          const loadAccommodations = async () => {
+            const map = mapInstanceRef.current
+            if (!map) return
+            const bounds = map.getBounds()
+            const params = new URLSearchParams({
+              south: String(bounds.getSouth()),
+              west: String(bounds.getWest()),
+              north: String(bounds.getNorth()),
+              east: String(bounds.getEast()),
+              zoom: String(map.getZoom())
+            })
+            try {
+              const response = await fetch(`http://localhost:8000/api/accommodations/viewport?${params}`)
+              if (!response.ok) return
+              const data = await response.json()
+              accommodationLayer.clearLayers()
+              data.clusters.forEach((cluster: { count: number; latitude: number; longitude: number; bounds: number[] }) => {
+                L.circleMarker([cluster.latitude, cluster.longitude], {
+                  radius: Math.min(30, 8 + Math.log2(cluster.count) * 3),
+                  color: '#f59e0b',
+                  fillOpacity: 0.6
+                })
+                  .bindTooltip(`${cluster.count} places to stay`)
+                  .on('click', () => map.fitBounds([
+                    [cluster.bounds[0], cluster.bounds[1]],
+                    [cluster.bounds[2], cluster.bounds[3]]
+                  ]))
+                  .addTo(accommodationLayer)
+              })
+              data.points.forEach((point: { id: string; name: string; latitude: number; longitude: number }) => {
+                const marker = L.circleMarker([point.latitude, point.longitude], { radius: 6, color: '#10b981', fillOpacity: 0.8 })
+                  .bindPopup(point.name)
+                  .addTo(accommodationLayer)
+                // Full details only when a marker is opened
+                marker.on('popupopen', async () => {
+                  const detail = await fetch(`http://localhost:8000/api/accommodations/detail/${point.id}`)
+                  if (!detail.ok) return
+                  const accommodation = await detail.json()
+                  const website = accommodation.contact?.website ? `<br/><a href="${accommodation.contact.website}" target="_blank">Website</a>` : ''
+                  const stars = accommodation.stars ? ` (${accommodation.stars}★)` : ''
+                  marker.setPopupContent(`<b>${accommodation.name}</b>${stars}<br/>${accommodation.tourism_type}${website}`)
+                })
+              })
+            } catch (error) {
+              // Accommodations are an optional overlay
+            }
+          }
+          mapInstanceRef.current.on('moveend', loadAccommodations)
+          loadAccommodations()
         }
       }
     }
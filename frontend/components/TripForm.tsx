@@ -1,6 +1,6 @@
 'use client'
 
-import React, { useState } from 'react'
+import React, { useEffect, useState } from 'react'
 import { Calendar, MapPin, DollarSign, Globe, Sparkles } from 'lucide-react'
 import { TripData } from '../types/trip'
 
@@ -21,6 +21,38 @@ const TripForm: React.FC<TripFormProps> = ({ onPlanTrip, loading }) => {
     language: 'en'
   })
 
+  const [placeSuggestions, setPlaceSuggestions] = useState<string[]>([])
+  const [placeQuery, setPlaceQuery] = useState('')
+
+  // Suggest cities and landmarks from the backend gazetteer as the user types
+  useEffect(() => {
+    if (placeQuery.trim().length < 2) {
+      setPlaceSuggestions([])
+      return
+    }
+    const controller = new AbortController()
+    const timer = setTimeout(async () => {
+      try {
+        const response = await fetch(
+          `http://localhost:8000/api/places/autocomplete?q=${encodeURIComponent(placeQuery)}&limit=8`,
+          { signal: controller.signal }
+        )
+        if (response.ok) {
+          const data = await response.json()
+          setPlaceSuggestions(data.places.map((place: { name: string; country_code: string }) =>
+            place.country_code ? `${place.name}, ${place.country_code}` : place.name
+          ))
+        }
+      } catch (error) {
+        // Suggestions are optional; typing still works without them
+      }
+    }, 200)
+    return () => {
+      clearTimeout(timer)
+      controller.abort()
+    }
+  }, [placeQuery])
+
   const travelTypes = [
     { value: 'general', label: 'General' },
     { value: 'budget', label: 'Budget' },
@@ -69,7 +101,11 @@ const TripForm: React.FC<TripFormProps> = ({ onPlanTrip, loading }) => {
             <input
               type="text"
               value={formData.source}
-              onChange={(e) => handleInputChange('source', e.target.value)}
+              onChange={(e) => {
+                handleInputChange('source', e.target.value)
+                setPlaceQuery(e.target.value)
+              }}
+              list="place-suggestions"
               placeholder="Enter departure city"
               className="input-field"
               required
@@ -83,7 +119,11 @@ const TripForm: React.FC<TripFormProps> = ({ onPlanTrip, loading }) => {
             <input
               type="text"
               value={formData.destination}
-              onChange={(e) => handleInputChange('destination', e.target.value)}
+              onChange={(e) => {
+                handleInputChange('destination', e.target.value)
+                setPlaceQuery(e.target.value)
+              }}
+              list="place-suggestions"
               placeholder="Enter destination city"
               className="input-field"
               required
@@ -91,6 +131,12 @@ const TripForm: React.FC<TripFormProps> = ({ onPlanTrip, loading }) => {
           </div>
         </div>
 
+        <datalist id="place-suggestions">
+          {placeSuggestions.map(suggestion => (
+            <option key={suggestion} value={suggestion} />
+          ))}
+        </datalist>
+
         {/* Dates */}
         <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
           <div>
@@ -17,7 +17,8 @@ const TripPlanner = () => {
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify(tripData),
+        // Ask for one summary per day instead of 40 three-hour slots
+        body: JSON.stringify({ ...tripData, forecast_aggregate: 'daily' }),
       })
 
       if (!response.ok) {
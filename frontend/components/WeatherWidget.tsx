@@ -1,7 +1,7 @@
 'use client'
 
 import React from 'react'
-import { WeatherData, ForecastData } from '../types/trip'
+import { WeatherData, ForecastData, DailyForecast } from '../types/trip'
 import { Cloud, Sun, Wind, Droplets, Thermometer } from 'lucide-react'
 
 interface WeatherWidgetProps {
@@ -93,11 +93,56 @@ const WeatherWidget: React.FC<WeatherWidgetProps> = ({ weather, forecast }) => {
         </div>
       </div>
 
-      {/* 5-Day Forecast */}
+      {/* Typical weather for trips beyond the forecast */}
+      {forecast.source === 'climatology' && forecast.summary ? (
+      <div>
+        <h4 className="text-lg font-semibold text-gray-900 mb-4">Typical Weather for Your Dates</h4>
+        <div className="bg-white border border-gray-200 rounded-lg p-4 flex justify-around text-center">
+          <div>
+            <p className="text-sm text-gray-600">Temperature</p>
+            <p className="font-semibold">
+              {Math.round(forecast.summary.temp_min)}° to {Math.round(forecast.summary.temp_max)}°C
+            </p>
+          </div>
+          <div>
+            <p className="text-sm text-gray-600">Average</p>
+            <p className="font-semibold">{Math.round(forecast.summary.temp_mean)}°C</p>
+          </div>
+          <div>
+            <p className="text-sm text-gray-600">Expected rain</p>
+            <p className="font-semibold">{Math.round(forecast.summary.precip_mm)} mm</p>
+          </div>
+        </div>
+        <p className="text-xs text-gray-500 mt-2">
+          Based on climate averages; a live forecast is shown once the trip is within 5 days.
+        </p>
+      </div>
+      ) : forecast.source === 'unavailable' ? (
+      <div className="bg-gray-50 rounded-lg p-4 text-sm text-gray-600">
+        No forecast or climate averages are available for these dates yet.
+      </div>
+      ) : (
+      /* 5-Day Forecast */
       <div>
         <h4 className="text-lg font-semibold text-gray-900 mb-4">5-Day Forecast</h4>
         <div className="grid grid-cols-1 md:grid-cols-5 gap-4">
-          {forecast.forecast.slice(0, 5).map((item, index) => (
+          {forecast.daily ? (forecast.daily as DailyForecast[]).slice(0, 5).map((day) => (
+            <div key={day.date} className="bg-white border border-gray-200 rounded-lg p-4 text-center">
+              <p className="text-sm text-gray-600">
+                {new Date(`${day.date}T12:00:00`).toLocaleDateString('en-US', { weekday: 'short' })}
+              </p>
+              <div className="text-2xl my-2">
+                {getWeatherIcon(day.icon)}
+              </div>
+              <p className="font-semibold">
+                {Math.round(day.temp_max)}° / {Math.round(day.temp_min)}°C
+              </p>
+              <p className="text-sm text-gray-600 capitalize">{day.description}</p>
+              <p className="text-xs text-gray-500 mt-1">
+                {Math.round(day.pop_max * 100)}% rain
+              </p>
+            </div>
+          )) : (forecast.forecast || []).slice(0, 5).map((item, index) => (
             <div key={index} className="bg-white border border-gray-200 rounded-lg p-4 text-center">
               <p className="text-sm text-gray-600">
                 {new Date(item.datetime * 1000).toLocaleDateString('en-US', { weekday: 'short' })}
@@ -114,6 +159,7 @@ const WeatherWidget: React.FC<WeatherWidgetProps> = ({ weather, forecast }) => {
           ))}
         </div>
       </div>
+      )}
 
       {/* Sunrise/Sunset */}
       <div className="bg-gray-50 rounded-lg p-4">
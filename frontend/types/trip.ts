@@ -7,6 +7,8 @@ export interface TripData {
   travel_type?: string
   preferences?: Record<string, any>
   language?: string
+  forecast_aggregate?: 'daily'
+  forecast_trip_window?: boolean
 }
 
 export interface TripResult {
@@ -38,7 +40,37 @@ export interface WeatherData {
 export interface ForecastData {
   city: string
   country: string
-  forecast: ForecastItem[]
+  source?: 'climatology' | 'unavailable'
+  reason?: string
+  forecast?: ForecastItem[]
+  daily?: DailyForecast[] | ClimateDay[]
+  summary?: ClimateSummary
+}
+
+export interface ClimateDay {
+  date: string
+  temp_min: number
+  temp_max: number
+  temp_mean: number
+  precip_mm: number
+}
+
+export interface ClimateSummary {
+  temp_min: number
+  temp_max: number
+  temp_mean: number
+  precip_mm: number
+}
+
+export interface DailyForecast {
+  date: string
+  temp_min: number
+  temp_max: number
+  temp_mean: number
+  pop_max: number
+  description: string
+  icon: string
+  slots: number
 }
 
 export interface ForecastItem {